@@ -8,11 +8,25 @@ Handles connector control, data quarantine, rollback SQL generation, and alertin
 import os
 import sys
 from pathlib import Path
-from typing import Dict, List, Optional
-from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, date, timezone
 from google.cloud import bigquery
+from google.cloud import bigquery_storage_v1
+from google.cloud.bigquery_storage_v1 import types as bqs_types
+from google.cloud.bigquery_storage_v1 import writer as bqs_writer
+from google.api_core import retry
+from google.protobuf import descriptor_pb2, descriptor_pool, message_factory
+import google.api_core.exceptions
 from dotenv import load_dotenv
+from itertools import islice
 import json
+import re
+import threading
+import uuid
+from cachetools import TTLCache
+from concurrent.futures import ThreadPoolExecutor
 
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -21,16 +35,109 @@ from agents.fivetran_client import FivetranClient
 
 load_dotenv()
 
+def _utc_now() -> datetime:
+    """Timezone-aware current UTC time (datetime.utcnow() is deprecated)"""
+    return datetime.now(timezone.utc)
+
+
+def _iso_z(moment: datetime) -> str:
+    """Format an aware UTC datetime as ISO 8601 with a trailing Z"""
+    return moment.isoformat().replace("+00:00", "Z")
+
+
+# Keep the most recent actions in memory; older ones are dropped
+ACTION_HISTORY_SIZE = 1000
+
+
+@dataclass(slots=True)
+class ActionResult:
+    """Outcome of one execute_action() call (slotted to keep history compact)"""
+    action_id: str
+    decision_id: Optional[str]
+    timestamp: str
+    action_type: Optional[str]
+    actions_taken: List[str] = field(default_factory=list)
+    success: bool = True
+    details: Dict = field(default_factory=dict)
+    errors: List[str] = field(default_factory=list)
+    
+    def to_dict(self) -> Dict:
+        """Shallow dict view for JSON responses and logging"""
+        return {
+            "action_id": self.action_id,
+            "decision_id": self.decision_id,
+            "timestamp": self.timestamp,
+            "action_type": self.action_type,
+            "actions_taken": self.actions_taken,
+            "success": self.success,
+            "details": self.details,
+            "errors": self.errors
+        }
+
+
+# Errors that make the Storage Write API path fall back to a DML job
+_WRITE_FALLBACK_ERRORS = (
+    google.api_core.exceptions.ServiceUnavailable,
+    google.api_core.exceptions.TooManyRequests,  # includes gRPC ResourceExhausted (quota)
+)
+
+# Quarantine flush failures worth retrying later (server-side or transport
+# trouble); anything else - bad schema, unsupported column, bad request - won't
+# heal by itself
+_RETRYABLE_FLUSH_ERRORS = (
+    google.api_core.exceptions.ServerError,
+    google.api_core.exceptions.TooManyRequests,
+    ConnectionError,
+    TimeoutError,
+)
+
+# BigQuery column type -> protobuf field type for Storage Write API rows
+_PROTO_TYPES = {
+    "STRING": descriptor_pb2.FieldDescriptorProto.TYPE_STRING,
+    "BYTES": descriptor_pb2.FieldDescriptorProto.TYPE_BYTES,
+    "INTEGER": descriptor_pb2.FieldDescriptorProto.TYPE_INT64,
+    "INT64": descriptor_pb2.FieldDescriptorProto.TYPE_INT64,
+    "FLOAT": descriptor_pb2.FieldDescriptorProto.TYPE_DOUBLE,
+    "FLOAT64": descriptor_pb2.FieldDescriptorProto.TYPE_DOUBLE,
+    "BOOLEAN": descriptor_pb2.FieldDescriptorProto.TYPE_BOOL,
+    "BOOL": descriptor_pb2.FieldDescriptorProto.TYPE_BOOL,
+    "TIMESTAMP": descriptor_pb2.FieldDescriptorProto.TYPE_INT64,  # epoch microseconds
+    "DATE": descriptor_pb2.FieldDescriptorProto.TYPE_INT32,  # days since epoch
+    "DATETIME": descriptor_pb2.FieldDescriptorProto.TYPE_STRING,
+    "TIME": descriptor_pb2.FieldDescriptorProto.TYPE_STRING,
+    "NUMERIC": descriptor_pb2.FieldDescriptorProto.TYPE_STRING,
+    "BIGNUMERIC": descriptor_pb2.FieldDescriptorProto.TYPE_STRING,
+    "JSON": descriptor_pb2.FieldDescriptorProto.TYPE_STRING,
+}
+
+# Article IDs quoted in anomaly evidence, e.g. "Article ID 'TEST_001' contains..."
+_ARTICLE_ID_RE = re.compile(r"(?:Article ID|(?i:article_id))[^'\n]*'([^'\n]+)'")
+
+# Rows per AppendRowsRequest (well under the 10 MB request limit for news rows)
+_APPEND_BATCH_ROWS = 500
+
 
 class ActionExecutor:
     """Executes autonomous pipeline actions"""
     
+    # Buffered quarantine writes are flushed at this many IDs or after this delay
+    QUARANTINE_FLUSH_ROWS = 500
+    QUARANTINE_FLUSH_SECONDS = 5.0
+    
+    # Failed flushes are retried with exponential backoff up to this many times;
+    # then (or at once, for non-retryable errors) the rows are dead-lettered
+    QUARANTINE_MAX_RETRIES = 5
+    QUARANTINE_RETRY_MAX_SECONDS = 300.0
+    
     def __init__(
         self,
         project_id: Optional[str] = None,
         dataset_id: Optional[str] = None,
         table_id: Optional[str] = None,
-        connector_id: Optional[str] = None
+        connector_id: Optional[str] = None,
+        bq_client: Optional[bigquery.Client] = None,
+        memory=None,
+        fivetran_client: Optional[FivetranClient] = None
     ):
         """
         Initialize action executor
@@ -40,18 +147,100 @@ class ActionExecutor:
             dataset_id: BigQuery dataset (or from env)
             table_id: BigQuery table (or from env)
             connector_id: Fivetran connector ID (or from env)
+            bq_client: Shared BigQuery client (created if omitted)
+            memory: Shared AgentMemory for the Firestore action mirror (created lazily if omitted)
+            fivetran_client: Shared FivetranClient (created if omitted)
         """
         self.project_id = project_id or os.getenv("PROJECT_ID")
         self.dataset_id = dataset_id or os.getenv("DATASET_ID")
         self.table_id = table_id or os.getenv("TABLE_ID")
         self.connector_id = connector_id or os.getenv("FIVETRAN_CONNECTOR_ID")
         
+        # Quarantine/rollback SQL only depends on the tables, so format it once;
+        # per-call values are bound as query parameters
+        self.quarantine_table = f"{self.project_id}.{self.dataset_id}.quarantine"
+        self.source_table = f"{self.project_id}.{self.dataset_id}.{self.table_id}"
+        self._build_sql()
+        
         # Initialize clients
-        self.bq_client = bigquery.Client(project=self.project_id)
-        self.fivetran_client = FivetranClient()
+        self.bq_client = bq_client or bigquery.Client(project=self.project_id)
+        self.fivetran_client = fivetran_client or FivetranClient()
+        self._write_client = None  # Lazily created BigQueryWriteClient
+        self._quarantine_ready = False
+        self._quarantine_row_class = None
+        
+        # Pending (article_id, reason) pairs for the next batched quarantine write
+        self._quarantine_buffer = []
+        self._quarantine_lock = threading.Lock()
+        self._flush_timer = None
+        self._flush_failures = 0  # Consecutive failed flushes (drives the retry backoff)
+        
+        # Rows given up on after failed flushes, kept for inspection/replay
+        self.quarantine_dead_letter = deque(maxlen=ACTION_HISTORY_SIZE)
         
-        # Track actions
-        self.action_history = []
+        # Independent actions of one decision run concurrently
+        self._action_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="action")
+        
+        # Quarantine writes run off the caller's thread; status is kept for an hour
+        self._job_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="quarantine")
+        self._jobs = TTLCache(maxsize=1000, ttl=3600)
+        self._jobs_lock = threading.Lock()
+        
+        # Track actions: the deque is a hot cache, Firestore holds the durable copy
+        self.action_history = deque(maxlen=ACTION_HISTORY_SIZE)
+        self._memory = memory  # AgentMemory for mirroring; created lazily if not shared
+        self._mirror_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="action-mirror")
+    
+    def _build_sql(self) -> None:
+        """Precompute the constant SQL text used by quarantine and rollback"""
+        create_sql = f"""
+        CREATE TABLE IF NOT EXISTS `{self.quarantine_table}` AS
+        SELECT 
+            *,
+            CURRENT_TIMESTAMP() as quarantined_at,
+            'initial' as quarantine_reason
+        FROM `{self.source_table}`
+        WHERE FALSE"""
+        
+        select_sql = f"""
+        SELECT 
+            src.*,
+            CURRENT_TIMESTAMP() as quarantined_at,
+            q.reason as quarantine_reason
+        FROM `{self.source_table}` AS src
+        JOIN UNNEST(@quarantine_rows) AS q
+        ON src.article_id = q.article_id"""
+        
+        self._create_quarantine_sql = create_sql
+        self._select_quarantine_sql = select_sql
+        
+        # Create the quarantine table (if needed), copy the affected rows and
+        # report the inserted row count in a single BigQuery script job
+        self._insert_quarantine_sql = f"""{create_sql};
+        
+        INSERT INTO `{self.quarantine_table}`{select_sql};
+        
+        SELECT @@row_count AS rows_inserted;
+        """
+        
+        self._rollback_sql = f"""-- Step 1: Restore data to main table
+INSERT INTO `{self.source_table}`
+SELECT * EXCEPT(quarantined_at, quarantine_reason)
+FROM `{self.quarantine_table}`
+WHERE article_id IN UNNEST(@ids);
+
+-- Step 2: Remove from quarantine
+DELETE FROM `{self.quarantine_table}`
+WHERE article_id IN UNNEST(@ids);
+
+-- Step 3: Verify restoration
+SELECT 
+    COUNT(*) as restored_count,
+    MIN(published_at) as earliest_date,
+    MAX(published_at) as latest_date
+FROM `{self.source_table}`
+WHERE article_id IN UNNEST(@ids);
+"""
     
     def execute_action(self, decision: Dict) -> Dict:
         """
@@ -72,67 +261,93 @@ class ActionExecutor:
         action_type = decision.get("action")
         requirements = decision.get("requirements", {})
         
-        result = {
-            "action_id": f"act_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}",
-            "decision_id": decision.get("decision_id"),
-            "timestamp": datetime.utcnow().isoformat() + "Z",
-            "action_type": action_type,
-            "actions_taken": [],
-            "success": True,
-            "details": {},
-            "errors": []
-        }
+        # Read the clock once; every sub-action stamps the same time
+        now = _utc_now()
+        
+        result = ActionResult(
+            action_id=f"act_{now.strftime('%Y%m%d_%H%M%S')}",
+            decision_id=decision.get("decision_id"),
+            timestamp=_iso_z(now),
+            action_type=action_type
+        )
         
         print(f"\n🎯 Executing action: {action_type}")
         print(f"   Decision ID: {decision.get('decision_id')[:8]}...")
         
         try:
-            # Execute based on requirements
+            anomaly_alert = decision.get("inputs", {}).get("anomaly_alert", {})
+            affected_ids = self._extract_affected_ids(anomaly_alert)
+            
+            # The actions are independent (Fivetran HTTP, BigQuery, CPU, console),
+            # so start them together; total latency is the slowest, not the sum
+            steps = []
             if requirements.get("pause_connector"):
-                pause_result = self.pause_connector()
-                result["actions_taken"].append("pause_connector")
-                result["details"]["pause_connector"] = pause_result
+                steps.append(("pause_connector", self._action_pool.submit(self.pause_connector, now)))
             
             if requirements.get("quarantine_data"):
-                # Get affected rows from decision
-                anomaly_alert = decision.get("inputs", {}).get("anomaly_alert", {})
-                affected_ids = self._extract_affected_ids(anomaly_alert)
-                
-                quarantine_result = self.quarantine_data(affected_ids)
-                result["actions_taken"].append("quarantine_data")
-                result["details"]["quarantine_data"] = quarantine_result
+                # Critical decisions can't wait for the batch window
+                steps.append(("quarantine_data", self._action_pool.submit(
+                    self.quarantine_data,
+                    affected_ids,
+                    immediate=decision.get("priority") == "CRITICAL",
+                    now=now
+                )))
             
             if requirements.get("generate_rollback"):
-                anomaly_alert = decision.get("inputs", {}).get("anomaly_alert", {})
-                affected_ids = self._extract_affected_ids(anomaly_alert)
-                
-                rollback_sql = self.generate_rollback_sql(affected_ids)
-                result["actions_taken"].append("generate_rollback")
-                result["details"]["rollback_sql"] = rollback_sql
+                steps.append(("generate_rollback", self._action_pool.submit(
+                    self.generate_rollback_sql, affected_ids
+                )))
             
             if requirements.get("send_alert"):
-                alert_result = self.send_alert(decision)
-                result["actions_taken"].append("send_alert")
-                result["details"]["alert"] = alert_result
+                steps.append(("send_alert", self._action_pool.submit(self.send_alert, decision, now)))
             
-            # Log action
-            self.log_action(result)
+            # Merge in requirement order so actions_taken stays deterministic.
+            # One failing step must not hide the ones that already ran, so every
+            # outcome is collected before anything is reported.
+            for action_name, future in steps:
+                try:
+                    outcome = future.result()
+                except Exception as e:
+                    result.success = False
+                    result.errors.append(f"{action_name}: {e}")
+                    result.details[action_name] = {"error": str(e)}
+                    continue
+                result.actions_taken.append(action_name)
+                if action_name == "generate_rollback":
+                    result.details["rollback_sql"], result.details["rollback_params"] = outcome
+                elif action_name == "send_alert":
+                    result.details["alert"] = outcome
+                else:
+                    result.details[action_name] = outcome
             
-            print(f"✅ Action executed successfully")
-            print(f"   Actions taken: {', '.join(result['actions_taken'])}")
+            if result.success:
+                print(f"✅ Action executed successfully")
+            else:
+                print(f"⚠️ Action partially failed: {'; '.join(result.errors)}")
+            print(f"   Actions taken: {', '.join(result.actions_taken)}")
         
         except Exception as e:
-            result["success"] = False
-            result["errors"].append(str(e))
+            result.success = False
+            result.errors.append(str(e))
             print(f"❌ Action execution failed: {e}")
         
+        # Log action (failed ones too)
+        self.log_action(result.to_dict())
+        
         self.action_history.append(result)
-        return result
+        
+        # Fire-and-forget: don't hold up the orchestration cycle on Firestore
+        action_dict = result.to_dict()
+        self._mirror_pool.submit(self._mirror_action, action_dict)
+        return action_dict
     
-    def pause_connector(self) -> Dict:
+    def pause_connector(self, now: Optional[datetime] = None) -> Dict:
         """
         Pause Fivetran connector
         
+        Args:
+            now: Timestamp to record (defaults to the current time)
+        
         Returns:
             Result dict with status
         """
@@ -142,7 +357,7 @@ class ActionExecutor:
                 "success": True,
                 "connector_id": self.connector_id,
                 "paused": response.get("paused"),
-                "timestamp": datetime.utcnow().isoformat() + "Z"
+                "timestamp": _iso_z(now or _utc_now())
             }
         except Exception as e:
             print(f"⚠️  Pause connector failed: {e}")
@@ -152,10 +367,13 @@ class ActionExecutor:
                 "error": str(e)
             }
     
-    def resume_connector(self) -> Dict:
+    def resume_connector(self, now: Optional[datetime] = None) -> Dict:
         """
         Resume Fivetran connector
         
+        Args:
+            now: Timestamp to record (defaults to the current time)
+        
         Returns:
             Result dict with status
         """
@@ -165,7 +383,7 @@ class ActionExecutor:
                 "success": True,
                 "connector_id": self.connector_id,
                 "paused": response.get("paused"),
-                "timestamp": datetime.utcnow().isoformat() + "Z"
+                "timestamp": _iso_z(now or _utc_now())
             }
         except Exception as e:
             print(f"⚠️  Resume connector failed: {e}")
@@ -175,15 +393,29 @@ class ActionExecutor:
                 "error": str(e)
             }
     
-    def quarantine_data(self, affected_ids: List[str]) -> Dict:
+    def quarantine_data(
+        self,
+        affected_ids: List[str],
+        reason: str = "anomaly_detected",
+        immediate: bool = False,
+        now: Optional[datetime] = None
+    ) -> Dict:
         """
         Move suspicious data to quarantine table
         
+        IDs are buffered and written in one batch when the buffer reaches
+        QUARANTINE_FLUSH_ROWS IDs or QUARANTINE_FLUSH_SECONDS after the first
+        queued ID, so bursts of alerts share a single BigQuery write.
+        
         Args:
             affected_ids: List of article IDs to quarantine
+            reason: quarantine_reason stored with each row
+            immediate: Flush the buffer (including these IDs) right away
+            now: Timestamp to record (defaults to the current time)
         
         Returns:
-            Quarantine result dict
+            Quarantine result dict; flushes return a PENDING job_id that can be
+            polled with get_job_status()
         """
         if not affected_ids:
             print("⚠️  No affected IDs provided for quarantine")
@@ -193,125 +425,454 @@ class ActionExecutor:
                 "rows_quarantined": 0
             }
         
-        quarantine_table = f"{self.project_id}.{self.dataset_id}.quarantine"
-        source_table = f"{self.project_id}.{self.dataset_id}.{self.table_id}"
+        with self._quarantine_lock:
+            self._quarantine_buffer.extend((article_id, reason) for article_id in affected_ids)
+            buffered = len(self._quarantine_buffer)
+            
+            if not immediate and buffered < self.QUARANTINE_FLUSH_ROWS:
+                if self._flush_timer is None:
+                    self._arm_flush_timer(self.QUARANTINE_FLUSH_SECONDS)
+                
+                print(f"🔒 Queued {len(affected_ids)} rows for quarantine ({buffered} pending)")
+                return {
+                    "success": True,
+                    "queued": True,
+                    "rows_queued": len(affected_ids),
+                    "rows_quarantined": 0,
+                    "affected_ids": affected_ids,
+                    "timestamp": _iso_z(now or _utc_now())
+                }
         
-        print(f"🔒 Quarantining {len(affected_ids)} rows...")
+        return self.flush_quarantine(wait=False)
+    
+    def flush_quarantine(self, wait: bool = True) -> Dict:
+        """
+        Write every buffered quarantine row in a single batch
         
-        try:
-            # Create quarantine table if not exists
-            create_query = f"""
-            CREATE TABLE IF NOT EXISTS `{quarantine_table}` AS
-            SELECT 
-                *,
-                CURRENT_TIMESTAMP() as quarantined_at,
-                'initial' as quarantine_reason
-            FROM `{source_table}`
-            WHERE FALSE
-            """
-            
-            self.bq_client.query(create_query).result()
-            
-            # Insert affected rows into quarantine
-            # Using STRING type since article_id is STRING
-            insert_query = f"""
-            INSERT INTO `{quarantine_table}`
-            SELECT 
-                *,
-                CURRENT_TIMESTAMP() as quarantined_at,
-                'anomaly_detected' as quarantine_reason
-            FROM `{source_table}`
-            WHERE article_id IN UNNEST(@affected_ids)
-            """
-            
-            job_config = bigquery.QueryJobConfig(
-                query_parameters=[
-                    bigquery.ArrayQueryParameter("affected_ids", "STRING", affected_ids)
-                ]
+        Args:
+            wait: Block until the write finishes; otherwise run it in the
+                background and return a PENDING job handle
+        
+        Returns:
+            Quarantine result dict
+        """
+        if wait:
+            return self._flush_quarantine()
+        
+        job_id = f"qjob_{uuid.uuid4().hex[:12]}"
+        with self._jobs_lock:
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "state": "PENDING",
+                "submitted_at": _iso_z(_utc_now())
+            }
+        self._job_pool.submit(self._run_quarantine_job, job_id)
+        
+        print(f"🔒 Quarantine job {job_id} submitted")
+        return {
+            "success": True,
+            "status": "PENDING",
+            "job_id": job_id,
+            "rows_quarantined": 0
+        }
+    
+    def _run_quarantine_job(self, job_id: str) -> None:
+        """Background body of a non-blocking flush"""
+        result = self._flush_quarantine(job_id)
+        with self._jobs_lock:
+            job = self._jobs.setdefault(job_id, {"job_id": job_id})
+            job.update(
+                state="DONE" if result.get("success") else "FAILED",
+                finished_at=_iso_z(_utc_now()),
+                result=result
             )
-            
-            insert_job = self.bq_client.query(insert_query, job_config=job_config)
-            insert_job.result()
-            rows_inserted = insert_job.num_dml_affected_rows or 0
+    
+    def get_job_status(self, job_id: str) -> Optional[Dict]:
+        """
+        Get the status of a background quarantine job
+        
+        While a DML write is still running, its BigQuery job state is refreshed
+        with bigquery.Client.get_job.
+        
+        Returns:
+            Job status dict, or None if the job is unknown or expired
+        """
+        with self._jobs_lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            job = dict(job)
+        
+        if job["state"] == "PENDING" and job.get("bigquery_job_id"):
+            bq_job = self.bq_client.get_job(job["bigquery_job_id"], location=job.get("location"))
+            job["bigquery_state"] = bq_job.state
+        
+        return job
+    
+    def _flush_quarantine(self, job_id: Optional[str] = None) -> Dict:
+        """Drain the buffer and write it to the quarantine table"""
+        with self._quarantine_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            pending, self._quarantine_buffer = self._quarantine_buffer, []
+        
+        # One row per article; the first queued reason wins
+        reasons = {}
+        for article_id, reason in pending:
+            reasons.setdefault(article_id, reason)
+        if not reasons:
+            return {"success": True, "rows_quarantined": 0, "affected_ids": []}
+        
+        print(f"🔒 Quarantining {len(reasons)} rows...")
+        
+        try:
+            try:
+                rows_inserted = self._append_quarantine_rows(reasons)
+                write_method = "storage_write_api"
+            except _WRITE_FALLBACK_ERRORS as e:
+                print(f"   ⚠️  Storage Write API unavailable ({e}), falling back to DML")
+                rows_inserted = self._insert_quarantine_rows(reasons, job_id)
+                write_method = "dml"
             
             print(f"   ✅ {rows_inserted} rows inserted into quarantine")
+            with self._quarantine_lock:
+                self._flush_failures = 0
             
             # Note: Don't delete from source table for now (streaming buffer limitation)
             # In production, would delete after streaming buffer clears
             
             return {
                 "success": True,
-                "quarantine_table": quarantine_table,
+                "quarantine_table": self.quarantine_table,
                 "rows_quarantined": rows_inserted,
-                "affected_ids": affected_ids,
-                "timestamp": datetime.utcnow().isoformat() + "Z"
+                "affected_ids": list(reasons),
+                "write_method": write_method,
+                "timestamp": _iso_z(_utc_now())
             }
         
         except Exception as e:
             print(f"❌ Quarantine failed: {e}")
-            return {
-                "success": False,
-                "error": str(e),
-                "rows_quarantined": 0
-            }
+            return self._handle_flush_failure(pending, e)
+    
+    def _handle_flush_failure(self, pending: List[Tuple[str, str]], error: Exception) -> Dict:
+        """
+        Requeue a failed batch with a backoff timer, or dead-letter it
+        
+        Retryable errors put the rows back at the front of the buffer and re-arm
+        the flush timer (QUARANTINE_FLUSH_SECONDS doubling per consecutive
+        failure, capped at QUARANTINE_RETRY_MAX_SECONDS). Other errors, or
+        QUARANTINE_MAX_RETRIES failures in a row, move the rows to
+        quarantine_dead_letter so they can't wedge the buffer.
+        """
+        with self._quarantine_lock:
+            self._flush_failures += 1
+            failures = self._flush_failures
+            retry_later = (
+                isinstance(error, _RETRYABLE_FLUSH_ERRORS)
+                and failures <= self.QUARANTINE_MAX_RETRIES
+            )
+            
+            if retry_later:
+                self._quarantine_buffer[:0] = pending
+                delay = min(
+                    self.QUARANTINE_FLUSH_SECONDS * 2 ** failures,
+                    self.QUARANTINE_RETRY_MAX_SECONDS
+                )
+                if self._flush_timer is not None:
+                    self._flush_timer.cancel()
+                self._arm_flush_timer(delay)
+            else:
+                self._flush_failures = 0
+                failed_at = _iso_z(_utc_now())
+                self.quarantine_dead_letter.extend(
+                    {"article_id": article_id, "reason": reason, "error": str(error), "failed_at": failed_at}
+                    for article_id, reason in pending
+                )
+        
+        if retry_later:
+            print(f"   🔁 Retrying {len(pending)} quarantine rows in {delay:.0f}s (attempt {failures})")
+        else:
+            print(
+                f"❌ Dropping {len(pending)} quarantine rows after {failures} failed attempt(s) "
+                f"({type(error).__name__}); see quarantine_dead_letter"
+            )
+        
+        return {
+            "success": False,
+            "error": str(error),
+            "retrying": retry_later,
+            "rows_quarantined": 0
+        }
+    
+    def _arm_flush_timer(self, delay: float) -> None:
+        """Start the background flush timer (caller holds _quarantine_lock)"""
+        self._flush_timer = threading.Timer(delay, self._flush_on_timer)
+        self._flush_timer.daemon = True
+        self._flush_timer.start()
+    
+    def _flush_on_timer(self) -> None:
+        """Background flush once the oldest buffered ID has waited long enough"""
+        with self._quarantine_lock:
+            self._flush_timer = None
+        self._flush_quarantine()
+    
+    @staticmethod
+    def _quarantine_rows_param(reasons: Dict[str, str]) -> bigquery.ArrayQueryParameter:
+        """ARRAY<STRUCT<article_id, reason>> parameter so one statement carries per-row reasons"""
+        return bigquery.ArrayQueryParameter(
+            "quarantine_rows",
+            "STRUCT",
+            [
+                bigquery.StructQueryParameter(
+                    None,
+                    bigquery.ScalarQueryParameter("article_id", "STRING", article_id),
+                    bigquery.ScalarQueryParameter("reason", "STRING", reason)
+                )
+                for article_id, reason in reasons.items()
+            ]
+        )
+    
+    def _ensure_quarantine_table(self) -> None:
+        """Create the quarantine table once per executor (DDL is only needed on first use)"""
+        if self._quarantine_ready:
+            return
+        
+        self.bq_client.query_and_wait(self._create_quarantine_sql)
+        self._quarantine_ready = True
     
-    def generate_rollback_sql(self, affected_ids: List[str]) -> str:
+    def _append_quarantine_rows(self, reasons: Dict[str, str]) -> int:
+        """
+        Stream affected rows into quarantine via the BigQuery Storage Write API
+        
+        Rows are read once with a short parameterized SELECT and appended to the
+        table's default stream, so no DML job (or DML quota) is involved.
+        
+        Args:
+            reasons: Article ID -> quarantine reason
+        
+        Returns:
+            Number of rows appended
+        """
+        self._ensure_quarantine_table()
+        
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[self._quarantine_rows_param(reasons)]
+        )
+        rows = list(self.bq_client.query_and_wait(
+            self._select_quarantine_sql, job_config=job_config
+        ))
+        if not rows:
+            return 0
+        
+        schema, row_class, row_proto = self._get_quarantine_row_class(self.quarantine_table)
+        
+        if self._write_client is None:
+            self._write_client = bigquery_storage_v1.BigQueryWriteClient()
+        
+        parent = self._write_client.table_path(self.project_id, self.dataset_id, "quarantine")
+        proto_schema = bqs_types.ProtoSchema(proto_descriptor=row_proto)
+        request_template = bqs_types.AppendRowsRequest(
+            write_stream=f"{parent}/streams/_default",
+            proto_rows=bqs_types.AppendRowsRequest.ProtoData(writer_schema=proto_schema)
+        )
+        append_stream = bqs_writer.AppendRowsStream(self._write_client, request_template)
+        
+        try:
+            # Pipeline every batch on the same connection, then wait for all acks
+            futures = []
+            for offset in range(0, len(rows), _APPEND_BATCH_ROWS):
+                proto_rows = bqs_types.ProtoRows()
+                for row in rows[offset:offset + _APPEND_BATCH_ROWS]:
+                    proto_rows.serialized_rows.append(
+                        self._to_proto_row(row, schema, row_class).SerializeToString()
+                    )
+                request = bqs_types.AppendRowsRequest(
+                    proto_rows=bqs_types.AppendRowsRequest.ProtoData(rows=proto_rows)
+                )
+                futures.append(append_stream.send(request))
+            
+            for future in futures:
+                future.result()
+        finally:
+            append_stream.close()
+        
+        return len(rows)
+    
+    def _get_quarantine_row_class(self, quarantine_table: str):
+        """Build (and cache) a protobuf message class matching the quarantine schema"""
+        if self._quarantine_row_class is None:
+            schema = self.bq_client.get_table(quarantine_table).schema
+            
+            row_proto = descriptor_pb2.DescriptorProto(name="QuarantineRow")
+            for number, schema_field in enumerate(schema, start=1):
+                proto_type = _PROTO_TYPES.get(schema_field.field_type)
+                if proto_type is None:
+                    raise ValueError(
+                        f"Column '{schema_field.name}' of type {schema_field.field_type} "
+                        "is not supported by the quarantine writer"
+                    )
+                row_proto.field.add(
+                    name=schema_field.name,
+                    number=number,
+                    type=proto_type,
+                    label=(
+                        descriptor_pb2.FieldDescriptorProto.LABEL_REPEATED
+                        if schema_field.mode == "REPEATED"
+                        else descriptor_pb2.FieldDescriptorProto.LABEL_OPTIONAL
+                    )
+                )
+            
+            pool = descriptor_pool.DescriptorPool()
+            pool.Add(descriptor_pb2.FileDescriptorProto(
+                name="quarantine_row.proto",
+                message_type=[row_proto]
+            ))
+            row_class = message_factory.GetMessageClass(
+                pool.FindMessageTypeByName("QuarantineRow")
+            )
+            self._quarantine_row_class = (schema, row_class, row_proto)
+        
+        return self._quarantine_row_class
+    
+    @staticmethod
+    def _to_proto_row(row, schema, row_class):
+        """Convert a BigQuery Row into a Storage Write API protobuf message"""
+        message = row_class()
+        for schema_field in schema:
+            value = row.get(schema_field.name)
+            if value is None:
+                continue
+            
+            values = value if schema_field.mode == "REPEATED" else [value]
+            converted = []
+            for v in values:
+                if schema_field.field_type == "TIMESTAMP":
+                    v = int(v.timestamp() * 1_000_000)
+                elif schema_field.field_type == "DATE":
+                    v = (v - date(1970, 1, 1)).days
+                elif _PROTO_TYPES[schema_field.field_type] == descriptor_pb2.FieldDescriptorProto.TYPE_STRING:
+                    v = v.isoformat() if hasattr(v, "isoformat") else str(v)
+                converted.append(v)
+            
+            if schema_field.mode == "REPEATED":
+                getattr(message, schema_field.name).extend(converted)
+            else:
+                setattr(message, schema_field.name, converted[0])
+        
+        return message
+    
+    @retry.Retry(
+        predicate=retry.if_exception_type(*_WRITE_FALLBACK_ERRORS),
+        initial=1.0,
+        maximum=30.0,
+        multiplier=2.0,
+        deadline=120.0
+    )
+    def _insert_quarantine_rows(
+        self,
+        reasons: Dict[str, str],
+        job_id: Optional[str] = None
+    ) -> int:
+        """
+        Legacy quarantine path: a single DML script job
+        
+        Args:
+            reasons: Article ID -> quarantine reason
+            job_id: Background job to attach the BigQuery job ID to
+        
+        Returns:
+            Number of rows inserted
+        """
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[self._quarantine_rows_param(reasons)]
+        )
+        
+        query_job = self.bq_client.query(self._insert_quarantine_sql, job_config=job_config)
+        if job_id:
+            with self._jobs_lock:
+                if job_id in self._jobs:
+                    self._jobs[job_id].update(
+                        bigquery_job_id=query_job.job_id,
+                        location=query_job.location
+                    )
+        
+        # A script job returns the result of its last statement
+        rows = list(query_job.result())
+        return (rows[0].rows_inserted or 0) if rows else 0
+    
+    def generate_rollback_sql(self, affected_ids: List[str]) -> Tuple[str, Dict]:
         """
         Generate SQL to rollback quarantine action
         
+        The SQL text is constant for a given table and binds the IDs through the
+        `@ids` array parameter, so it stays small, cacheable and injection-safe.
+        
         Args:
             affected_ids: List of quarantined IDs
         
         Returns:
-            SQL script as string
+            (SQL script, query parameters) tuple; run it with execute_rollback()
+            or a QueryJobConfig built from the parameters
         """
         if not affected_ids:
-            return "-- No affected IDs to rollback"
-        
-        quarantine_table = f"{self.project_id}.{self.dataset_id}.quarantine"
-        source_table = f"{self.project_id}.{self.dataset_id}.{self.table_id}"
-        
-        # Format IDs for SQL
-        ids_str = ", ".join([f"'{id}'" for id in affected_ids])
+            return "-- No affected IDs to rollback", {"ids": []}
         
         rollback_sql = f"""-- ROLLBACK SQL: Restore quarantined data
--- Generated: {datetime.utcnow().isoformat()}Z
--- Affected IDs: {len(affected_ids)}
+-- Generated: {_iso_z(_utc_now())}
+-- Affected IDs: {len(affected_ids)} (bound as @ids ARRAY<STRING>)
 
--- Step 1: Restore data to main table
-INSERT INTO `{source_table}`
-SELECT * EXCEPT(quarantined_at, quarantine_reason)
-FROM `{quarantine_table}`
-WHERE article_id IN ({ids_str});
-
--- Step 2: Remove from quarantine
-DELETE FROM `{quarantine_table}`
-WHERE article_id IN ({ids_str});
-
--- Step 3: Verify restoration
-SELECT 
-    COUNT(*) as restored_count,
-    MIN(published_at) as earliest_date,
-    MAX(published_at) as latest_date
-FROM `{source_table}`
-WHERE article_id IN ({ids_str});
-"""
+{self._rollback_sql}"""
+        
+        return rollback_sql, {"ids": list(affected_ids)}
+    
+    def execute_rollback(self, affected_ids: List[str]) -> Dict:
+        """
+        Run the rollback script for quarantined IDs
+        
+        Args:
+            affected_ids: List of quarantined IDs
+        
+        Returns:
+            Rollback result dict
+        """
+        if not affected_ids:
+            return {"success": False, "reason": "No affected IDs", "restored_count": 0}
         
-        return rollback_sql
+        # Run the constant script text (no generated-at header) so the query
+        # text is identical across rollbacks
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[
+                bigquery.ArrayQueryParameter("ids", "STRING", list(affected_ids))
+            ]
+        )
+        
+        try:
+            rows = list(self.bq_client.query(self._rollback_sql, job_config=job_config).result())
+            return {
+                "success": True,
+                "restored_count": rows[0].restored_count if rows else 0,
+                "timestamp": _iso_z(_utc_now())
+            }
+        except Exception as e:
+            print(f"❌ Rollback failed: {e}")
+            return {"success": False, "error": str(e), "restored_count": 0}
     
-    def send_alert(self, decision: Dict) -> Dict:
+    def send_alert(self, decision: Dict, now: Optional[datetime] = None) -> Dict:
         """
         Send alert (formatted output for now, can integrate Slack/email later)
         
         Args:
             decision: Decision dict
+            now: Timestamp to record (defaults to the current time)
         
         Returns:
             Alert result
         """
+        now = now or _utc_now()
         alert = {
-            "alert_id": f"alert_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}",
-            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "alert_id": f"alert_{now.strftime('%Y%m%d_%H%M%S')}",
+            "timestamp": _iso_z(now),
             "decision_id": decision.get("decision_id"),
             "action": decision.get("action"),
             "priority": decision.get("priority"),
@@ -353,6 +914,16 @@ WHERE article_id IN ({ids_str});
         if action_result.get("errors"):
             print(f"   Errors: {action_result['errors']}")
     
+    def _mirror_action(self, action: Dict) -> None:
+        """Persist an executed action to Firestore (runs on the mirror thread)"""
+        try:
+            if self._memory is None:
+                from agents.agent_memory import AgentMemory
+                self._memory = AgentMemory(project_id=self.project_id)
+            self._memory.store_action(action)
+        except Exception as e:
+            print(f"⚠️  Could not mirror action {action['action_id']} to Firestore: {e}")
+    
     def _extract_affected_ids(self, anomaly_alert: Optional[Dict]) -> List[str]:
         """
         Extract affected row IDs from anomaly alert
@@ -366,22 +937,15 @@ WHERE article_id IN ({ids_str});
         if not anomaly_alert or not anomaly_alert.get("has_anomalies"):
             return []
         
-        affected_ids = []
+        # One regex pass over all evidence instead of a split() per string
+        evidence = "\n".join(
+            e
+            for anomaly in anomaly_alert.get("anomalies", [])
+            for e in anomaly.get("evidence", [])
+        )
         
-        for anomaly in anomaly_alert.get("anomalies", []):
-            evidence = anomaly.get("evidence", [])
-            
-            # Try to extract IDs from evidence
-            for e in evidence:
-                if "Article ID" in e or "article_id" in e.lower():
-                    # Parse ID from evidence string
-                    # Example: "Article ID 'TEST_001' contains..."
-                    parts = e.split("'")
-                    if len(parts) >= 2:
-                        affected_ids.append(parts[1])
-        
-        # Remove duplicates
-        return list(set(affected_ids))
+        # Remove duplicates, keeping first-seen order
+        return list(dict.fromkeys(_ARTICLE_ID_RE.findall(evidence)))
     
     def _extract_evidence(self, decision: Dict) -> List[str]:
         """Extract evidence from decision inputs"""
@@ -405,12 +969,34 @@ WHERE article_id IN ({ids_str});
         return evidence
     
     def get_action_history(self, limit: int = 10) -> List[Dict]:
-        """Get recent action history"""
-        return sorted(
-            self.action_history,
-            key=lambda a: a["timestamp"],
-            reverse=True
-        )[:limit]
+        """Get recent action history (newest first)"""
+        # Actions are appended in execution order, so no sort is needed
+        return [action.to_dict() for action in islice(reversed(self.action_history), limit)]
+    
+    def close(self) -> None:
+        """
+        Flush buffered quarantine rows and stop the worker pools
+        
+        Waits for in-flight quarantine jobs and Firestore mirror writes. The
+        BigQuery and Fivetran clients may be shared, so their owners close them.
+        """
+        if self._quarantine_buffer:
+            self._flush_quarantine()
+        
+        # No retries after shutdown; anything still buffered is reported
+        with self._quarantine_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if self._quarantine_buffer:
+                print(f"⚠️  {len(self._quarantine_buffer)} quarantine rows were not written before close")
+        
+        for pool in (self._action_pool, self._job_pool, self._mirror_pool):
+            pool.shutdown(wait=True)
+        
+        if self._write_client is not None:
+            self._write_client.transport.close()
+            self._write_client = None
 
 
 # Testing
@@ -430,8 +1016,8 @@ if __name__ == "__main__":
     # Test 2: Generate rollback SQL
     print("\n2️⃣ Test: Generate rollback SQL")
     test_ids = ["TEST_001", "TEST_002"]
-    rollback_sql = executor.generate_rollback_sql(test_ids)
-    print(f"   SQL generated: {len(rollback_sql)} characters")
+    rollback_sql, rollback_params = executor.generate_rollback_sql(test_ids)
+    print(f"   SQL generated: {len(rollback_sql)} characters, {len(rollback_params['ids'])} IDs bound")
     print(f"   Preview: {rollback_sql[:100]}...")
     
     # Test 3: Send alert (mock)
@@ -1,39 +1,86 @@
 from google.cloud import firestore
+from google.cloud.firestore_v1.base_query import FieldFilter
+from google.api_core import retry
 from datetime import datetime
+import asyncio
+from typing import Union
 import pandas as pd
 import logging
 
+from agents.schema_guardian import Schema, schema_to_records
+
 logger = logging.getLogger(__name__)
 
+# One retry policy shared by every Firestore call (transient errors only)
+_FIRESTORE_RETRY = retry.Retry(initial=0.1, maximum=5.0, multiplier=2.0, deadline=30.0)
+
 
 class AgentMemory:
-    def __init__(self, project_id: str = None):
-        """Initialize Firestore client with auto-detection in GCP environments"""
+    def __init__(self, project_id: str = None, client: firestore.Client = None):
+        """Initialize Firestore client with auto-detection in GCP environments (or reuse `client`)"""
         try:
-            self.db = firestore.Client(project=project_id) if project_id else firestore.Client()
+            if client is not None:
+                self.db = client
+            else:
+                self.db = firestore.Client(project=project_id) if project_id else firestore.Client()
             logger.info("✅ Firestore client initialized")
+            
+            # Reuse collection references instead of rebuilding them per call
+            self._baselines_ref = self.db.collection('schema_baselines')
+            self._alerts_ref = self.db.collection('alerts')
+            self._status_ref = self.db.collection('agent_status')
+            self._actions_ref = self.db.collection('action_history')
+            self._status_docs = {}
         except Exception as e:
             logger.error(f"Failed to initialize Firestore: {e}")
             raise
     
-    def store_schema_baseline(self, table_id: str, schema_df: pd.DataFrame):
-        """Store schema baseline with timestamp"""
-        doc_ref = self.db.collection('schema_baselines').document(table_id)
+    def store_schema_baseline(self, table_id: str, schema_df: Union[Schema, pd.DataFrame]):
+        """Store schema baseline with timestamp (a SchemaGuardian snapshot or a DataFrame)"""
+        if isinstance(schema_df, dict):
+            self.store_schema_baseline_raw(table_id, schema_to_records(schema_df))
+            return
+        
+        # Convert the DataFrame in one pass over a single object array instead of
+        # boxing each cell through to_dict('records')
+        column_names = list(schema_df.columns)
+        values = schema_df.to_numpy(dtype=object, na_value=None).tolist()
+        columns = [dict(zip(column_names, row)) for row in values]
+        
+        self.store_schema_baseline_raw(table_id, columns)
+    
+    def store_schema_baseline_raw(self, table_id: str, columns: list):
+        """
+        Store schema baseline from a list of column dicts, bypassing pandas
+        
+        Firestore stores the same document as store_schema_baseline(), so callers
+        that already hold records can skip the DataFrame entirely.
+        """
+        doc_ref = self._baselines_ref.document(table_id)
         
-        # Convert DataFrame to Firestore-compatible format
         schema_data = {
-            'columns': schema_df.to_dict('records'),
+            'columns': columns,
             'captured_at': firestore.SERVER_TIMESTAMP,
-            'column_count': len(schema_df)
+            'column_count': len(columns)
         }
         
-        doc_ref.set(schema_data)
-        logger.info(f"✅ Stored baseline for {table_id} with {len(schema_df)} columns")
+        doc_ref.set(schema_data, retry=_FIRESTORE_RETRY)
+        logger.info(f"✅ Stored baseline for {table_id} with {len(columns)} columns")
+    
+    def get_schema_baseline_raw(self, table_id: str) -> list:
+        """Retrieve a schema baseline as its list of column dicts (None if missing), bypassing pandas"""
+        doc = self._baselines_ref.document(table_id).get(retry=_FIRESTORE_RETRY)
+        
+        if doc.exists:
+            logger.info(f"✅ Retrieved baseline for {table_id}")
+            return doc.to_dict()['columns']
+        
+        logger.warning(f"No baseline found for {table_id}")
+        return None
     
     def get_schema_baseline(self, table_id: str) -> pd.DataFrame:
         """Retrieve schema baseline"""
-        doc_ref = self.db.collection('schema_baselines').document(table_id)
-        doc = doc_ref.get()
+        doc = self._baselines_ref.document(table_id).get(retry=_FIRESTORE_RETRY)
         
         if doc.exists:
             data = doc.to_dict()
@@ -49,40 +96,107 @@ class AgentMemory:
         if 'timestamp' not in alert:
             alert['timestamp'] = firestore.SERVER_TIMESTAMP
         
-        doc_ref = self.db.collection('alerts').add(alert)
+        doc_ref = self._alerts_ref.add(alert, retry=_FIRESTORE_RETRY)
         logger.info(f"🚨 Alert stored: {alert.get('severity', 'UNKNOWN')} - ID: {doc_ref[1].id}")
         return doc_ref[1].id
     
-    def get_alert_history(self, limit: int = 10, agent: str = None) -> list:
-        """Get recent alerts, optionally filtered by agent"""
-        alerts_ref = self.db.collection('alerts')
+    def get_alert_history(self, limit: int = 10, agent: str = None, fields: list = None,
+                          cursor: str = None) -> list:
+        """
+        Get recent alerts, optionally filtered by agent
+        
+        Pass `fields` to download only those fields (Firestore projection). Filtering
+        by agent relies on the (agent, timestamp DESC) composite index declared in
+        firestore.indexes.json, so the query is served by a single index scan.
+        
+        Pages are requested with `cursor`, the alert_cursor() of the last alert
+        of the previous page; Firestore resumes the index scan there instead of
+        skipping over an offset, so every page costs the same. Ties on timestamp
+        are broken by document ID, so alerts sharing a timestamp across a page
+        boundary are neither skipped nor repeated.
+        """
+        alerts_ref = self._alerts_ref
         
         # Filter by agent if specified
         if agent:
-            alerts_ref = alerts_ref.where('agent', '==', agent)
+            alerts_ref = alerts_ref.where(filter=FieldFilter('agent', '==', agent))
+        
+        if fields:
+            alerts_ref = alerts_ref.select(fields)
         
-        alerts_ref = alerts_ref.order_by('timestamp', direction=firestore.Query.DESCENDING).limit(limit)
+        alerts_ref = (
+            alerts_ref.order_by('timestamp', direction=firestore.Query.DESCENDING)
+            .order_by('__name__', direction=firestore.Query.DESCENDING)
+        )
+        if cursor is not None:
+            timestamp, _, doc_id = cursor.rpartition('|')
+            alerts_ref = alerts_ref.start_after({
+                'timestamp': timestamp,
+                '__name__': self._alerts_ref.document(doc_id)
+            })
+        alerts_ref = alerts_ref.limit(limit)
         
         alerts = []
-        for doc in alerts_ref.stream():
+        for doc in alerts_ref.stream(retry=_FIRESTORE_RETRY):
             alert_data = {'id': doc.id, **doc.to_dict()}
             alerts.append(alert_data)
         
         logger.info(f"Retrieved {len(alerts)} alerts")
         return alerts
     
+    @staticmethod
+    def alert_cursor(alert: dict) -> str:
+        """Cursor resuming get_alert_history() after `alert` ("<timestamp>|<document id>")"""
+        return f"{alert.get('timestamp')}|{alert['id']}"
+    
+    def count_alerts(self, agent: str, since: datetime = None) -> int:
+        """
+        Count alerts raised by an agent, optionally only those at or after `since`
+        
+        Uses a server-side COUNT aggregation, so no documents are transferred.
+        Agents store alert timestamps as naive-UTC ISO strings, so `since` is
+        compared in that form (served by the (agent, timestamp ASC) index).
+        """
+        query = self._alerts_ref.where(filter=FieldFilter('agent', '==', agent))
+        
+        if since is not None:
+            query = query.where(filter=FieldFilter('timestamp', '>=', since.isoformat()))
+        
+        results = query.count(alias='total').get(retry=_FIRESTORE_RETRY)
+        return int(results[0][0].value) if results else 0
+    
+    def store_action(self, action: dict):
+        """Store an executed orchestrator action, keyed by its action ID"""
+        doc_ref = self._actions_ref.document(action['action_id'])
+        doc_ref.set({**action, 'stored_at': firestore.SERVER_TIMESTAMP}, retry=_FIRESTORE_RETRY)
+        logger.info(f"📝 Action stored: {action['action_id']}")
+    
+    def _status_doc(self, agent_name: str):
+        """Cached DocumentReference for an agent's status (a handful of agents poll constantly)"""
+        doc_ref = self._status_docs.get(agent_name)
+        if doc_ref is None:
+            doc_ref = self._status_docs[agent_name] = self._status_ref.document(agent_name)
+        return doc_ref
+    
     def get_agent_status(self, agent_name: str) -> dict:
         """Get current status for a specific agent"""
-        doc_ref = self.db.collection('agent_status').document(agent_name)
-        doc = doc_ref.get()
+        doc = self._status_doc(agent_name).get(retry=_FIRESTORE_RETRY)
         
         if doc.exists:
             return doc.to_dict()
         return None
     
+    async def aget_agent_status(self, agent_name: str) -> dict:
+        """Async get_agent_status(); runs the blocking RPC in a worker thread"""
+        return await asyncio.to_thread(self.get_agent_status, agent_name)
+    
+    async def aget_alert_history(self, limit: int = 10, agent: str = None, fields: list = None,
+                                 cursor: str = None) -> list:
+        """Async get_alert_history(); runs the blocking RPC in a worker thread"""
+        return await asyncio.to_thread(self.get_alert_history, limit, agent, fields, cursor)
+    
     def update_agent_status(self, agent_name: str, status: dict):
         """Update agent status"""
-        doc_ref = self.db.collection('agent_status').document(agent_name)
         status['last_updated'] = firestore.SERVER_TIMESTAMP
-        doc_ref.set(status, merge=True)
+        self._status_doc(agent_name).set(status, merge=True, retry=_FIRESTORE_RETRY)
         logger.info(f"Updated status for {agent_name}")
@@ -1,6 +1,21 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from datetime import datetime
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from cachetools import TTLCache
+from google.cloud import bigquery
+import orjson
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Literal, Optional, Tuple
+from itertools import islice
+import anyio.to_thread
+import asyncio
+import logging
+import logging.config
+import time
 import sys
 import os
 
@@ -13,63 +28,253 @@ load_dotenv()
 
 from agents.agent_memory import AgentMemory
 from agents.anomaly_detective import AnomalyDetective
+from agents.decision_engine import DecisionEngine
+
+
+@dataclass(frozen=True)
+class Settings:
+    """API configuration, read from the environment once"""
+    project_id: Optional[str]
+    dataset_id: Optional[str]
+    table_id: Optional[str]
+    connector_id: Optional[str]
+    dashboard_origins: Tuple[str, ...]
+    cache_ttl_seconds: float
+    threadpool_size: int
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Build the Settings once; later calls return the same instance"""
+    return Settings(
+        project_id=os.getenv("PROJECT_ID"),
+        dataset_id=os.getenv("DATASET_ID"),
+        table_id=os.getenv("TABLE_ID"),
+        connector_id=os.getenv("FIVETRAN_CONNECTOR_ID"),
+        dashboard_origins=tuple(os.getenv("OSPREY_DASHBOARD_ORIGIN", "http://localhost:3000").split(",")),
+        cache_ttl_seconds=int(os.getenv("OSPREY_CACHE_TTL_MS", "3000")) / 1000,
+        threadpool_size=int(os.getenv("OSPREY_THREADPOOL_SIZE", "64"))
+    )
+
+
+settings = get_settings()
+
+# Route agent/API log records through one stderr handler; uvicorn's own
+# loggers are left as they are
+logging.config.dictConfig({
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {"default": {"format": "%(asctime)s %(levelname)s %(name)s: %(message)s"}},
+    "handlers": {"default": {"class": "logging.StreamHandler", "formatter": "default"}},
+    "loggers": {
+        "osprey": {"handlers": ["default"], "level": os.getenv("OSPREY_LOG_LEVEL", "INFO")},
+        "agents": {"handlers": ["default"], "level": os.getenv("OSPREY_LOG_LEVEL", "INFO")},
+    },
+})
+logger = logging.getLogger("osprey.api")
 
 app = FastAPI(
     title="Osprey Agent API",
     description="Multi-Agent Data Quality Guardian API",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
-# Enable CORS for React dashboard
+# Enable CORS for React dashboard (comma-separated origins); browsers may cache
+# preflight responses for a day so most requests need a single round-trip
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=list(settings.dashboard_origins),
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST"],
+    allow_headers=["content-type", "authorization", "cache-control"],
+    max_age=86400,
 )
 
+# Compress JSON responses (history/log payloads are very repetitive)
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # Initialize memory (will return None if Firestore not set up)
 try:
-    memory = AgentMemory(project_id=os.getenv("PROJECT_ID"))
+    memory = AgentMemory(project_id=settings.project_id)
 except Exception as e:
-    print(f"Warning: Could not initialize Firestore: {e}")
-    print("API will run with limited functionality until Firestore is set up")
+    logger.warning("Could not initialize Firestore: %s", e)
+    logger.warning("API will run with limited functionality until Firestore is set up")
     memory = None
 
+# Response timestamps only need ~100ms precision; reuse one datetime between ticks
+_CLOCK_TICK_SECONDS = 0.1
+_clock_tick = (0.0, None)
+
+
+def _now() -> datetime:
+    """Current UTC time, refreshed at most every _CLOCK_TICK_SECONDS"""
+    global _clock_tick
+    tick = time.monotonic()
+    if tick - _clock_tick[0] >= _CLOCK_TICK_SECONDS:
+        _clock_tick = (tick, datetime.now(timezone.utc))
+    return _clock_tick[1]
+
+# Short-lived cache for Firestore reads; dashboards poll the same endpoints every few seconds
+_read_cache = TTLCache(maxsize=256, ttl=settings.cache_ttl_seconds)
+
+# key -> [lock, waiters]; concurrent misses on one key share a single Firestore read
+_inflight_reads = {}
+
+
+async def _cached_read(request: Request, key: tuple, loader):
+    """
+    Return the awaited result of loader(), memoized for the cache TTL
+    
+    Concurrent misses for the same key are coalesced: the first caller runs
+    loader() and the rest wait for its result. Clients can force a fresh read
+    by sending `Cache-Control: no-cache`.
+    """
+    if "no-cache" in request.headers.get("cache-control", "").lower():
+        value = await loader()
+        _read_cache[key] = value
+        return value
+    
+    # The cache is only touched from the event loop thread, so no lock is needed here
+    if key in _read_cache:
+        return _read_cache[key]
+    
+    entry = _inflight_reads.setdefault(key, [asyncio.Lock(), 0])
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            if key in _read_cache:
+                return _read_cache[key]
+            value = await loader()
+            _read_cache[key] = value
+            return value
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0:
+            _inflight_reads.pop(key, None)
+
+# key -> Task of the run in progress; concurrent callers share one execution
+_inflight_runs = {}
+
+
+async def _single_flight(key: str, func):
+    """
+    Run blocking func() in a worker thread unless a run for `key` is already in
+    flight, in which case wait for and return that run's result
+    
+    The run is its own task and every caller (the first included) awaits it
+    through shield(), so a disconnecting client only cancels its own wait;
+    the run keeps going and stays registered for the callers that remain.
+    """
+    task = _inflight_runs.get(key)
+    if task is None:
+        task = asyncio.ensure_future(asyncio.to_thread(func))
+        _inflight_runs[key] = task
+        task.add_done_callback(lambda t: _finish_run(key, t))
+    return await asyncio.shield(task)
+
+
+def _finish_run(key: str, task: "asyncio.Task") -> None:
+    """Unregister a finished run and mark its exception as retrieved"""
+    if _inflight_runs.get(key) is task:
+        del _inflight_runs[key]
+    # Every waiter may have gone; don't log "exception never retrieved"
+    if not task.cancelled():
+        task.exception()
+
+
+# Agents addressable by /api/agent/{agent_name}; unknown names are rejected with
+# a 422 before any Firestore read. Display names are still accepted.
+AgentName = Literal[
+    "schema-guardian", "anomaly-detective", "pipeline-orchestrator",
+    "Schema Guardian", "Anomaly Detective", "Pipeline Orchestrator"
+]
+AGENT_DISPLAY_NAMES = {
+    "schema-guardian": "Schema Guardian",
+    "anomaly-detective": "Anomaly Detective",
+    "pipeline-orchestrator": "Pipeline Orchestrator",
+    "Schema Guardian": "Schema Guardian",
+    "Anomaly Detective": "Anomaly Detective",
+    "Pipeline Orchestrator": "Pipeline Orchestrator",
+}
+
+
+def _reject_offset(request: Request) -> None:
+    """History endpoints page with cursors; offsets would rescan everything before the page"""
+    if "offset" in request.query_params:
+        raise HTTPException(
+            status_code=400,
+            detail="offset is not supported; pass the previous page's next_cursor as cursor"
+        )
+
+
+def _next_cursor(items: list, limit: int, cursor_of=lambda item: item.get("timestamp")):
+    """Cursor for the next page, or None when this page was the last"""
+    return cursor_of(items[-1]) if len(items) == limit else None
+
 # Initialize Anomaly Detective and Orchestrator
 detective = None
 orchestrator = None
+bq_client = None  # One BigQuery client (and connection pool) shared by every agent
 
 @app.on_event("startup")
 async def startup_event():
-    global detective, orchestrator
+    global detective, orchestrator, bq_client
+    
+    # Blocking Gemini/BigQuery/Fivetran calls run in worker threads: size both the
+    # asyncio.to_thread executor and Starlette's sync-endpoint limiter
+    workers = settings.threadpool_size
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=workers, thread_name_prefix="osprey-api")
+    )
+    anyio.to_thread.current_default_thread_limiter().total_tokens = workers
+    
+    try:
+        bq_client = bigquery.Client(project=settings.project_id)
+    except Exception as e:
+        logger.warning("⚠️  Could not initialize BigQuery client: %s", e)
+        bq_client = None
+    
     try:
         detective = AnomalyDetective(
-            project_id=os.getenv("PROJECT_ID"),
-            dataset_id=os.getenv("DATASET_ID"),
-            table_id=os.getenv("TABLE_ID")
+            project_id=settings.project_id,
+            dataset_id=settings.dataset_id,
+            table_id=settings.table_id,
+            bq_client=bq_client
         )
-        print("✅ Anomaly Detective initialized successfully")
+        logger.info("✅ Anomaly Detective initialized successfully")
     except Exception as e:
-        print(f"⚠️  Warning: Could not initialize Anomaly Detective: {e}")
+        logger.warning("⚠️  Could not initialize Anomaly Detective: %s", e)
         detective = None
     
     # Initialize Orchestrator
     try:
         from agents.pipeline_orchestrator import PipelineOrchestrator
         orchestrator = PipelineOrchestrator(
-            project_id=os.getenv("PROJECT_ID"),
-            dataset_id=os.getenv("DATASET_ID"),
-            table_id=os.getenv("TABLE_ID"),
-            connector_id=os.getenv("FIVETRAN_CONNECTOR_ID")
+            project_id=settings.project_id,
+            dataset_id=settings.dataset_id,
+            table_id=settings.table_id,
+            connector_id=settings.connector_id,
+            bq_client=bq_client,
+            memory=memory
         )
-        print("✅ Pipeline Orchestrator initialized successfully")
+        logger.info("✅ Pipeline Orchestrator initialized successfully")
     except Exception as e:
-        print(f"⚠️  Warning: Could not initialize Orchestrator: {e}")
+        logger.warning("⚠️  Could not initialize Orchestrator: %s", e)
         orchestrator = None
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close the shared clients and their connection pools"""
+    if orchestrator is not None:
+        orchestrator.close()  # Leaves the shared bq_client below to us
+    if bq_client is not None:
+        bq_client.close()
+    if memory is not None:
+        memory.db.close()
+
+
 @app.get("/")
 def root():
     return {
@@ -84,11 +289,14 @@ def root():
             "/api/agent/{agent_name}",
             "/api/anomaly/check",
             "/api/anomaly/status",
+            "/api/anomaly/stream",
             "/api/orchestrator/decision",
             "/api/orchestrator/decisions",
+            "/api/orchestrator/decisions/stream",
             "/api/orchestrator/status",
             "/api/orchestrator/metrics",
-            "/api/orchestrator/summary"
+            "/api/orchestrator/summary",
+            "/api/action/{job_id}/status"
         ]
     }
 
@@ -98,13 +306,13 @@ def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
-        "timestamp": datetime.utcnow().isoformat(),
+        "timestamp": _now(),
         "service": "Osprey Multi-Agent System"
     }
 
 
 @app.get("/api/status")
-def get_agent_status():
+async def get_agent_status(request: Request):
     """Get status of all agents"""
     if not memory:
         return {
@@ -114,16 +322,21 @@ def get_agent_status():
                 "message": "Firestore is not set up. Visit https://console.cloud.google.com/datastore/setup"
             }],
             "warning": "Firestore not configured - limited functionality",
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": _now()
         }
     
     try:
-        # Get Schema Guardian status
-        sg_status = memory.get_agent_status('Schema Guardian')
-        
-        # Get recent alert count
-        alerts = memory.get_alert_history(limit=100)
-        alerts_today = len([a for a in alerts if a.get('agent') == 'Schema Guardian'])
+        # Get Schema Guardian status and today's alert count in parallel
+        # Naive UTC, like the stored alert timestamps count_alerts compares against
+        start_of_day = datetime.now(timezone.utc).replace(tzinfo=None, hour=0, minute=0, second=0, microsecond=0)
+        sg_status, alerts_today = await _cached_read(
+            request,
+            ("status", "Schema Guardian", start_of_day),
+            lambda: asyncio.gather(
+                memory.aget_agent_status('Schema Guardian'),
+                asyncio.to_thread(memory.count_alerts, 'Schema Guardian', start_of_day)
+            )
+        )
         
         agents = []
         
@@ -147,7 +360,7 @@ def get_agent_status():
         return {
             "agents": agents,
             "total_agents": len(agents),
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": _now()
         }
     except Exception as e:
         # Return graceful response even if Firestore fails
@@ -158,33 +371,42 @@ def get_agent_status():
                 "message": f"Error accessing status: {str(e)}"
             }],
             "error": "Could not retrieve full status",
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": _now()
         }
 
 
 @app.get("/api/alerts")
-def get_recent_alerts(
+async def get_recent_alerts(
+    request: Request,
     limit: int = Query(default=10, ge=1, le=100),
-    agent: str = Query(default=None)
+    agent: str = Query(default=None),
+    cursor: str = Query(default=None)
 ):
-    """Get recent alerts, optionally filtered by agent"""
+    """Get recent alerts, optionally filtered by agent (cursor-paginated)"""
+    _reject_offset(request)
+    
     if not memory:
         return {
             "alerts": [],
             "count": 0,
             "warning": "Firestore not configured - no alerts available",
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": _now()
         }
     
     try:
-        alerts = memory.get_alert_history(limit=limit, agent=agent)
+        alerts = await _cached_read(
+            request,
+            ("alerts", agent, limit, cursor),
+            lambda: memory.aget_alert_history(limit, agent, None, cursor)
+        )
         
         return {
             "alerts": alerts,
             "count": len(alerts),
             "limit": limit,
+            "next_cursor": _next_cursor(alerts, limit, AgentMemory.alert_cursor),
             "filtered_by_agent": agent,
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": _now()
         }
     except Exception as e:
         # Return graceful response even if Firestore fails
@@ -192,31 +414,41 @@ def get_recent_alerts(
             "alerts": [],
             "count": 0,
             "error": f"Could not retrieve alerts: {str(e)}",
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": _now()
         }
 
 
 @app.get("/api/agent/{agent_name}")
-def get_agent_details(agent_name: str):
+async def get_agent_details(request: Request, agent_name: AgentName):
     """Get detailed information about a specific agent"""
+    agent_name = AGENT_DISPLAY_NAMES[agent_name]
     try:
         if not memory:
             raise HTTPException(status_code=503, detail="Firestore not configured")
         
-        status = memory.get_agent_status(agent_name)
+        # Status and alerts are independent reads; issue them together
+        status, alerts = await asyncio.gather(
+            _cached_read(
+                request,
+                ("agent_status", agent_name),
+                lambda: memory.aget_agent_status(agent_name)
+            ),
+            _cached_read(
+                request,
+                ("alerts", agent_name, 10, None),
+                lambda: memory.aget_alert_history(10, agent_name)
+            )
+        )
         
         if not status:
             raise HTTPException(status_code=404, detail=f"Agent '{agent_name}' not found")
         
-        # Get agent-specific alerts
-        alerts = memory.get_alert_history(limit=10, agent=agent_name)
-        
         return {
             "agent": agent_name,
             "status": status,
             "recent_alerts": alerts,
             "alert_count": len(alerts),
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": _now()
         }
     except HTTPException:
         raise
@@ -225,10 +457,23 @@ def get_agent_details(agent_name: str):
 
 
 @app.get("/api/agent/{agent_name}/logs")
-def get_agent_logs(agent_name: str, limit: int = Query(default=20, ge=1, le=100)):
+async def get_agent_logs(
+    request: Request,
+    agent_name: AgentName,
+    limit: int = Query(default=20, ge=1, le=100)
+):
     """Get recent activity logs for specific agent"""
+    agent_name = AGENT_DISPLAY_NAMES[agent_name]
     try:
-        alerts = memory.get_alert_history(limit=limit, agent=agent_name)
+        alerts = await _cached_read(
+            request,
+            ("logs", agent_name, limit),
+            lambda: memory.aget_alert_history(
+                limit,
+                agent_name,
+                ['agent', 'severity', 'timestamp', 'change_count', 'changes']
+            )
+        )
         
         logs = []
         for alert in alerts:
@@ -243,29 +488,50 @@ def get_agent_logs(agent_name: str, limit: int = Query(default=20, ge=1, le=100)
             "agent": agent_name,
             "logs": logs,
             "count": len(logs),
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": _now()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving logs: {str(e)}")
 
 
 @app.get("/api/anomaly/check")
-def check_anomalies():
+async def check_anomalies():
     """Run anomaly detection on latest data"""
     if detective is None:
         return {
             "error": "Anomaly Detective not initialized",
             "message": "Check server logs for initialization errors",
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": _now()
         }
     
     try:
-        result = detective.run_check()
+        # Concurrent checks share one Gemini/BigQuery run
+        result = await _single_flight("anomaly_check", detective.run_check)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error running anomaly check: {str(e)}")
 
 
+@app.get("/api/anomaly/stream")
+async def stream_anomalies():
+    """
+    Run anomaly detection and stream findings as server-sent events
+    
+    Emits an `anomaly` event per finding as Gemini produces it, then a final
+    `result` event with the full analysis.
+    """
+    if detective is None:
+        raise HTTPException(status_code=503, detail="Anomaly Detective not initialized")
+    
+    data = await asyncio.to_thread(detective.sample_latest_data, 20)
+    
+    async def events():
+        async for event, payload in detective.astream_data_quality(data):
+            yield b"event: " + event.encode() + b"\ndata: " + orjson.dumps(payload, default=str) + b"\n\n"
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
 @app.get("/api/anomaly/status")
 def anomaly_status():
     """Get anomaly detection status"""
@@ -274,14 +540,14 @@ def anomaly_status():
         "status": "running" if detective else "not_initialized",
         "model": "gemini-2.0-flash-exp",
         "sample_size": 20,
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": _now()
     }
 
 
 # ===== ORCHESTRATOR ENDPOINTS (NEW) =====
 
 @app.post("/api/orchestrator/decision")
-def trigger_orchestration():
+async def trigger_orchestration():
     """
     Manually trigger orchestration cycle
     
@@ -294,11 +560,12 @@ def trigger_orchestration():
         )
     
     try:
-        result = orchestrator.orchestrate()
+        # Concurrent triggers share one orchestration cycle
+        result = await _single_flight("orchestrate", orchestrator.orchestrate)
         return {
             "success": True,
             "orchestration": result,
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": _now()
         }
     except Exception as e:
         raise HTTPException(
@@ -309,14 +576,19 @@ def trigger_orchestration():
 
 @app.get("/api/orchestrator/decisions")
 def get_decision_history(
-    limit: int = Query(default=10, ge=1, le=50)
+    request: Request,
+    limit: int = Query(default=10, ge=1, le=50),
+    cursor: str = Query(default=None)
 ):
     """
     Get recent decision history
     
     Query params:
         limit: Number of decisions to return (1-50, default 10)
+        cursor: next_cursor from the previous page
     """
+    _reject_offset(request)
+    
     if orchestrator is None:
         raise HTTPException(
             status_code=503,
@@ -324,13 +596,14 @@ def get_decision_history(
         )
     
     try:
-        decisions = orchestrator.get_decision_history(limit=limit)
+        decisions = orchestrator.get_decision_history(limit=limit, cursor=cursor)
         
         return {
             "decisions": decisions,
             "count": len(decisions),
             "limit": limit,
-            "timestamp": datetime.utcnow().isoformat()
+            "next_cursor": _next_cursor(decisions, limit, DecisionEngine.decision_cursor),
+            "timestamp": _now()
         }
     except Exception as e:
         raise HTTPException(
@@ -339,22 +612,65 @@ def get_decision_history(
         )
 
 
+@app.get("/api/orchestrator/decisions/stream")
+def stream_decision_history(limit: int = Query(default=None, ge=1)):
+    """
+    Stream decision history newest-first as NDJSON (one decision per line)
+    
+    Each record is serialized as it is sent, so server memory is bounded by one
+    record rather than the whole page.
+    """
+    if orchestrator is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Pipeline Orchestrator not initialized"
+        )
+    
+    # Snapshot the references first: the deque may be appended to while streaming
+    history = list(orchestrator.decision_engine.decision_history)
+    
+    def records():
+        for decision in islice(reversed(history), limit):
+            yield orjson.dumps(decision, default=str) + b"\n"
+    
+    return StreamingResponse(records(), media_type="application/x-ndjson")
+
+
+@app.get("/api/action/{job_id}/status")
+async def get_action_job_status(job_id: str):
+    """Poll a background quarantine job started by an orchestrator action"""
+    if orchestrator is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Pipeline Orchestrator not initialized"
+        )
+    
+    job = await asyncio.to_thread(orchestrator.action_executor.get_job_status, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    
+    return {
+        "job": job,
+        "timestamp": _now()
+    }
+
+
 @app.get("/api/orchestrator/status")
-def get_orchestrator_status():
+async def get_orchestrator_status():
     """Get orchestrator status and metrics"""
     if orchestrator is None:
         return {
             "status": "not_initialized",
             "message": "Orchestrator not initialized - check server logs",
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": _now()
         }
     
     try:
-        status = orchestrator.get_status()
+        status = await asyncio.to_thread(orchestrator.get_status)
         return {
             "success": True,
             "status": status,
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": _now()
         }
     except Exception as e:
         raise HTTPException(
@@ -364,7 +680,7 @@ def get_orchestrator_status():
 
 
 @app.get("/api/orchestrator/metrics")
-def get_orchestrator_metrics():
+async def get_orchestrator_metrics():
     """Get orchestrator performance metrics"""
     if orchestrator is None:
         raise HTTPException(
@@ -373,13 +689,13 @@ def get_orchestrator_metrics():
         )
     
     try:
-        status = orchestrator.get_status()
+        # Status (Fivetran call) and decision breakdown are independent
+        status, decision_metrics = await asyncio.gather(
+            asyncio.to_thread(orchestrator.get_status),
+            asyncio.to_thread(orchestrator.decision_engine.calculate_metrics)
+        )
         metrics = status.get("metrics", {})
         
-        # Add decision breakdown
-        decision_engine = orchestrator.decision_engine
-        decision_metrics = decision_engine.calculate_metrics()
-        
         return {
             "metrics": {
                 **metrics,
@@ -387,7 +703,7 @@ def get_orchestrator_metrics():
                 "priority_breakdown": decision_metrics.get("by_priority", {}),
                 "avg_confidence": decision_metrics.get("avg_confidence", 0.0)
             },
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": _now()
         }
     except Exception as e:
         raise HTTPException(
@@ -397,7 +713,7 @@ def get_orchestrator_metrics():
 
 
 @app.get("/api/orchestrator/summary")
-def get_orchestrator_summary():
+async def get_orchestrator_summary():
     """Get executive summary of orchestrator activity"""
     if orchestrator is None:
         raise HTTPException(
@@ -406,11 +722,11 @@ def get_orchestrator_summary():
         )
     
     try:
-        summary = orchestrator.generate_summary()
+        summary = await asyncio.to_thread(orchestrator.generate_summary)
         
         return {
             "summary": summary,
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": _now()
         }
     except Exception as e:
         raise HTTPException(
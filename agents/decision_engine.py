@@ -12,9 +12,30 @@ Decision Matrix:
 - Low severity → LOG_AND_CONTINUE
 """
 
-from typing import Dict, Optional, List
-from datetime import datetime
-import uuid
+from typing import Dict, Optional, List, Mapping
+from types import MappingProxyType
+from collections import Counter, deque
+from datetime import datetime, timezone
+from itertools import islice
+import bisect
+import os
+import secrets
+
+_NO_REQUIREMENTS: Mapping[str, bool] = MappingProxyType({})
+
+
+def _schema_change_reasons(schema_alert: Optional[Dict]) -> List[str]:
+    """Reasoning lines describing breaking schema changes"""
+    if not schema_alert:
+        return []
+    
+    changes = schema_alert.get("changes", {})
+    reasons = []
+    if changes.get("type_changes"):
+        reasons.append(f"Column type changes: {len(changes['type_changes'])} detected")
+    if changes.get("removed_columns"):
+        reasons.append(f"Removed columns: {len(changes['removed_columns'])} detected")
+    return reasons
 
 
 class DecisionEngine:
@@ -35,9 +56,178 @@ class DecisionEngine:
     PRIORITY_MEDIUM = "MEDIUM"
     PRIORITY_LOW = "LOW"
     
+    # What each action needs executed; built once, shared read-only
+    _ACTION_REQUIREMENTS: Mapping[str, Mapping[str, bool]] = MappingProxyType({
+        ACTION_EMERGENCY_PAUSE: MappingProxyType({
+            "pause_connector": True,
+            "quarantine_data": False,
+            "send_alert": True,
+            "generate_rollback": False,
+            "human_review": True,
+            "urgent": True
+        }),
+        ACTION_PAUSE_AND_ALERT: MappingProxyType({
+            "pause_connector": True,
+            "quarantine_data": False,
+            "send_alert": True,
+            "generate_rollback": False,
+            "human_review": True,
+            "urgent": False
+        }),
+        ACTION_QUARANTINE_AND_PAUSE: MappingProxyType({
+            "pause_connector": True,
+            "quarantine_data": True,
+            "send_alert": True,
+            "generate_rollback": True,
+            "human_review": True,
+            "urgent": False
+        }),
+        ACTION_QUARANTINE_AND_FLAG: MappingProxyType({
+            "pause_connector": False,
+            "quarantine_data": True,
+            "send_alert": True,
+            "generate_rollback": True,
+            "human_review": True,
+            "urgent": False
+        }),
+        ACTION_FLAG_FOR_REVIEW: MappingProxyType({
+            "pause_connector": False,
+            "quarantine_data": False,
+            "send_alert": True,
+            "generate_rollback": False,
+            "human_review": True,
+            "urgent": False
+        }),
+        ACTION_LOG_AND_CONTINUE: MappingProxyType({
+            "pause_connector": False,
+            "quarantine_data": False,
+            "send_alert": False,
+            "generate_rollback": False,
+            "human_review": False,
+            "urgent": False
+        }),
+        ACTION_CONTINUE: MappingProxyType({
+            "pause_connector": False,
+            "quarantine_data": False,
+            "send_alert": False,
+            "generate_rollback": False,
+            "human_review": False,
+            "urgent": False
+        })
+    })
+    
+    # Decision rules, most critical first. Each entry is
+    # (predicate, action, priority, confidence, severity_score, reasons) where
+    # predicate and reasons take (schema_severity, anomaly_confidence,
+    # anomaly_types, schema_alert) and confidence None means "use the anomaly
+    # confidence".
+    _RULES = (
+        # RULE 1: Multiple simultaneous critical issues = EMERGENCY
+        (
+            lambda sev, conf, types, alert: sev == "CRITICAL" and conf > 0.7,
+            ACTION_EMERGENCY_PAUSE, PRIORITY_CRITICAL, 0.95, 100,
+            lambda sev, conf, types, alert: [
+                "EMERGENCY: Critical schema change + data quality issues detected simultaneously",
+                f"Schema severity: {sev}, Anomaly confidence: {conf:.0%}"
+            ]
+        ),
+        # RULE 2: Test data in production = QUARANTINE + PAUSE
+        (
+            lambda sev, conf, types, alert: "test_data" in types and conf >= 0.85,
+            ACTION_QUARANTINE_AND_PAUSE, PRIORITY_CRITICAL, None, 90,
+            lambda sev, conf, types, alert: [
+                f"Test data detected in production with {conf:.0%} confidence",
+                "Action: Quarantine contaminated data and pause sync to prevent further pollution"
+            ]
+        ),
+        # RULE 3: Critical schema changes = PAUSE
+        (
+            lambda sev, conf, types, alert: sev == "CRITICAL",
+            ACTION_PAUSE_AND_ALERT, PRIORITY_CRITICAL, 0.9, 85,
+            lambda sev, conf, types, alert: [
+                "Critical schema change detected - high risk of downstream breakage",
+                *_schema_change_reasons(alert)
+            ]
+        ),
+        # RULE 4: High removed columns + High anomaly = PAUSE
+        (
+            lambda sev, conf, types, alert: (
+                sev == "HIGH" and
+                len(alert.get("changes", {}).get("removed_columns", [])) > 0 and
+                conf > 0.8
+            ),
+            ACTION_PAUSE_AND_ALERT, PRIORITY_HIGH, 0.85, 80,
+            lambda sev, conf, types, alert: [
+                "Data loss (removed columns) combined with quality issues",
+                "Pausing to prevent cascading failures"
+            ]
+        ),
+        # RULE 5: High confidence anomalies = QUARANTINE
+        (
+            lambda sev, conf, types, alert: conf > 0.80,
+            ACTION_QUARANTINE_AND_FLAG, PRIORITY_HIGH, None, 70,
+            lambda sev, conf, types, alert: [
+                f"High-confidence data anomalies detected ({conf:.0%})",
+                "Action: Quarantine suspicious data for investigation",
+                *([f"Anomaly types: {', '.join(set(types))}"] if types else [])
+            ]
+        ),
+        # RULE 6: Medium confidence anomalies = FLAG
+        (
+            lambda sev, conf, types, alert: conf > 0.70,
+            ACTION_FLAG_FOR_REVIEW, PRIORITY_MEDIUM, None, 50,
+            lambda sev, conf, types, alert: [
+                f"Moderate-confidence anomalies detected ({conf:.0%})",
+                "Action: Flag for human review, continue monitoring"
+            ]
+        ),
+        # RULE 7: Schema changes (non-critical) = FLAG
+        (
+            lambda sev, conf, types, alert: sev == "HIGH",
+            ACTION_FLAG_FOR_REVIEW, PRIORITY_MEDIUM, 0.8, 40,
+            lambda sev, conf, types, alert: [
+                f"{sev} schema changes detected",
+                "Action: Monitor and flag for review"
+            ]
+        ),
+        (
+            lambda sev, conf, types, alert: sev == "MEDIUM",
+            ACTION_FLAG_FOR_REVIEW, PRIORITY_LOW, 0.8, 30,
+            lambda sev, conf, types, alert: [
+                f"{sev} schema changes detected",
+                "Action: Monitor and flag for review"
+            ]
+        ),
+        # RULE 8: Low confidence anomalies = LOG
+        (
+            lambda sev, conf, types, alert: conf > 0.5,
+            ACTION_LOG_AND_CONTINUE, PRIORITY_LOW, None, 20,
+            lambda sev, conf, types, alert: [
+                f"Low-confidence anomalies ({conf:.0%}) - monitoring only"
+            ]
+        ),
+        # RULE 9: Everything clean = CONTINUE
+        (
+            lambda sev, conf, types, alert: True,
+            ACTION_CONTINUE, PRIORITY_LOW, 1.0, 0,
+            lambda sev, conf, types, alert: [
+                "All systems operational - no issues detected"
+            ]
+        ),
+    )
+    
     def __init__(self):
         """Initialize decision engine"""
-        self.decision_history = []
+        # Bounded history; metrics are kept as running totals over what it holds
+        self.decision_history = deque(
+            maxlen=int(os.getenv("OSPREY_DECISION_HISTORY_MAX", "10000"))
+        )
+        self._by_action = Counter()
+        self._by_priority = Counter()
+        self._confidence_sum = 0.0
+        
+        # calculate_metrics() result, reused until the next recorded decision
+        self._metrics_cache: Optional[Dict] = None
     
     def evaluate(
         self, 
@@ -62,164 +252,55 @@ class DecisionEngine:
                 - inputs: Original alerts
                 - severity_score: Numeric score for sorting
         """
-        decision = {
-            "decision_id": str(uuid.uuid4()),
-            "timestamp": datetime.utcnow().isoformat() + "Z",
-            "action": self.ACTION_CONTINUE,
-            "confidence": 1.0,
-            "reasoning": [],
-            "priority": self.PRIORITY_LOW,
-            "inputs": {
-                "schema_alert": schema_alert,
-                "anomaly_alert": anomaly_alert
-            },
-            "severity_score": 0
-        }
-        
-        # Extract severities and confidences
+        # Read the inputs once; the rules below only look at these values
         schema_severity = schema_alert.get("severity") if schema_alert else None
         anomaly_confidence = anomaly_alert.get("confidence", 0) if anomaly_alert else 0
-        anomaly_types = []
+        anomaly_types = ()
         
         if anomaly_alert and anomaly_alert.get("has_anomalies"):
-            anomaly_types = [a.get("type") for a in anomaly_alert.get("anomalies", [])]
+            anomaly_types = tuple(a.get("type") for a in anomaly_alert.get("anomalies", []))
         
-        # Decision logic (order matters - most critical first)
+        # First matching rule wins; the last rule always matches
+        for matches, action, priority, confidence, severity_score, reasons in self._RULES:
+            if matches(schema_severity, anomaly_confidence, anomaly_types, schema_alert):
+                break
         
-        # RULE 1: Multiple simultaneous critical issues = EMERGENCY
-        if (schema_severity == "CRITICAL" and anomaly_confidence > 0.7):
-            decision["action"] = self.ACTION_EMERGENCY_PAUSE
-            decision["priority"] = self.PRIORITY_CRITICAL
-            decision["confidence"] = 0.95
-            decision["severity_score"] = 100
-            decision["reasoning"].append(
-                "EMERGENCY: Critical schema change + data quality issues detected simultaneously"
-            )
-            decision["reasoning"].append(
-                f"Schema severity: {schema_severity}, Anomaly confidence: {anomaly_confidence:.0%}"
-            )
-        
-        # RULE 2: Test data in production = QUARANTINE + PAUSE
-        elif "test_data" in anomaly_types and anomaly_confidence >= 0.85:
-            decision["action"] = self.ACTION_QUARANTINE_AND_PAUSE
-            decision["priority"] = self.PRIORITY_CRITICAL
-            decision["confidence"] = anomaly_confidence
-            decision["severity_score"] = 90
-            decision["reasoning"].append(
-                f"Test data detected in production with {anomaly_confidence:.0%} confidence"
-            )
-            decision["reasoning"].append(
-                "Action: Quarantine contaminated data and pause sync to prevent further pollution"
-            )
-        
-        # RULE 3: Critical schema changes = PAUSE
-        elif schema_severity == "CRITICAL":
-            decision["action"] = self.ACTION_PAUSE_AND_ALERT
-            decision["priority"] = self.PRIORITY_CRITICAL
-            decision["confidence"] = 0.9
-            decision["severity_score"] = 85
-            decision["reasoning"].append(
-                "Critical schema change detected - high risk of downstream breakage"
-            )
-            
-            if schema_alert:
-                changes = schema_alert.get("changes", {})
-                if changes.get("type_changes"):
-                    decision["reasoning"].append(
-                        f"Column type changes: {len(changes['type_changes'])} detected"
-                    )
-                if changes.get("removed_columns"):
-                    decision["reasoning"].append(
-                        f"Removed columns: {len(changes['removed_columns'])} detected"
-                    )
-        
-        # RULE 4: High removed columns + High anomaly = PAUSE
-        elif (schema_severity == "HIGH" and 
-              schema_alert and 
-              len(schema_alert.get("changes", {}).get("removed_columns", [])) > 0 and
-              anomaly_confidence > 0.8):
-            decision["action"] = self.ACTION_PAUSE_AND_ALERT
-            decision["priority"] = self.PRIORITY_HIGH
-            decision["confidence"] = 0.85
-            decision["severity_score"] = 80
-            decision["reasoning"].append(
-                "Data loss (removed columns) combined with quality issues"
-            )
-            decision["reasoning"].append(
-                "Pausing to prevent cascading failures"
-            )
-        
-        # RULE 5: High confidence anomalies = QUARANTINE
-        elif anomaly_confidence > 0.80:
-            decision["action"] = self.ACTION_QUARANTINE_AND_FLAG
-            decision["priority"] = self.PRIORITY_HIGH
-            decision["confidence"] = anomaly_confidence
-            decision["severity_score"] = 70
-            decision["reasoning"].append(
-                f"High-confidence data anomalies detected ({anomaly_confidence:.0%})"
-            )
-            decision["reasoning"].append(
-                "Action: Quarantine suspicious data for investigation"
-            )
-            
-            # List anomaly types
-            if anomaly_types:
-                decision["reasoning"].append(
-                    f"Anomaly types: {', '.join(set(anomaly_types))}"
-                )
-        
-        # RULE 6: Medium confidence anomalies = FLAG
-        elif anomaly_confidence > 0.70:
-            decision["action"] = self.ACTION_FLAG_FOR_REVIEW
-            decision["priority"] = self.PRIORITY_MEDIUM
-            decision["confidence"] = anomaly_confidence
-            decision["severity_score"] = 50
-            decision["reasoning"].append(
-                f"Moderate-confidence anomalies detected ({anomaly_confidence:.0%})"
-            )
-            decision["reasoning"].append(
-                "Action: Flag for human review, continue monitoring"
-            )
-        
-        # RULE 7: Schema changes (non-critical) = FLAG
-        elif schema_severity in ["HIGH", "MEDIUM"]:
-            decision["action"] = self.ACTION_FLAG_FOR_REVIEW
-            decision["priority"] = self.PRIORITY_MEDIUM if schema_severity == "HIGH" else self.PRIORITY_LOW
-            decision["confidence"] = 0.8
-            decision["severity_score"] = 40 if schema_severity == "HIGH" else 30
-            decision["reasoning"].append(
-                f"{schema_severity} schema changes detected"
-            )
-            decision["reasoning"].append(
-                "Action: Monitor and flag for review"
-            )
-        
-        # RULE 8: Low confidence anomalies = LOG
-        elif anomaly_confidence > 0.5:
-            decision["action"] = self.ACTION_LOG_AND_CONTINUE
-            decision["priority"] = self.PRIORITY_LOW
-            decision["confidence"] = anomaly_confidence
-            decision["severity_score"] = 20
-            decision["reasoning"].append(
-                f"Low-confidence anomalies ({anomaly_confidence:.0%}) - monitoring only"
-            )
-        
-        # RULE 9: Everything clean = CONTINUE
-        else:
-            decision["action"] = self.ACTION_CONTINUE
-            decision["priority"] = self.PRIORITY_LOW
-            decision["confidence"] = 1.0
-            decision["severity_score"] = 0
-            decision["reasoning"].append(
-                "All systems operational - no issues detected"
-            )
+        # 64 random bits are plenty for an in-process history
+        decision = {
+            "decision_id": secrets.token_hex(8),
+            # Fixed-width (microseconds always present) so string order is time order
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="microseconds").replace("+00:00", "Z"),
+            "action": action,
+            "confidence": anomaly_confidence if confidence is None else confidence,
+            "reasoning": reasons(schema_severity, anomaly_confidence, anomaly_types, schema_alert),
+            "priority": priority,
+            "inputs": {
+                "schema_alert": schema_alert,
+                "anomaly_alert": anomaly_alert
+            },
+            "severity_score": severity_score
+        }
         
         # Store decision
-        self.decision_history.append(decision)
+        self._record(decision)
         
         return decision
     
-    def get_action_requirements(self, action: str) -> Dict:
+    def _record(self, decision: Dict) -> None:
+        """Append a decision and update the running metrics (evicting the oldest if full)"""
+        if len(self.decision_history) == self.decision_history.maxlen:
+            evicted = self.decision_history[0]
+            self._by_action[evicted["action"]] -= 1
+            self._by_priority[evicted["priority"]] -= 1
+            self._confidence_sum -= evicted["confidence"]
+        
+        self.decision_history.append(decision)
+        self._metrics_cache = None
+        self._by_action[decision["action"]] += 1
+        self._by_priority[decision["priority"]] += 1
+        self._confidence_sum += decision["confidence"]
+    
+    def get_action_requirements(self, action: str) -> Mapping[str, bool]:
         """
         Get requirements for executing a specific action
         
@@ -227,97 +308,59 @@ class DecisionEngine:
             action: Action type (e.g., PAUSE_AND_ALERT)
         
         Returns:
-            Dict with keys:
+            Read-only mapping with keys:
                 - pause_connector: bool
                 - quarantine_data: bool
                 - send_alert: bool
                 - generate_rollback: bool
                 - human_review: bool
         """
-        requirements = {
-            self.ACTION_EMERGENCY_PAUSE: {
-                "pause_connector": True,
-                "quarantine_data": False,
-                "send_alert": True,
-                "generate_rollback": False,
-                "human_review": True,
-                "urgent": True
-            },
-            self.ACTION_PAUSE_AND_ALERT: {
-                "pause_connector": True,
-                "quarantine_data": False,
-                "send_alert": True,
-                "generate_rollback": False,
-                "human_review": True,
-                "urgent": False
-            },
-            self.ACTION_QUARANTINE_AND_PAUSE: {
-                "pause_connector": True,
-                "quarantine_data": True,
-                "send_alert": True,
-                "generate_rollback": True,
-                "human_review": True,
-                "urgent": False
-            },
-            self.ACTION_QUARANTINE_AND_FLAG: {
-                "pause_connector": False,
-                "quarantine_data": True,
-                "send_alert": True,
-                "generate_rollback": True,
-                "human_review": True,
-                "urgent": False
-            },
-            self.ACTION_FLAG_FOR_REVIEW: {
-                "pause_connector": False,
-                "quarantine_data": False,
-                "send_alert": True,
-                "generate_rollback": False,
-                "human_review": True,
-                "urgent": False
-            },
-            self.ACTION_LOG_AND_CONTINUE: {
-                "pause_connector": False,
-                "quarantine_data": False,
-                "send_alert": False,
-                "generate_rollback": False,
-                "human_review": False,
-                "urgent": False
-            },
-            self.ACTION_CONTINUE: {
-                "pause_connector": False,
-                "quarantine_data": False,
-                "send_alert": False,
-                "generate_rollback": False,
-                "human_review": False,
-                "urgent": False
-            }
-        }
-        
-        return requirements.get(action, {})
+        return self._ACTION_REQUIREMENTS.get(action, _NO_REQUIREMENTS)
     
-    def get_recent_decisions(self, limit: int = 10) -> List[Dict]:
+    def get_recent_decisions(self, limit: int = 10, cursor: Optional[str] = None) -> List[Dict]:
         """
         Get recent decision history
         
         Args:
             limit: Number of decisions to return
+            cursor: decision_cursor() of the last decision of the previous page;
+                only decisions after it (older, or tied and recorded earlier)
+                are returned
         
         Returns:
-            List of recent decisions
+            List of recent decisions (newest first)
         """
-        return sorted(
-            self.decision_history,
-            key=lambda d: d["timestamp"],
-            reverse=True
-        )[:limit]
+        # Decisions are appended in timestamp order, so newest-first needs no sort
+        if cursor is None:
+            return list(islice(reversed(self.decision_history), limit))
+        
+        timestamp, _, decision_id = cursor.rpartition("|")
+        history = self.decision_history
+        end = bisect.bisect_left(history, timestamp, key=lambda d: d["timestamp"])
+        # Decisions tied with the cursor's timestamp are in append order: resume
+        # just before the cursor's decision (or skip the ties if it was evicted)
+        for i in range(end, bisect.bisect_right(history, timestamp, lo=end, key=lambda d: d["timestamp"])):
+            if history[i]["decision_id"] == decision_id:
+                end = i
+                break
+        return [history[i] for i in range(end - 1, max(end - limit, 0) - 1, -1)]
+    
+    @staticmethod
+    def decision_cursor(decision: Dict) -> str:
+        """Cursor resuming get_recent_decisions() after `decision` ("<timestamp>|<decision id>")"""
+        return f"{decision['timestamp']}|{decision['decision_id']}"
     
     def calculate_metrics(self) -> Dict:
         """
         Calculate decision metrics
         
         Returns:
-            Metrics dict with counts by action and priority
+            Metrics dict with counts by action and priority (shared between
+            calls until the next decision; don't mutate it)
         """
+        if self._metrics_cache is not None:
+            return self._metrics_cache
+        
         if not self.decision_history:
             return {
                 "total_decisions": 0,
@@ -326,24 +369,13 @@ class DecisionEngine:
                 "avg_confidence": 0.0
             }
         
-        by_action = {}
-        by_priority = {}
-        total_confidence = 0.0
-        
-        for decision in self.decision_history:
-            action = decision["action"]
-            priority = decision["priority"]
-            
-            by_action[action] = by_action.get(action, 0) + 1
-            by_priority[priority] = by_priority.get(priority, 0) + 1
-            total_confidence += decision["confidence"]
-        
-        return {
+        self._metrics_cache = {
             "total_decisions": len(self.decision_history),
-            "by_action": by_action,
-            "by_priority": by_priority,
-            "avg_confidence": total_confidence / len(self.decision_history)
+            "by_action": {action: n for action, n in self._by_action.items() if n > 0},
+            "by_priority": {priority: n for priority, n in self._by_priority.items() if n > 0},
+            "avg_confidence": self._confidence_sum / len(self.decision_history)
         }
+        return self._metrics_cache
 
 
 # Testing
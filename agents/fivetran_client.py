@@ -8,21 +8,52 @@ API Docs: https://fivetran.com/docs/rest-api/connectors
 Rate Limit: 120 requests/hour
 """
 
+import logging
 import os
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import time
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
+from functools import lru_cache
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=4096)
+def _parse_iso_z(timestamp: str) -> datetime:
+    """Parse a Fivetran ISO timestamp; sync times rarely change between polls, so cache them"""
+    # Python 3.11+ fromisoformat accepts the trailing "Z" directly
+    return datetime.fromisoformat(timestamp)
+
+
+class FivetranAPIError(requests.exceptions.RequestException):
+    """Fivetran request failure; status_code is set when the API answered with an error"""
+    
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
 
 class FivetranClient:
     """Client for Fivetran REST API v1"""
     
+    __slots__ = (
+        "api_key", "api_secret", "auth",
+        "_capacity", "_refill_rate", "_tokens", "_last_refill", "_bucket_lock",
+        "_status_cache", "_etag_cache", "_session",
+    )
+    
     BASE_URL = "https://api.fivetran.com/v1"
     RATE_LIMIT_REQUESTS_PER_HOUR = 120
+    MAX_PARALLEL_REQUESTS = 16  # Matches the HTTPAdapter pool size
     
     def __init__(self, api_key: Optional[str] = None, api_secret: Optional[str] = None):
         """
@@ -42,21 +73,67 @@ class FivetranClient:
             )
         
         self.auth = (self.api_key, self.api_secret)
-        self._request_count = 0
-        self._request_window_start = time.time()
+        
+        # Token bucket shared by every caller of this client: a full hour's quota
+        # can be spent in a burst, after which requests are spaced out at the refill rate
+        self._capacity = float(self.RATE_LIMIT_REQUESTS_PER_HOUR)
+        self._refill_rate = self.RATE_LIMIT_REQUESTS_PER_HOUR / 3600.0  # tokens per second
+        self._tokens = self._capacity
+        self._last_refill = time.monotonic()
+        self._bucket_lock = threading.Lock()
+        
+        # connector_id -> (fetched_at_ms, details) for callers that poll with ttl_ms
+        self._status_cache: Dict[str, tuple] = {}
+        
+        # endpoint -> (ETag, parsed body) of the last GET, for conditional requests
+        self._etag_cache: Dict[str, tuple] = {}
+        
+        # Persistent session: reuses TCP/TLS connections across agent actions
+        self._session = requests.Session()
+        self._session.auth = self.auth
+        self._session.headers.update({"Accept": "application/json", "Content-Type": "application/json"})
+        self._session.mount("https://", HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=self.MAX_PARALLEL_REQUESTS,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.3,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=["GET", "POST", "PATCH"],  # pause/resume/force are safe to repeat
+                raise_on_status=False  # Let _make_request report the final error
+            )
+        ))
+    
+    def close(self):
+        """Close pooled HTTP connections"""
+        self._session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def __del__(self):
+        session = getattr(self, "_session", None)
+        if session is not None:
+            session.close()
     
     def _check_rate_limit(self):
-        """Simple rate limit check"""
-        elapsed = time.time() - self._request_window_start
-        
-        # Reset counter every hour
-        if elapsed > 3600:
-            self._request_count = 0
-            self._request_window_start = time.time()
-        
-        # Warn if approaching limit
-        if self._request_count >= self.RATE_LIMIT_REQUESTS_PER_HOUR - 10:
-            print(f"⚠️  Approaching Fivetran rate limit ({self._request_count}/120 requests)")
+        """Take a token from the bucket, sleeping until one is available"""
+        with self._bucket_lock:
+            now = time.monotonic()
+            self._tokens = min(self._capacity, self._tokens + (now - self._last_refill) * self._refill_rate)
+            self._last_refill = now
+            
+            # Reserve the token even if the bucket is empty; concurrent callers
+            # then queue up behind each other instead of waking up together
+            self._tokens -= 1
+            wait = -self._tokens / self._refill_rate if self._tokens < 0 else 0.0
+        
+        if wait > 0:
+            logger.warning("⏳ Fivetran rate limit reached (%d/hour), waiting %.0fs", self.RATE_LIMIT_REQUESTS_PER_HOUR, wait)
+            time.sleep(wait)
     
     def _make_request(
         self, 
@@ -76,48 +153,67 @@ class FivetranClient:
             Response JSON data
         
         Raises:
-            requests.exceptions.RequestException: On API errors
+            FivetranAPIError: On API, network or decoding errors
         """
         self._check_rate_limit()
         
         url = f"{self.BASE_URL}{endpoint}"
-        headers = {"Accept": "application/json", "Content-Type": "application/json"}
+        logger.debug("Fivetran %s %s", method, endpoint)
+        
+        # Polled GETs usually return the same body; revalidate it with the ETag
+        cached = self._etag_cache.get(endpoint) if method == "GET" else None
+        headers = {"If-None-Match": cached[0]} if cached else None
         
         try:
-            response = requests.request(
+            response = self._session.request(
                 method=method,
                 url=url,
-                auth=self.auth,
                 headers=headers,
                 json=data,
-                timeout=30
+                timeout=(5, 30)  # connect, read
+            )
+        except requests.exceptions.Timeout as e:
+            raise FivetranAPIError("Fivetran API timeout (30s)") from e
+        except requests.exceptions.RequestException as e:
+            raise FivetranAPIError(f"Fivetran API request failed: {e}") from e
+        
+        if response.status_code == 304 and cached:
+            return cached[1]
+        
+        # Handle errors; only decode JSON error bodies, and cap what goes into the message
+        if response.status_code >= 400:
+            error_msg = response.text[:512]
+            if response.headers.get("Content-Type", "").startswith("application/json"):
+                try:
+                    error_msg = orjson.loads(response.content).get("message", error_msg)
+                except (orjson.JSONDecodeError, AttributeError):
+                    pass
+            raise FivetranAPIError(
+                f"Fivetran API error ({response.status_code}): {error_msg}",
+                status_code=response.status_code
             )
-            
-            self._request_count += 1
-            
-            # Handle errors
-            if response.status_code >= 400:
-                error_data = response.json() if response.content else {}
-                error_msg = error_data.get("message", response.text)
-                raise requests.exceptions.RequestException(
-                    f"Fivetran API error ({response.status_code}): {error_msg}"
-                )
-            
-            return response.json()
         
-        except requests.exceptions.Timeout:
-            raise requests.exceptions.RequestException("Fivetran API timeout (30s)")
+        try:
+            body = orjson.loads(response.content)
+        except orjson.JSONDecodeError as e:
+            raise FivetranAPIError(f"Fivetran API returned invalid JSON: {e}") from e
+        
+        if method == "GET":
+            etag = response.headers.get("ETag")
+            if etag:
+                self._etag_cache[endpoint] = (etag, body)
+            else:
+                self._etag_cache.pop(endpoint, None)
         
-        except requests.exceptions.RequestException as e:
-            # Re-raise with context
-            raise requests.exceptions.RequestException(f"Fivetran API request failed: {e}")
+        return body
     
-    def get_connector_details(self, connector_id: str) -> Dict:
+    def get_connector_details(self, connector_id: str, ttl_ms: int = 0) -> Dict:
         """
         Get detailed information about a connector
         
         Args:
             connector_id: Fivetran connector ID
+            ttl_ms: Reuse a response fetched less than this many ms ago (0 = always fetch)
         
         Returns:
             Connector details dict with keys:
@@ -129,15 +225,29 @@ class FivetranClient:
                 - succeeded_at: last successful sync timestamp
                 - failed_at: last failed sync timestamp
         """
+        if ttl_ms > 0:
+            cached = self._status_cache.get(connector_id)
+            if cached is not None and time.monotonic() * 1000 - cached[0] < ttl_ms:
+                return cached[1]
+        
         response = self._make_request("GET", f"/connectors/{connector_id}")
-        return response.get("data", {})
+        details = response.get("data", {})
+        
+        # Stamp after the request returns so a slow call doesn't shorten the TTL
+        self._status_cache[connector_id] = (time.monotonic() * 1000, details)
+        return details
     
-    def get_connector_status(self, connector_id: str) -> Dict:
+    def _invalidate_status(self, connector_id: str):
+        """Drop cached details after a call that changes connector state"""
+        self._status_cache.pop(connector_id, None)
+    
+    def get_connector_status(self, connector_id: str, ttl_ms: int = 0) -> Dict:
         """
         Get connector status (simplified view)
         
         Args:
             connector_id: Fivetran connector ID
+            ttl_ms: Accept cached connector details up to this age (see get_connector_details)
         
         Returns:
             Status dict with keys:
@@ -147,17 +257,17 @@ class FivetranClient:
                 - last_sync: ISO timestamp
                 - sync_frequency_minutes: int
         """
-        details = self.get_connector_details(connector_id)
+        details = self.get_connector_details(connector_id, ttl_ms)
         
         # Determine status
         if details.get("paused"):
             status = "paused"
         elif details.get("failed_at"):
             # Check if failure is recent
-            failed_at = datetime.fromisoformat(details["failed_at"].replace("Z", "+00:00"))
+            failed_at = _parse_iso_z(details["failed_at"])
             succeeded_at = details.get("succeeded_at")
             if succeeded_at:
-                succeeded_at = datetime.fromisoformat(succeeded_at.replace("Z", "+00:00"))
+                succeeded_at = _parse_iso_z(succeeded_at)
                 status = "error" if failed_at > succeeded_at else "running"
             else:
                 status = "error"
@@ -175,6 +285,35 @@ class FivetranClient:
             "setup_state": details.get("status", {}).get("setup_state"),
         }
     
+    def get_many_connector_statuses(self, connector_ids: List[str], ttl_ms: int = 0) -> List[Dict]:
+        """
+        Get the status of several connectors at once
+        
+        The GETs run in parallel over the pooled session (one kept-alive
+        connection per worker) instead of one after another, so N connectors
+        cost roughly one round-trip. The shared token bucket still applies.
+        
+        Args:
+            connector_ids: Fivetran connector IDs
+            ttl_ms: Accept cached connector details up to this age (see get_connector_details)
+        
+        Returns:
+            Status dicts (see get_connector_status), in the order of connector_ids;
+            a connector that could not be fetched gets {"connector_id", "status": "unknown", "error"}
+        """
+        def fetch(connector_id: str) -> Dict:
+            try:
+                return self.get_connector_status(connector_id, ttl_ms)
+            except requests.exceptions.RequestException as e:
+                return {"connector_id": connector_id, "status": "unknown", "error": str(e)}
+        
+        if len(connector_ids) <= 1:
+            return [fetch(connector_id) for connector_id in connector_ids]
+        
+        workers = min(len(connector_ids), self.MAX_PARALLEL_REQUESTS)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fivetran") as pool:
+            return list(pool.map(fetch, connector_ids))
+    
     def pause_connector(self, connector_id: str) -> Dict:
         """
         Pause a Fivetran connector
@@ -185,7 +324,7 @@ class FivetranClient:
         Returns:
             Updated connector details
         """
-        print(f"⏸️  Pausing Fivetran connector: {connector_id}")
+        logger.info("⏸️  Pausing Fivetran connector: %s", connector_id)
         
         response = self._make_request(
             "PATCH",
@@ -194,11 +333,12 @@ class FivetranClient:
         )
         
         result = response.get("data", {})
+        self._invalidate_status(connector_id)
         
         if result.get("paused"):
-            print(f"✅ Connector paused successfully")
+            logger.info("✅ Connector paused successfully")
         else:
-            print(f"⚠️  Pause request sent but status unclear")
+            logger.warning("⚠️  Pause request sent but status unclear")
         
         return result
     
@@ -212,7 +352,7 @@ class FivetranClient:
         Returns:
             Updated connector details
         """
-        print(f"▶️  Resuming Fivetran connector: {connector_id}")
+        logger.info("▶️  Resuming Fivetran connector: %s", connector_id)
         
         response = self._make_request(
             "PATCH",
@@ -221,11 +361,12 @@ class FivetranClient:
         )
         
         result = response.get("data", {})
+        self._invalidate_status(connector_id)
         
         if not result.get("paused"):
-            print(f"✅ Connector resumed successfully")
+            logger.info("✅ Connector resumed successfully")
         else:
-            print(f"⚠️  Resume request sent but status unclear")
+            logger.warning("⚠️  Resume request sent but status unclear")
         
         return result
     
@@ -241,14 +382,15 @@ class FivetranClient:
         
         Note: Sync is asynchronous. Use get_connector_status to check progress.
         """
-        print(f"🔄 Triggering manual sync for: {connector_id}")
+        logger.info("🔄 Triggering manual sync for: %s", connector_id)
         
         response = self._make_request(
             "POST",
             f"/connectors/{connector_id}/force"
         )
+        self._invalidate_status(connector_id)
         
-        print(f"✅ Sync triggered (async operation)")
+        logger.info("✅ Sync triggered (async operation)")
         return response.get("data", {})
     
     def list_connectors(self) -> list:
@@ -5,24 +5,63 @@ Coordinates Schema Guardian and Anomaly Detective to make autonomous decisions
 and execute actions. This is the "brain" that brings multi-agent coordination to life.
 """
 
+import logging
 import os
+import secrets
 import sys
 from pathlib import Path
-from typing import Dict, Optional
-from datetime import datetime
+from typing import TYPE_CHECKING, Dict, Optional
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from dotenv import load_dotenv
 
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from agents.schema_guardian import SchemaGuardian
-from agents.anomaly_detective import AnomalyDetective
+# The agents pull in BigQuery, Vertex AI, pandas etc.; they are imported in
+# PipelineOrchestrator.__init__ so importing this module (CLI --help) stays cheap
 from agents.decision_engine import DecisionEngine
-from agents.action_executor import ActionExecutor
-from agents.fivetran_client import FivetranClient
+
+if TYPE_CHECKING:
+    from google.cloud import bigquery
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class OrchestrationResult:
+    """One orchestrate() run as kept in the history (slotted; dicts only at the API boundary)"""
+    orchestration_id: str
+    timestamp: str
+    schema_alert: Optional[Dict] = None
+    anomaly_alert: Optional[Dict] = None
+    decision: Optional[Dict] = None
+    action_result: Optional[Dict] = None
+    state: str = "IDLE"
+    success: bool = True
+    error: Optional[str] = None
+    
+    def to_dict(self) -> Dict:
+        """Dict view returned by orchestrate() and the history getters ("error" only on failure)"""
+        result = {
+            "orchestration_id": self.orchestration_id,
+            "timestamp": self.timestamp,
+            "schema_alert": self.schema_alert,
+            "anomaly_alert": self.anomaly_alert,
+            "decision": self.decision,
+            "action_result": self.action_result,
+            "state": self.state,
+            "success": self.success
+        }
+        if self.error is not None:
+            result["error"] = self.error
+        return result
+
 
 class PipelineOrchestrator:
     """
@@ -37,7 +76,9 @@ class PipelineOrchestrator:
         project_id: Optional[str] = None,
         dataset_id: Optional[str] = None,
         table_id: Optional[str] = None,
-        connector_id: Optional[str] = None
+        connector_id: Optional[str] = None,
+        bq_client: Optional["bigquery.Client"] = None,
+        memory=None
     ):
         """
         Initialize Pipeline Orchestrator
@@ -47,49 +88,73 @@ class PipelineOrchestrator:
             dataset_id: BigQuery dataset (or from env)
             table_id: BigQuery table (or from env)
             connector_id: Fivetran connector ID (or from env)
+            bq_client: BigQuery client shared with every agent (one is created if omitted)
+            memory: Shared AgentMemory (Firestore) for the action executor
         """
         self.project_id = project_id or os.getenv("PROJECT_ID")
         self.dataset_id = dataset_id or os.getenv("DATASET_ID")
         self.table_id = table_id or os.getenv("TABLE_ID")
         self.connector_id = connector_id or os.getenv("FIVETRAN_CONNECTOR_ID")
         
-        print("🦅 Initializing Pipeline Orchestrator...")
+        from google.cloud import bigquery
+        from agents.schema_guardian import SchemaGuardian
+        from agents.anomaly_detective import AnomalyDetective
+        from agents.action_executor import ActionExecutor
+        from agents.fivetran_client import FivetranClient
+        
+        # One BigQuery client and one Fivetran session (with its rate-limit bucket
+        # and status cache) for every agent, instead of one per agent
+        self._owns_bq_client = bq_client is None
+        bq_client = self.bq_client = bq_client or bigquery.Client(project=self.project_id)
+        self.fivetran_client = FivetranClient()
+        
+        logger.info("🦅 Initializing Pipeline Orchestrator...")
         
         # Initialize agents
-        print("   Loading Agent 1 (Schema Guardian)...")
+        logger.info("   Loading Agent 1 (Schema Guardian)...")
         self.schema_guardian = SchemaGuardian(
             self.project_id,
             self.dataset_id,
-            self.table_id
+            self.table_id,
+            client=bq_client
         )
         
-        print("   Loading Agent 2 (Anomaly Detective)...")
+        logger.info("   Loading Agent 2 (Anomaly Detective)...")
         self.anomaly_detective = AnomalyDetective(
             self.project_id,
             self.dataset_id,
-            self.table_id
+            self.table_id,
+            bq_client=bq_client
         )
         
         # Initialize decision and action systems
-        print("   Loading Decision Engine...")
+        logger.info("   Loading Decision Engine...")
         self.decision_engine = DecisionEngine()
         
-        print("   Loading Action Executor...")
+        logger.info("   Loading Action Executor...")
         self.action_executor = ActionExecutor(
             self.project_id,
             self.dataset_id,
             self.table_id,
-            self.connector_id
+            self.connector_id,
+            bq_client=bq_client,
+            memory=memory,
+            fivetran_client=self.fivetran_client
         )
         
-        # Initialize Fivetran client
-        self.fivetran_client = FivetranClient()
+        # Runs the Agent 1 and Agent 2 checks concurrently
+        self._agent_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="osprey-agents")
         
         # State tracking
         self.state = "IDLE"  # IDLE, EVALUATING, ACTING
-        self.orchestration_history = []
+        # Bounded like the decision/action histories; a monitor loop adds one run
+        # every few minutes for as long as it lives
+        self.orchestration_history = deque(
+            maxlen=int(os.getenv("OSPREY_ORCHESTRATION_HISTORY_MAX", "1000"))
+        )
+        self.total_orchestrations = 0  # Includes runs already evicted from the history
         
-        print("✅ Orchestrator initialized!\n")
+        logger.info("✅ Orchestrator initialized!")
     
     def orchestrate(self) -> Dict:
         """
@@ -107,111 +172,146 @@ class PipelineOrchestrator:
                 - action_result: Action execution result (or None)
                 - state: Final state
         """
-        orchestration_id = f"orch_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}"
+        # One clock read for both the run ID and its timestamp
+        now = datetime.now(timezone.utc)
+        orchestration_id = f"orch_{now:%Y%m%d_%H%M%S}"
         
-        print("=" * 60)
-        print(f"🦅 ORCHESTRATION RUN: {orchestration_id}")
-        print("=" * 60)
+        logger.info("=" * 60)
+        logger.info("🦅 ORCHESTRATION RUN: %s", orchestration_id)
+        logger.info("=" * 60)
         
-        result = {
-            "orchestration_id": orchestration_id,
-            "timestamp": datetime.utcnow().isoformat() + "Z",
-            "schema_alert": None,
-            "anomaly_alert": None,
-            "decision": None,
-            "action_result": None,
-            "state": "IDLE",
-            "success": True
-        }
+        result = OrchestrationResult(
+            orchestration_id=orchestration_id,
+            timestamp=now.isoformat().replace("+00:00", "Z")
+        )
         
         try:
             # PHASE 1: Gather intelligence from agents
             self.state = "EVALUATING"
-            print("\n📊 PHASE 1: Gathering intelligence from agents...\n")
+            logger.info("📊 PHASE 1: Gathering intelligence from agents...")
+            
+            # Both checks are independent network-bound calls (BigQuery metadata,
+            # BigQuery sample + Gemini), so run them side by side
+            schema_future = self._agent_pool.submit(self.schema_guardian.detect_schema_drift)
+            anomaly_future = self._agent_pool.submit(self.anomaly_detective.run_check)
             
             # Agent 1: Check schema
-            print("1️⃣ Agent 1 (Schema Guardian): Checking schema drift...")
+            logger.info("1️⃣ Agent 1 (Schema Guardian): Checking schema drift...")
             try:
-                schema_changes = self.schema_guardian.detect_schema_drift()
+                schema_changes = schema_future.result()
                 
-                if schema_changes and any(schema_changes.values()):
-                    result["schema_alert"] = self.schema_guardian.generate_alert(schema_changes)
-                    print(f"   🚨 Schema drift detected! Severity: {result['schema_alert']['severity']}")
+                if schema_changes.has_changes:
+                    result.schema_alert = self.schema_guardian.generate_alert(schema_changes)
+                    logger.info("   🚨 Schema drift detected! Severity: %s", result.schema_alert["severity"])
                 else:
-                    print("   ✅ Schema stable")
+                    logger.info("   ✅ Schema stable")
             except Exception as e:
-                print(f"   ⚠️  Schema check error: {e}")
+                logger.warning("   ⚠️  Schema check error: %s", e)
             
             # Agent 2: Check anomalies
-            print("\n2️⃣ Agent 2 (Anomaly Detective): Analyzing data quality...")
+            logger.info("2️⃣ Agent 2 (Anomaly Detective): Analyzing data quality...")
             try:
-                anomaly_result = self.anomaly_detective.run_check()
+                anomaly_result = anomaly_future.result()
                 
                 if anomaly_result and anomaly_result.get("has_anomalies"):
-                    result["anomaly_alert"] = anomaly_result
-                    print(f"   🚨 Anomalies detected! Confidence: {anomaly_result['confidence']:.0%}")
+                    result.anomaly_alert = anomaly_result
+                    logger.info("   🚨 Anomalies detected! Confidence: %.0f%%", anomaly_result["confidence"] * 100)
                 else:
-                    print("   ✅ Data quality clean")
+                    logger.info("   ✅ Data quality clean")
             except Exception as e:
-                print(f"   ⚠️  Anomaly check error: {e}")
+                logger.warning("   ⚠️  Anomaly check error: %s", e)
             
             # PHASE 2: Make decision
-            print("\n🧠 PHASE 2: Making autonomous decision...\n")
+            logger.info("🧠 PHASE 2: Making autonomous decision...")
             
-            decision = self.decision_engine.evaluate(
-                schema_alert=result["schema_alert"],
-                anomaly_alert=result["anomaly_alert"]
-            )
-            result["decision"] = decision
+            # Healthy cycles (the common case) need no rule evaluation and are not
+            # recorded in the engine's history; only alerts produce engine decisions
+            if result.schema_alert is None and result.anomaly_alert is None:
+                decision = self._healthy_decision()
+            else:
+                decision = self.decision_engine.evaluate(
+                    schema_alert=result.schema_alert,
+                    anomaly_alert=result.anomaly_alert
+                )
+            result.decision = decision
             
-            print(f"Decision: {decision['action']}")
-            print(f"Priority: {decision['priority']}")
-            print(f"Confidence: {decision['confidence']:.0%}")
-            print(f"Reasoning:")
+            logger.info("Decision: %s", decision["action"])
+            logger.info("Priority: %s", decision["priority"])
+            logger.info("Confidence: %.0f%%", decision["confidence"] * 100)
+            logger.info("Reasoning:")
             for reason in decision["reasoning"]:
-                print(f"   • {reason}")
+                logger.info("   • %s", reason)
             
             # Get action requirements
+            # The engine returns a shared read-only mapping; the decision is
+            # serialized to JSON later, so store a plain dict copy
             requirements = self.decision_engine.get_action_requirements(decision["action"])
-            decision["requirements"] = requirements
+            decision["requirements"] = dict(requirements)
             
             # PHASE 3: Execute action (if needed)
             if decision["action"] != DecisionEngine.ACTION_CONTINUE:
                 self.state = "ACTING"
-                print("\n⚡ PHASE 3: Executing autonomous actions...\n")
+                logger.info("⚡ PHASE 3: Executing autonomous actions...")
                 
                 action_result = self.action_executor.execute_action(decision)
-                result["action_result"] = action_result
+                result.action_result = action_result
                 
                 if action_result["success"]:
-                    print(f"\n✅ All actions completed successfully")
+                    logger.info("✅ All actions completed successfully")
                 else:
-                    print(f"\n⚠️  Some actions failed: {action_result.get('errors')}")
+                    logger.warning("⚠️  Some actions failed: %s", action_result.get("errors"))
             else:
-                print("\n✅ PHASE 3: No action required - system healthy")
+                logger.info("✅ PHASE 3: No action required - system healthy")
             
             # Return to IDLE
             self.state = "IDLE"
-            result["state"] = self.state
+            result.state = self.state
             
-            print("\n" + "=" * 60)
-            print(f"🎯 ORCHESTRATION COMPLETE")
-            print("=" * 60)
+            logger.info("=" * 60)
+            logger.info("🎯 ORCHESTRATION COMPLETE")
+            logger.info("=" * 60)
             
             # Store result
-            self.orchestration_history.append(result)
+            self._record(result)
             
-            return result
+            return result.to_dict()
         
         except Exception as e:
-            print(f"\n❌ Orchestration failed: {e}")
-            result["success"] = False
-            result["error"] = str(e)
-            result["state"] = "ERROR"
+            logger.error("❌ Orchestration failed: %s", e)
+            result.success = False
+            result.error = str(e)
+            result.state = "ERROR"
             self.state = "IDLE"
             
-            self.orchestration_history.append(result)
-            return result
+            self._record(result)
+            return result.to_dict()
+    
+    @staticmethod
+    def _healthy_decision() -> Dict:
+        """CONTINUE decision for a cycle where neither agent raised an alert (same shape as DecisionEngine.evaluate)"""
+        return {
+            "decision_id": secrets.token_hex(8),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="microseconds").replace("+00:00", "Z"),
+            "action": DecisionEngine.ACTION_CONTINUE,
+            "confidence": 1.0,
+            "reasoning": ["All systems operational - no issues detected"],
+            "priority": DecisionEngine.PRIORITY_LOW,
+            "inputs": {"schema_alert": None, "anomaly_alert": None},
+            "severity_score": 0
+        }
+    
+    def close(self):
+        """Release the worker threads and network clients (closes bq_client only if created here)"""
+        self._agent_pool.shutdown(wait=True)
+        self.action_executor.close()
+        self.fivetran_client.close()
+        if self._owns_bq_client:
+            self.bq_client.close()
+    
+    def _record(self, result: "OrchestrationResult"):
+        """Append a finished run to the bounded history"""
+        self.orchestration_history.append(result)
+        self.total_orchestrations += 1
     
     def get_status(self) -> Dict:
         """
@@ -222,9 +322,9 @@ class PipelineOrchestrator:
         """
         last_orchestration = self.orchestration_history[-1] if self.orchestration_history else None
         
-        # Get connector status
+        # Get connector status (polled by the API and monitor loop; 10s-old is fine)
         try:
-            connector_status = self.fivetran_client.get_connector_status(self.connector_id)
+            connector_status = self.fivetran_client.get_connector_status(self.connector_id, ttl_ms=10_000)
         except Exception:
             connector_status = {"status": "unknown", "error": "Failed to fetch"}
         
@@ -234,13 +334,13 @@ class PipelineOrchestrator:
                 "schema_guardian": {
                     "name": "Schema Guardian",
                     "status": "operational",
-                    "last_check": last_orchestration.get("timestamp") if last_orchestration else None
+                    "last_check": last_orchestration.timestamp if last_orchestration else None
                 },
                 "anomaly_detective": {
                     "name": "Anomaly Detective",
                     "status": "operational",
                     "model": "gemini-2.0-flash-exp",
-                    "last_check": last_orchestration.get("timestamp") if last_orchestration else None
+                    "last_check": last_orchestration.timestamp if last_orchestration else None
                 }
             },
             "connector": {
@@ -249,28 +349,25 @@ class PipelineOrchestrator:
                 "paused": connector_status.get("paused", False)
             },
             "last_orchestration": {
-                "id": last_orchestration.get("orchestration_id") if last_orchestration else None,
-                "timestamp": last_orchestration.get("timestamp") if last_orchestration else None,
-                "action_taken": last_orchestration.get("decision", {}).get("action") if last_orchestration else None
+                "id": last_orchestration.orchestration_id if last_orchestration else None,
+                "timestamp": last_orchestration.timestamp if last_orchestration else None,
+                "action_taken": (last_orchestration.decision or {}).get("action") if last_orchestration else None
             },
             "metrics": {
-                "total_orchestrations": len(self.orchestration_history),
+                "total_orchestrations": self.total_orchestrations,
                 "decisions_made": len(self.decision_engine.decision_history),
                 "actions_executed": len(self.action_executor.action_history)
             }
         }
     
     def get_orchestration_history(self, limit: int = 10) -> list:
-        """Get recent orchestration history"""
-        return sorted(
-            self.orchestration_history,
-            key=lambda o: o["timestamp"],
-            reverse=True
-        )[:limit]
+        """Get recent orchestration history (newest first)"""
+        # Runs are appended in time order, so the newest are at the tail
+        return [r.to_dict() for r in islice(reversed(self.orchestration_history), limit)]
     
-    def get_decision_history(self, limit: int = 10) -> list:
-        """Get recent decision history from engine"""
-        return self.decision_engine.get_recent_decisions(limit)
+    def get_decision_history(self, limit: int = 10, cursor: Optional[str] = None) -> list:
+        """Get recent decision history from engine (see DecisionEngine.get_recent_decisions)"""
+        return self.decision_engine.get_recent_decisions(limit, cursor)
     
     def get_action_history(self, limit: int = 10) -> list:
         """Get recent action history from executor"""
@@ -283,7 +380,8 @@ class PipelineOrchestrator:
         Returns:
             Formatted summary string
         """
-        metrics = self.get_status()["metrics"]
+        status = self.get_status()
+        metrics = status["metrics"]
         recent_orchestrations = self.get_orchestration_history(limit=5)
         
         summary = f"""
@@ -291,7 +389,7 @@ PIPELINE ORCHESTRATOR SUMMARY
 {'=' * 60}
 
 System Status: {self.state}
-Connector: {'PAUSED' if self.get_status()['connector']['paused'] else 'RUNNING'}
+Connector: {'PAUSED' if status['connector']['paused'] else 'RUNNING'}
 
 Activity Metrics:
   • Total Orchestrations: {metrics['total_orchestrations']}
@@ -302,7 +400,7 @@ Recent Activity (last 5 runs):
 """
         
         for orch in recent_orchestrations:
-            decision = orch.get("decision", {})
+            decision = orch.get("decision") or {}  # None when the run failed early
             timestamp = orch.get("timestamp", "")
             action = decision.get("action", "NONE")
             priority = decision.get("priority", "N/A")
@@ -316,6 +414,7 @@ Recent Activity (last 5 runs):
 
 # Testing
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     print("\n" + "=" * 60)
     print("PIPELINE ORCHESTRATOR TEST")
     print("=" * 60 + "\n")
@@ -1,3 +1,4 @@
+import logging
 import os
 import time
 from dotenv import load_dotenv
@@ -26,9 +27,13 @@ def monitor_loop(interval_seconds: int = 300):
     
     print(f"🔍 Anomaly Detective started (checking every {interval_seconds}s)")
     
+    # Keep checks on a fixed cadence (sleep until the deadline, not for a full interval)
+    next_deadline = time.monotonic()
+    
     try:
         while True:
             check_count += 1
+            next_deadline += interval_seconds
             print(f"\n[Check #{check_count}] {time.strftime('%Y-%m-%d %H:%M:%S')}")
             
             result = detective.run_check()
@@ -42,13 +47,18 @@ def monitor_loop(interval_seconds: int = 300):
                     print(f"🚨 Anomalies detected (not stored - Firestore unavailable)")
                     print(f"   Summary: {result.get('summary', 'N/A')}")
             
-            time.sleep(interval_seconds)
+            sleep_for = next_deadline - time.monotonic()
+            if sleep_for > 0:
+                time.sleep(sleep_for)
+            else:
+                next_deadline = time.monotonic()  # Overran: check again now, re-anchor the schedule
             
     except KeyboardInterrupt:
         print(f"\n✅ Stopped after {check_count} checks")
 
 if __name__ == "__main__":
     import argparse
+    logging.basicConfig(level=os.getenv("OSPREY_LOG_LEVEL", "INFO"), format="%(message)s")
     parser = argparse.ArgumentParser()
     parser.add_argument("--interval", type=int, default=300)
     args = parser.parse_args()
@@ -5,12 +5,14 @@ Runs orchestration loop at configurable intervals.
 Monitors Schema Guardian + Anomaly Detective, makes decisions, executes actions.
 """
 
+import logging
 import os
+import signal
 import sys
 from pathlib import Path
 import time
 import argparse
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -44,12 +46,21 @@ def monitor_loop(
     
     iteration = 0
     
+    # Deadline scheduling: runs start every interval_seconds regardless of how
+    # long orchestrate() takes, instead of drifting by the work duration
+    next_deadline = time.monotonic()
+    
     try:
         while True:
             iteration += 1
+            next_deadline += interval_seconds
+            
+            # Wall-clock time of this run's start, paired with the monotonic deadline
+            started_at = datetime.now(timezone.utc)
+            started_mono = time.monotonic()
             
             print(f"\n{'='*60}")
-            print(f"ITERATION #{iteration} - {datetime.utcnow().isoformat()[:19]}Z")
+            print(f"ITERATION #{iteration} - {started_at:%Y-%m-%dT%H:%M:%S}Z")
             print(f"{'='*60}")
             
             # Run orchestration
@@ -77,11 +88,19 @@ def monitor_loop(
                 print(f"\n✅ Reached max iterations ({max_iterations})")
                 break
             
-            # Sleep until next check
-            print(f"\n💤 Sleeping for {interval_seconds} seconds...")
-            print(f"   Next check at: {datetime.utcnow().isoformat()[:19]}Z + {interval_seconds}s")
+            # Sleep until next check; an overrun starts the next one immediately
+            # and re-anchors the schedule rather than firing a burst of catch-ups
+            sleep_for = next_deadline - time.monotonic()
+            if sleep_for <= 0:
+                print(f"\n⏩ Run overran the {interval_seconds}s interval by {-sleep_for:.0f}s, starting next check now")
+                next_deadline = time.monotonic()
+                continue
+            
+            print(f"\n💤 Sleeping for {sleep_for:.0f} seconds...")
+            next_check_at = started_at + timedelta(seconds=next_deadline - started_mono)
+            print(f"   Next check at: {next_check_at:%Y-%m-%dT%H:%M:%S}Z")
             
-            time.sleep(interval_seconds)
+            time.sleep(sleep_for)
     
     except KeyboardInterrupt:
         print("\n\n⏹️  Orchestrator stopped by user (Ctrl+C)")
@@ -93,11 +112,20 @@ def monitor_loop(
         print("=" * 60)
         print(orchestrator.generate_summary())
         
+        # Flush pending quarantine writes and close HTTP/BigQuery connections
+        orchestrator.close()
+        
         print("\n👋 Orchestrator shut down gracefully")
 
 
 def main():
     """Parse arguments and run monitor loop"""
+    # Agent progress is logged at INFO; show it on the console like the loop's own output
+    logging.basicConfig(level=os.getenv("OSPREY_LOG_LEVEL", "INFO"), format="%(message)s")
+    
+    # Containers stop with SIGTERM; exit through monitor_loop's finally like Ctrl+C
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    
     parser = argparse.ArgumentParser(
         description="Run Pipeline Orchestrator in continuous monitoring mode"
     )
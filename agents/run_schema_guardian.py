@@ -3,6 +3,8 @@ import argparse
 import logging
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -11,10 +13,13 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from dotenv import load_dotenv
 load_dotenv()
 
-from agents.schema_guardian import SchemaGuardian
-from agents.agent_memory import AgentMemory
+# BigQuery/Firestore clients are imported in monitor_loop, after arguments are parsed
+if TYPE_CHECKING:
+    from agents.schema_guardian import SchemaGuardian
+    from agents.agent_memory import AgentMemory
 
-# Configure logging
+# Configure logging (create logs directory if it doesn't exist)
+os.makedirs('logs', exist_ok=True)
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -26,115 +31,185 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def monitor_loop(project_id: str, dataset_id: str, table_id: str, interval_seconds: int = 300, max_checks: int = None):
-    """Run schema monitoring loop"""
-    guardian = SchemaGuardian(project_id, dataset_id, table_id)
+# Upper bound on tables checked concurrently
+MAX_PARALLEL_CHECKS = 8
+
+
+def check_table(guardian: "SchemaGuardian", memory: "AgentMemory") -> dict:
+    """Run one drift check; store and return the alert, or None when the schema is stable"""
+    changes = guardian.detect_schema_drift()
+    
+    if not changes.has_changes:
+        logger.info("✅ %s: schema stable - no changes detected", guardian.table_id)
+        return None
+    
+    alert = guardian.generate_alert(changes)
+    logger.warning("🚨 Schema drift detected on %s! Severity: %s", guardian.table_id, alert['severity'])
+    logger.warning("Changes: %d", alert['change_count'])
+    
+    # Store alert
+    memory.store_alert(alert)
+    
+    # Log details
+    for change_type, change_list in alert['changes'].items():
+        if change_list:
+            logger.warning("  %s: %s", change_type, change_list)
+    
+    return alert
+
+
+def monitor_loop(project_id: str, dataset_id: str, table_ids, interval_seconds: int = 300, max_checks: int = None,
+                 max_interval_seconds: int = None):
+    """
+    Run schema monitoring loop for one or more tables
+    
+    All tables share one BigQuery client and are checked concurrently each
+    round. Rounds back off from interval_seconds to max_interval_seconds while
+    every schema is stable, measured from the start of the round.
+    
+    Args:
+        project_id: GCP project ID
+        dataset_id: BigQuery dataset
+        table_ids: Tables to monitor (list or comma-separated string)
+        interval_seconds: Interval while any table is drifting
+        max_checks: Rounds before stopping (None = infinite)
+        max_interval_seconds: Longest interval while stable (default: 8x interval_seconds)
+    """
+    from google.cloud import bigquery
+    from agents.schema_guardian import SchemaGuardian, schema_to_records
+    from agents.agent_memory import AgentMemory
+    
+    if isinstance(table_ids, str):
+        table_ids = [t.strip() for t in table_ids.split(",") if t.strip()]
+    max_interval_seconds = max(max_interval_seconds or interval_seconds * 8, interval_seconds)
+    
+    client = bigquery.Client(project=project_id)
     memory = AgentMemory(project_id)
     
-    logger.info(f"🛡️ Schema Guardian starting for {table_id}")
-    logger.info(f"📊 Check interval: {interval_seconds} seconds")
+    logger.info("🛡️ Schema Guardian starting for %s", ", ".join(table_ids))
+    logger.info("📊 Check interval: %d-%d seconds", interval_seconds, max_interval_seconds)
     
     # Initial baseline capture
-    try:
-        baseline = memory.get_schema_baseline(table_id)
-        if baseline is None:
-            logger.info("No baseline found. Capturing initial baseline...")
-            baseline = guardian.capture_baseline_schema()
-            memory.store_schema_baseline(table_id, baseline)
-        else:
-            logger.info(f"✅ Loaded baseline with {len(baseline)} columns")
-        
-        guardian.baseline_schema = baseline
-    except Exception as e:
-        logger.error(f"Failed to initialize baseline: {e}")
+    guardians = {}
+    for table_id in table_ids:
+        guardian = SchemaGuardian(project_id, dataset_id, table_id, client=client)
+        try:
+            baseline = memory.get_schema_baseline_raw(table_id)
+            if baseline is None:
+                logger.info("No baseline found for %s. Capturing initial baseline...", table_id)
+                baseline = guardian.capture_baseline_schema()
+                memory.store_schema_baseline_raw(table_id, schema_to_records(baseline))
+            else:
+                logger.info("✅ Loaded %s baseline with %d columns", table_id, len(baseline))
+            
+            guardian.baseline_schema = baseline  # Column dicts are converted by the setter
+        except Exception as e:
+            logger.error("Failed to initialize baseline for %s: %s", table_id, e)
+            continue
+        guardians[table_id] = guardian
+    
+    if not guardians:
+        client.close()
         return
     
     # Update agent status
     memory.update_agent_status('Schema Guardian', {
         'status': 'running',
-        'table': f"{project_id}.{dataset_id}.{table_id}",
+        'table': ", ".join(g.table_ref for g in guardians.values()),
         'interval_seconds': interval_seconds
     })
     
+    pool = ThreadPoolExecutor(max_workers=min(MAX_PARALLEL_CHECKS, len(guardians)))
+    
     # Monitoring loop
     check_count = 0
     start_time = time.time()
     
-    while True:
-        try:
-            check_count += 1
-            logger.info(f"🔍 Running check #{check_count}...")
-            
-            # Check if we've reached max checks
-            if max_checks and check_count > max_checks:
-                logger.info(f"✅ Completed {max_checks} checks. Stopping monitoring.")
-                break
-            
-            changes = guardian.detect_schema_drift()
-            
-            # Check if any changes detected
-            has_changes = any(
-                len(v) > 0 if isinstance(v, list) else False 
-                for v in changes.values() if not v == "error"
-            )
-            
-            if has_changes:
-                alert = guardian.generate_alert(changes)
-                logger.warning(f"🚨 Schema drift detected! Severity: {alert['severity']}")
-                logger.warning(f"Changes: {alert['change_count']}")
+    try:
+        while True:
+            try:
+                check_count += 1
+                logger.info("🔍 Running check #%d...", check_count)
                 
-                # Store alert
-                memory.store_alert(alert)
+                # Check if we've reached max checks
+                if max_checks and check_count > max_checks:
+                    logger.info("✅ Completed %d checks. Stopping monitoring.", max_checks)
+                    break
                 
-                # Log details
-                for change_type, change_list in changes.items():
-                    if change_list and isinstance(change_list, list):
-                        logger.warning(f"  {change_type}: {change_list}")
+                round_started = time.monotonic()
+                futures = {
+                    pool.submit(check_table, guardian, memory): table_id
+                    for table_id, guardian in guardians.items()
+                }
                 
-                # Update agent status with alert
-                memory.update_agent_status('Schema Guardian', {
-                    'status': 'alert',
-                    'last_alert': alert,
-                    'checks_performed': check_count
-                })
-            else:
-                logger.info("✅ Schema stable - no changes detected")
+                alerts = []
+                errors = []
+                for future in as_completed(futures):
+                    try:
+                        alert = future.result()
+                    except Exception as e:
+                        logger.error("Error checking %s: %s", futures[future], e, exc_info=True)
+                        errors.append(f"{futures[future]}: {e}")
+                        continue
+                    if alert:
+                        alerts.append(alert)
                 
-                # Update agent status
+                if errors:
+                    memory.update_agent_status('Schema Guardian', {
+                        'status': 'error',
+                        'last_error': "; ".join(errors)
+                    })
+                elif alerts:
+                    # Update agent status with alert
+                    memory.update_agent_status('Schema Guardian', {
+                        'status': 'alert',
+                        'last_alert': alerts[-1],
+                        'checks_performed': check_count
+                    })
+                else:
+                    # Update agent status
+                    memory.update_agent_status('Schema Guardian', {
+                        'status': 'running',
+                        'checks_performed': check_count,
+                        'uptime_seconds': int(time.time() - start_time)
+                    })
+                
+                for guardian in guardians.values():
+                    guardian._uptime = int(time.time() - start_time)
+                
+                # Next round follows the most active table, timed from this round's start
+                interval = min(
+                    g.next_check_interval(interval_seconds, max_interval_seconds) for g in guardians.values()
+                )
+                time.sleep(max(0, interval - (time.monotonic() - round_started)))
+                
+            except KeyboardInterrupt:
+                logger.info("🛑 Monitoring stopped by user")
+                memory.update_agent_status('Schema Guardian', {'status': 'stopped'})
+                break
+            except Exception as e:
+                logger.error("Error in monitoring loop: %s", e, exc_info=True)
                 memory.update_agent_status('Schema Guardian', {
-                    'status': 'running',
-                    'checks_performed': check_count,
-                    'uptime_seconds': int(time.time() - start_time)
+                    'status': 'error',
+                    'last_error': str(e)
                 })
-            
-            guardian._uptime = int(time.time() - start_time)
-            
-            time.sleep(interval_seconds)
-            
-        except KeyboardInterrupt:
-            logger.info("🛑 Monitoring stopped by user")
-            memory.update_agent_status('Schema Guardian', {'status': 'stopped'})
-            break
-        except Exception as e:
-            logger.error(f"Error in monitoring loop: {e}", exc_info=True)
-            memory.update_agent_status('Schema Guardian', {
-                'status': 'error',
-                'last_error': str(e)
-            })
-            time.sleep(60)  # Wait 1 min before retry
+                time.sleep(60)  # Wait 1 min before retry
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+        client.close()
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Schema Guardian - Monitor BigQuery schema changes')
     parser.add_argument('--project', required=True, help='GCP Project ID')
     parser.add_argument('--dataset', required=True, help='BigQuery dataset')
-    parser.add_argument('--table', required=True, help='Table to monitor')
-    parser.add_argument('--interval', type=int, default=300, help='Check interval in seconds (default: 300)')
+    tables = parser.add_mutually_exclusive_group(required=True)
+    tables.add_argument('--table', help='Table to monitor')
+    tables.add_argument('--tables', help='Comma-separated tables to monitor concurrently')
+    parser.add_argument('--min-interval', '--interval', dest='interval', type=int, default=300, help='Check interval in seconds (default: 300)')
+    parser.add_argument('--max-interval', type=int, default=None, help='Longest interval while the schema is stable (default: 8x --min-interval)')
     parser.add_argument('--max-checks', type=int, default=None, help='Maximum number of checks before stopping (default: infinite)')
     
     args = parser.parse_args()
     
-    # Create logs directory if it doesn't exist
-    os.makedirs('logs', exist_ok=True)
-    
-    monitor_loop(args.project, args.dataset, args.table, args.interval, args.max_checks)
+    monitor_loop(args.project, args.dataset, args.tables or args.table, args.interval, args.max_checks, args.max_interval)
@@ -13,8 +13,6 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from dotenv import load_dotenv
 load_dotenv()
 
-from agents.schema_guardian import SchemaGuardian
-
 # Configure logging with UTF-8 encoding
 logging.basicConfig(
     level=logging.INFO,
@@ -36,18 +34,23 @@ for handler in logger.handlers:
     handler.setFormatter(SimpleFormatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
 
 
-def monitor_loop(project_id: str, dataset_id: str, table_id: str, interval_seconds: int = 300, max_checks: int = None):
-    """Run schema monitoring loop with local JSON storage"""
+def monitor_loop(project_id: str, dataset_id: str, table_id: str, interval_seconds: int = 300, max_checks: int = None,
+                 max_interval_seconds: int = None):
+    """Run schema monitoring loop with local JSON storage (backs off while the schema is stable)"""
+    # Imported here, after arguments are parsed, to keep CLI startup fast
+    from agents.schema_guardian import SchemaGuardian, schema_from_records, schema_to_records
+    
+    max_interval_seconds = max(max_interval_seconds or interval_seconds * 8, interval_seconds)
     guardian = SchemaGuardian(project_id, dataset_id, table_id)
     
     # Use local storage instead of Firestore
     storage_dir = Path("storage")
     storage_dir.mkdir(exist_ok=True)
     baseline_file = storage_dir / f"baseline_{table_id}.json"
-    alerts_file = storage_dir / "alerts.json"
+    alerts_file = storage_dir / "alerts.jsonl"  # One alert per line, appended
     
-    logger.info(f"Schema Guardian starting for {table_id}")
-    logger.info(f"Check interval: {interval_seconds} seconds")
+    logger.info("Schema Guardian starting for %s", table_id)
+    logger.info("Check interval: %d-%d seconds", interval_seconds, max_interval_seconds)
     
     # Initial baseline capture
     try:
@@ -55,9 +58,8 @@ def monitor_loop(project_id: str, dataset_id: str, table_id: str, interval_secon
             logger.info("Loading existing baseline...")
             with open(baseline_file, 'r') as f:
                 baseline_data = json.load(f)
-            import pandas as pd
-            baseline = pd.DataFrame(baseline_data['columns'])
-            logger.info(f"Loaded baseline with {len(baseline)} columns")
+            baseline = schema_from_records(baseline_data['columns'])
+            logger.info("Loaded baseline with %d columns", len(baseline))
         else:
             logger.info("No baseline found. Capturing initial baseline...")
             baseline = guardian.capture_baseline_schema()
@@ -66,21 +68,21 @@ def monitor_loop(project_id: str, dataset_id: str, table_id: str, interval_secon
             with open(baseline_file, 'w') as f:
                 json.dump({
                     'table': table_id,
-                    'columns': baseline.to_dict('records'),
+                    'columns': schema_to_records(baseline),
                     'captured_at': time.time()
                 }, f, indent=2)
-            logger.info(f"Saved baseline with {len(baseline)} columns")
+            logger.info("Saved baseline with %d columns", len(baseline))
         
         guardian.baseline_schema = baseline
     except Exception as e:
-        logger.error(f"Failed to initialize baseline: {e}")
+        logger.error("Failed to initialize baseline: %s", e)
         return
     
-    # Load existing alerts
-    alerts = []
+    # Count existing alerts (history is only appended to, never re-read)
+    alert_count = 0
     if alerts_file.exists():
         with open(alerts_file, 'r') as f:
-            alerts = json.load(f)
+            alert_count = sum(1 for _ in f)
     
     # Monitoring loop
     check_count = 0
@@ -89,57 +91,52 @@ def monitor_loop(project_id: str, dataset_id: str, table_id: str, interval_secon
     while True:
         try:
             check_count += 1
-            logger.info(f"Running check #{check_count}...")
+            logger.info("Running check #%d...", check_count)
             
             # Check if we've reached max checks
             if max_checks and check_count > max_checks:
-                logger.info(f"Completed {max_checks} checks. Stopping monitoring.")
+                logger.info("Completed %d checks. Stopping monitoring.", max_checks)
                 break
             
             changes = guardian.detect_schema_drift()
             
-            # Check if any changes detected
-            has_changes = any(
-                len(v) > 0 if isinstance(v, list) else False 
-                for v in changes.values() if v != "error"
-            )
-            
-            if has_changes:
+            if changes.has_changes:
                 alert = guardian.generate_alert(changes)
-                logger.warning(f"Schema drift detected! Severity: {alert['severity']}")
-                logger.warning(f"Changes: {alert['change_count']}")
+                logger.warning("Schema drift detected! Severity: %s", alert['severity'])
+                logger.warning("Changes: %d", alert['change_count'])
                 
                 # Store alert locally
-                alerts.append(alert)
-                with open(alerts_file, 'w') as f:
-                    json.dump(alerts, f, indent=2)
+                with open(alerts_file, 'a') as f:
+                    f.write(json.dumps(alert) + '\n')
+                alert_count += 1
                 
                 # Log details
-                for change_type, change_list in changes.items():
-                    if change_list and isinstance(change_list, list):
-                        logger.warning(f"  {change_type}: {change_list}")
+                for change_type, change_list in alert['changes'].items():
+                    if change_list:
+                        logger.warning("  %s: %s", change_type, change_list)
             else:
-                logger.info(f"Schema stable - no changes detected (uptime: {int(time.time() - start_time)}s)")
+                logger.info("Schema stable - no changes detected (uptime: %ds)", time.time() - start_time)
             
             # Display metrics
             metrics = guardian.get_metrics()
-            logger.info(f"Metrics: Checks={check_count}, Alerts={len(alerts)}")
+            logger.info("Metrics: Checks=%d, Alerts=%d", check_count, alert_count)
             
             if check_count < (max_checks or float('inf')):
-                logger.info(f"Next check in {interval_seconds} seconds...")
-                time.sleep(interval_seconds)
+                sleep_for = guardian.next_check_interval(interval_seconds, max_interval_seconds)
+                logger.info("Next check in %.0f seconds...", sleep_for)
+                time.sleep(sleep_for)
             
         except KeyboardInterrupt:
             logger.info("Monitoring stopped by user")
             break
         except Exception as e:
-            logger.error(f"Error in monitoring loop: {e}", exc_info=True)
+            logger.error("Error in monitoring loop: %s", e, exc_info=True)
             time.sleep(60)  # Wait 1 min before retry
     
-    logger.info(f"=== MONITORING COMPLETE ===")
-    logger.info(f"Total checks: {check_count}")
-    logger.info(f"Total alerts: {len(alerts)}")
-    logger.info(f"Uptime: {int(time.time() - start_time)} seconds")
+    logger.info("=== MONITORING COMPLETE ===")
+    logger.info("Total checks: %d", check_count)
+    logger.info("Total alerts: %d", alert_count)
+    logger.info("Uptime: %d seconds", time.time() - start_time)
 
 
 if __name__ == "__main__":
@@ -147,9 +144,10 @@ if __name__ == "__main__":
     parser.add_argument('--project', required=True, help='GCP Project ID')
     parser.add_argument('--dataset', required=True, help='BigQuery dataset')
     parser.add_argument('--table', required=True, help='Table to monitor')
-    parser.add_argument('--interval', type=int, default=300, help='Check interval in seconds (default: 300)')
+    parser.add_argument('--min-interval', '--interval', dest='interval', type=int, default=300, help='Check interval in seconds (default: 300)')
+    parser.add_argument('--max-interval', type=int, default=None, help='Longest interval while the schema is stable (default: 8x --min-interval)')
     parser.add_argument('--max-checks', type=int, default=None, help='Maximum number of checks before stopping (default: infinite)')
     
     args = parser.parse_args()
     
-    monitor_loop(args.project, args.dataset, args.table, args.interval, args.max_checks)
+    monitor_loop(args.project, args.dataset, args.table, args.interval, args.max_checks, args.max_interval)
@@ -1,23 +1,197 @@
-from google.cloud import bigquery
 from google.api_core import retry
 import google.api_core.exceptions
+from dataclasses import dataclass, field
 from datetime import datetime
-import pandas as pd
+from typing import TYPE_CHECKING, Dict, Iterable, List, NamedTuple, Optional, Union
 import json
 import logging
+import random
 
 logger = logging.getLogger(__name__)
 
+# google-cloud-bigquery is imported where it's used, so CLI scripts start (and
+# fail on bad arguments) without paying for it
+if TYPE_CHECKING:
+    from google.cloud import bigquery
+
+
+class SchemaColumn(NamedTuple):
+    """One column of a schema snapshot (INFORMATION_SCHEMA.COLUMNS values)"""
+    data_type: str
+    is_nullable: str
+    is_partitioning_column: str
+    ordinal_position: int
+
+
+# A schema snapshot: column_name -> SchemaColumn, in ordinal order
+Schema = Dict[str, SchemaColumn]
+
+
+def schema_from_records(records: Iterable[dict]) -> Schema:
+    """Build a snapshot from column dicts (Firestore/JSON baselines; extra keys are ignored)"""
+    return {
+        record['column_name']: SchemaColumn(
+            record['data_type'],
+            record['is_nullable'],
+            record['is_partitioning_column'],
+            record['ordinal_position']
+        )
+        for record in records
+    }
+
+
+def schema_to_records(schema: Schema) -> List[dict]:
+    """Column dicts for storing a snapshot (inverse of schema_from_records)"""
+    return [{'column_name': name, **column._asdict()} for name, column in schema.items()]
+
+
+# Table-metadata (legacy SQL) type names -> INFORMATION_SCHEMA data_type
+_STANDARD_SQL_TYPES = {
+    "INTEGER": "INT64", "INT64": "INT64",
+    "FLOAT": "FLOAT64", "FLOAT64": "FLOAT64",
+    "BOOLEAN": "BOOL", "BOOL": "BOOL",
+    "NUMERIC": "NUMERIC", "DECIMAL": "NUMERIC",
+    "BIGNUMERIC": "BIGNUMERIC", "BIGDECIMAL": "BIGNUMERIC",
+    "STRING": "STRING", "BYTES": "BYTES", "DATE": "DATE", "DATETIME": "DATETIME",
+    "TIME": "TIME", "TIMESTAMP": "TIMESTAMP", "GEOGRAPHY": "GEOGRAPHY",
+    "JSON": "JSON", "INTERVAL": "INTERVAL"
+}
+
+
+def _schema_from_table(table) -> Optional[Schema]:
+    """
+    Snapshot from a tables.get response, in INFORMATION_SCHEMA terms
+    
+    Returns None when the metadata can't be rendered exactly like
+    INFORMATION_SCHEMA.COLUMNS (nested/repeated or parameterized columns,
+    ingestion-time partitioning pseudo-columns); callers then query it instead,
+    so stored baselines never see spurious type changes.
+    """
+    if not table.schema:
+        return None
+    
+    if table.time_partitioning is not None:
+        partition_field = table.time_partitioning.field
+        if partition_field is None:
+            return None  # Ingestion-time: _PARTITIONTIME only shows up in INFORMATION_SCHEMA
+    elif table.range_partitioning is not None:
+        partition_field = table.range_partitioning.field
+    else:
+        partition_field = None
+    
+    schema = {}
+    for position, column in enumerate(table.schema, start=1):
+        data_type = _STANDARD_SQL_TYPES.get(column.field_type)
+        if (
+            data_type is None or column.mode == "REPEATED"
+            or column.max_length is not None or column.precision is not None
+        ):
+            return None
+        schema[column.name] = SchemaColumn(
+            data_type,
+            "NO" if column.mode == "REQUIRED" else "YES",
+            "YES" if column.name == partition_field else "NO",
+            position
+        )
+    return schema
+
+
+# Bit per change category, most severe first
+_CHANGE_MASK = {
+    "type_changes": 16,         # CRITICAL: data type changes break downstream queries
+    "removed_columns": 8,       # HIGH: removed columns cause query failures
+    "partition_changes": 4,     # HIGH: partition changes affect performance
+    "nullability_changes": 2,   # MEDIUM: may cause NULL handling issues
+    "new_columns": 1            # LOW: generally safe, may need schema updates
+}
+_SEVERITY_BY_BIT = {16: "CRITICAL", 8: "HIGH", 4: "HIGH", 2: "MEDIUM", 1: "LOW"}
+
+# Severity for every combination of categories: the most severe one present wins
+_SEVERITY_BY_MASK = ["INFO"] + [_SEVERITY_BY_BIT[1 << (mask.bit_length() - 1)] for mask in range(1, 32)]
+
+
+@dataclass(slots=True)
+class SchemaDiff:
+    """Result of one detect_schema_drift() call (slotted, one list per change category)"""
+    new_columns: List[str] = field(default_factory=list)
+    removed_columns: List[str] = field(default_factory=list)
+    type_changes: List[Dict] = field(default_factory=list)
+    nullability_changes: List[Dict] = field(default_factory=list)
+    partition_changes: List[Dict] = field(default_factory=list)
+    
+    @classmethod
+    def from_dict(cls, changes: Dict) -> "SchemaDiff":
+        """Build from the dict form (missing categories are empty)"""
+        return cls(**{key: list(changes.get(key) or ()) for key in _CHANGE_MASK})
+    
+    @property
+    def has_changes(self) -> bool:
+        return bool(
+            self.new_columns or self.removed_columns or self.type_changes
+            or self.nullability_changes or self.partition_changes
+        )
+    
+    @property
+    def severity_mask(self) -> int:
+        """Bitmask of the non-empty categories (see _CHANGE_MASK)"""
+        return (
+            (16 if self.type_changes else 0) | (8 if self.removed_columns else 0)
+            | (4 if self.partition_changes else 0) | (2 if self.nullability_changes else 0)
+            | (1 if self.new_columns else 0)
+        )
+    
+    @property
+    def change_count(self) -> int:
+        return (
+            len(self.new_columns) + len(self.removed_columns) + len(self.type_changes)
+            + len(self.nullability_changes) + len(self.partition_changes)
+        )
+    
+    def copy(self) -> "SchemaDiff":
+        """Copy with fresh lists, so callers can't mutate a cached result"""
+        return SchemaDiff(
+            list(self.new_columns), list(self.removed_columns), list(self.type_changes),
+            list(self.nullability_changes), list(self.partition_changes)
+        )
+    
+    def to_dict(self) -> Dict:
+        """Dict view for alerts, JSON and Firestore"""
+        return {
+            "new_columns": self.new_columns,
+            "removed_columns": self.removed_columns,
+            "type_changes": self.type_changes,
+            "nullability_changes": self.nullability_changes,
+            "partition_changes": self.partition_changes
+        }
+
+
+def _as_diff(changes: Union[SchemaDiff, Dict]) -> SchemaDiff:
+    """Accept a SchemaDiff or its dict form (hand-built scenarios, stored alerts)"""
+    return changes if isinstance(changes, SchemaDiff) else SchemaDiff.from_dict(changes)
+
 
 class SchemaGuardian:
-    def __init__(self, project_id: str, dataset_id: str, table_id: str, region: str = "us"):
-        self.client = bigquery.Client(project=project_id)
+    def __init__(self, project_id: str, dataset_id: str, table_id: str, region: str = "us",
+                 client: "bigquery.Client" = None):
+        if client is None:
+            from google.cloud import bigquery
+            client = bigquery.Client(project=project_id)
+        self.client = client
         self.project_id = project_id
         self.dataset_id = dataset_id
         self.table_id = table_id
         self.region = region
         self.table_ref = f"{project_id}.{dataset_id}.{table_id}"
-        self.baseline_schema = None
+        self._baseline_schema = None
+        
+        # Table modification time and baseline seen by the last full diff, and
+        # its result; reused while neither has changed
+        self._last_modified = None
+        self._last_diff_baseline = None
+        self._last_changes = None
+        
+        # Consecutive checks without drift (drives next_check_interval)
+        self._no_change_streak = 0
         
         # Metrics
         self._check_count = 0
@@ -35,8 +209,8 @@ class SchemaGuardian:
         multiplier=2.0,
         deadline=300.0
     )
-    def capture_baseline_schema(self) -> pd.DataFrame:
-        """Capture current schema as baseline - run this once on first setup"""
+    def _query_schema(self) -> Schema:
+        """Fetch the table's current columns with an INFORMATION_SCHEMA query (fallback for _fetch_schema)"""
         query = f"""
         SELECT 
             table_name,
@@ -47,141 +221,230 @@ class SchemaGuardian:
             is_partitioning_column,
             clustering_ordinal_position
         FROM `{self.project_id}.{self.dataset_id}.INFORMATION_SCHEMA.COLUMNS`
-        WHERE table_name = '{self.table_id}'
+        WHERE table_name = @table_id
         ORDER BY ordinal_position
         """
+        from google.cloud import bigquery
+        
+        # The table name is bound as a parameter, not spliced into the SQL
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[bigquery.ScalarQueryParameter("table_id", "STRING", self.table_id)],
+            use_query_cache=True
+        )
         
         logger.info(f"Capturing schema for {self.table_ref}")
-        schema_df = self.client.query(query).to_dataframe()
-        logger.info(f"Captured {len(schema_df)} columns")
+        # A few dozen rows: iterate them directly rather than building a DataFrame
+        schema = {
+            row.column_name: SchemaColumn(
+                row.data_type, row.is_nullable, row.is_partitioning_column, row.ordinal_position
+            )
+            for row in self.client.query(query, job_config=job_config).result()
+        }
+        logger.info(f"Captured {len(schema)} columns")
+        return schema
+    
+    def _fetch_schema(self, table=None) -> Schema:
+        """
+        Current columns of the table (does not touch the baseline)
+        
+        Read from the table's metadata (tables.get: no query job, no slot
+        time); falls back to INFORMATION_SCHEMA when the metadata call fails
+        or can't be mapped exactly (see _schema_from_table).
+        
+        Args:
+            table: Table already fetched with client.get_table, if any
+        """
+        if table is None:
+            try:
+                table = self.client.get_table(self.table_ref)
+            except google.api_core.exceptions.GoogleAPICallError as e:
+                logger.warning(f"Table metadata unavailable for {self.table_ref} ({e}); querying INFORMATION_SCHEMA")
+                return self._query_schema()
         
-        # Critical: Store in both memory and Firestore
-        self.baseline_schema = schema_df
-        return schema_df
+        schema = _schema_from_table(table)
+        if schema is None:
+            return self._query_schema()
+        return schema
     
-    def detect_schema_drift(self) -> dict:
-        """Compare current schema against baseline"""
-        current_schema = self.capture_baseline_schema()
+    @property
+    def baseline_schema(self) -> Schema:
+        """Baseline snapshot (column_name -> SchemaColumn), or None before one is captured"""
+        return self._baseline_schema
+    
+    @baseline_schema.setter
+    def baseline_schema(self, baseline):
+        # Stored baselines come back as column dicts (or a DataFrame of them)
+        if baseline is not None and not isinstance(baseline, dict):
+            if hasattr(baseline, 'to_dict'):
+                baseline = baseline.to_dict('records')
+            baseline = schema_from_records(baseline)
+        self._baseline_schema = baseline
+    
+    def capture_baseline_schema(self) -> Schema:
+        """Capture current schema as baseline - run this once on first setup"""
+        schema = self._fetch_schema()
         
+        # Critical: Store in both memory and Firestore (see schema_to_records)
+        self.baseline_schema = schema
+        return schema
+    
+    def detect_schema_drift(self) -> SchemaDiff:
+        """
+        Compare current schema against baseline
+        
+        One tables.get call provides both the table's modification time and
+        its columns; while the modification time and the baseline are
+        unchanged, the previous result is returned as is. If tables.get fails,
+        the schema comes from the (retried) INFORMATION_SCHEMA query and the
+        full diff always runs. Without a baseline, the current schema is
+        captured as the baseline.
+        """
+        try:
+            table = self.client.get_table(self.table_ref)
+        except google.api_core.exceptions.GoogleAPICallError as e:
+            logger.warning(f"Table metadata unavailable for {self.table_ref} ({e}); querying INFORMATION_SCHEMA")
+            table = None
+        modified = table.modified if table is not None else None
+        
+        if (
+            self.baseline_schema is not None
+            and self._last_changes is not None
+            and modified is not None
+            and modified == self._last_modified
+            and self.baseline_schema is self._last_diff_baseline
+        ):
+            return self._finish_check(self._last_changes)
+        
+        current_schema = self._fetch_schema(table) if table is not None else self._query_schema()
         if self.baseline_schema is None:
-            return {"error": "No baseline schema found. Run capture_baseline_schema() first."}
-        
-        changes = {
-            "new_columns": [],
-            "removed_columns": [],
-            "type_changes": [],
-            "nullability_changes": [],
-            "partition_changes": []
-        }
+            self.baseline_schema = current_schema
         
-        # Convert to sets for comparison
-        baseline_cols = set(self.baseline_schema['column_name'])
-        current_cols = set(current_schema['column_name'])
+        baseline = self.baseline_schema
         
-        # Detect new/removed columns
-        changes["new_columns"] = list(current_cols - baseline_cols)
-        changes["removed_columns"] = list(baseline_cols - current_cols)
+        # Detect new/removed columns (dict key order keeps them in ordinal order)
+        changes = SchemaDiff(
+            new_columns=[col for col in current_schema if col not in baseline],
+            removed_columns=[col for col in baseline if col not in current_schema]
+        )
         
         # Check existing columns for modifications
-        common_cols = baseline_cols & current_cols
-        for col in common_cols:
-            baseline_row = self.baseline_schema[self.baseline_schema['column_name'] == col].iloc[0]
-            current_row = current_schema[current_schema['column_name'] == col].iloc[0]
+        for col, old in baseline.items():
+            new = current_schema.get(col)
+            if new is None or new == old:
+                continue
             
             # Type change detection (CRITICAL severity)
-            if baseline_row['data_type'] != current_row['data_type']:
-                changes["type_changes"].append({
+            if old.data_type != new.data_type:
+                changes.type_changes.append({
                     "column": col,
-                    "from": baseline_row['data_type'],
-                    "to": current_row['data_type']
+                    "from": old.data_type,
+                    "to": new.data_type
                 })
             
             # Nullability change
-            if baseline_row['is_nullable'] != current_row['is_nullable']:
-                changes["nullability_changes"].append({
+            if old.is_nullable != new.is_nullable:
+                changes.nullability_changes.append({
                     "column": col,
-                    "from": baseline_row['is_nullable'],
-                    "to": current_row['is_nullable']
+                    "from": old.is_nullable,
+                    "to": new.is_nullable
                 })
             
             # Partition column change
-            if baseline_row['is_partitioning_column'] != current_row['is_partitioning_column']:
-                changes["partition_changes"].append({
+            if old.is_partitioning_column != new.is_partitioning_column:
+                changes.partition_changes.append({
                     "column": col,
-                    "changed_to_partition": current_row['is_partitioning_column'] == 'YES'
+                    "changed_to_partition": new.is_partitioning_column == 'YES'
                 })
         
+        self._last_modified = modified
+        self._last_diff_baseline = self.baseline_schema
+        self._last_changes = changes
+        return self._finish_check(changes)
+    
+    def _finish_check(self, changes: SchemaDiff) -> SchemaDiff:
+        """Record a completed check and return a copy of its changes"""
         self._check_count += 1
         self._last_check = datetime.utcnow().isoformat()
+        self._no_change_streak = 0 if changes.has_changes else self._no_change_streak + 1
+        return changes.copy()
+    
+    def next_check_interval(self, min_interval: float, max_interval: float) -> float:
+        """
+        Seconds to wait before the next check
+        
+        The interval doubles after every 3 consecutive checks without drift (at
+        most 32x) and is capped at max_interval; any drift resets it to
+        min_interval. Up to 10% jitter keeps guardians sharing a project from
+        polling in lockstep.
         
-        return changes
+        Args:
+            min_interval: Interval while drift is present or was just seen
+            max_interval: Upper bound for a quiet table
+        
+        Returns:
+            Sleep duration in seconds
+        """
+        interval = min(max_interval, min_interval * 2 ** min(self._no_change_streak // 3, 5))
+        return interval + random.uniform(0, 0.1 * interval)
     
-    def _calculate_severity(self, changes: dict) -> str:
+    def _calculate_severity(self, changes: Union[SchemaDiff, Dict]) -> str:
         """Rule-based severity calculation"""
-        if changes.get("type_changes"):
-            return "CRITICAL"  # Data type changes break downstream queries
-        elif changes.get("removed_columns"):
-            return "HIGH"  # Removed columns cause query failures
-        elif changes.get("partition_changes"):
-            return "HIGH"  # Partition changes affect performance
-        elif changes.get("nullability_changes"):
-            return "MEDIUM"  # May cause NULL handling issues
-        elif changes.get("new_columns"):
-            return "LOW"  # Generally safe, may need schema updates
-        else:
-            return "INFO"
-    
-    def _analyze_impact(self, changes: dict) -> str:
+        return _SEVERITY_BY_MASK[_as_diff(changes).severity_mask]
+    
+    def _analyze_impact(self, changes: Union[SchemaDiff, Dict]) -> str:
         """Generate human-readable impact description"""
+        changes = _as_diff(changes)
         impacts = []
         
-        if changes.get("type_changes"):
+        if changes.type_changes:
             impacts.append("⚠️ Type changes will break queries expecting previous types")
             impacts.append("📊 Dashboards may show incorrect data")
         
-        if changes.get("removed_columns"):
+        if changes.removed_columns:
             impacts.append("❌ Queries referencing removed columns will fail")
             impacts.append("🔧 ETL pipelines need immediate updates")
         
-        if changes.get("new_columns"):
+        if changes.new_columns:
             impacts.append("✅ New columns detected - no immediate impact")
             impacts.append("📝 Consider updating documentation")
         
         return " | ".join(impacts) if impacts else "No significant impact detected"
     
-    def _generate_recommendations(self, changes: dict) -> list:
+    def _generate_recommendations(self, changes: Union[SchemaDiff, Dict]) -> list:
         """Actionable recommendations"""
+        changes = _as_diff(changes)
         recs = []
         
-        if changes.get("type_changes"):
+        if changes.type_changes:
             recs.append("Pause Fivetran connector immediately")
             recs.append("Review source data for type inconsistencies")
             recs.append("Update downstream transformations")
         
-        if changes.get("removed_columns"):
+        if changes.removed_columns:
             recs.append("Check Fivetran connector configuration")
             recs.append("Verify source API hasn't changed")
             recs.append("Update dependent queries and views")
         
-        if changes.get("new_columns"):
+        if changes.new_columns:
             recs.append("Document new column purpose")
             recs.append("Update schema documentation")
         
         return recs
     
-    def generate_alert(self, changes: dict) -> dict:
-        """Create structured alert from changes"""
-        severity = self._calculate_severity(changes)
+    def generate_alert(self, changes: Union[SchemaDiff, Dict]) -> dict:
+        """Create structured alert from changes (a SchemaDiff or its dict form)"""
+        changes = _as_diff(changes)
+        severity = _SEVERITY_BY_MASK[changes.severity_mask]
         
         alert = {
             "agent": "Schema Guardian",
             "timestamp": datetime.utcnow().isoformat(),
             "table": self.table_ref,
             "severity": severity,
-            "changes": changes,
+            "changes": changes.to_dict(),
             "impact_analysis": self._analyze_impact(changes),
             "recommendations": self._generate_recommendations(changes),
-            "change_count": sum(len(v) if isinstance(v, list) else 0 for v in changes.values())
+            "change_count": changes.change_count
         }
         
         self._alert_count += 1
@@ -5,9 +5,50 @@ Production-ready with comprehensive error handling
 """
 from fivetran_connector_sdk import Connector, Logging as log, Operations as op
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
 import hashlib
 from datetime import datetime, timezone, timedelta
-import json
+import orjson
+import re
+from functools import lru_cache
+
+# Concurrent per-ticker NewsAPI requests (matches the session pool size)
+MAX_PARALLEL_FETCHES = 4
+
+# Persistent session: reuses the TCP/TLS connection to NewsAPI across syncs.
+# 429 is not retried - on NewsAPI it means the daily quota is spent.
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=4,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=1,
+        status_forcelist=[500, 502, 503, 504],
+        raise_on_status=False  # Let fetch_newsapi_data report the final status
+    )
+))
+
+# Sentiment keywords
+POSITIVE_KEYWORDS = [
+    "surge", "gain", "rise", "rally", "profit", "beat", "exceed",
+    "growth", "strong", "record", "upgrade", "bullish", "optimistic",
+    "boost", "soar", "jump", "positive", "advance"
+]
+
+NEGATIVE_KEYWORDS = [
+    "fall", "drop", "decline", "loss", "miss", "plunge", "crash",
+    "weak", "disappointing", "downgrade", "bearish", "pessimistic",
+    "concern", "worry", "risk", "threat", "negative", "struggle"
+]
+
+# One pass over the text per list. Like the original `keyword in text` checks,
+# keywords match anywhere, mid-word included ("outgained"); the lookahead finds
+# overlapping keywords too, so sentiment_score values are unchanged
+_POSITIVE_RE = re.compile(r"(?=(" + "|".join(POSITIVE_KEYWORDS) + "))", re.IGNORECASE)
+_NEGATIVE_RE = re.compile(r"(?=(" + "|".join(NEGATIVE_KEYWORDS) + "))", re.IGNORECASE)
 
 def schema(configuration: dict):
     """Define BigQuery schema for raw_news table"""
@@ -48,7 +89,7 @@ def update(configuration: dict, state: dict):
         raise ValueError("api_key is required in configuration")
     
     log.info(f"📊 Fetching news for tickers: {tickers}")
-    log.info(f"📈 Request limit: {articles_limit} articles")
+    log.info(f"📈 Request limit: {articles_limit} articles per ticker")
     
     try:
         # Fetch news from NewsAPI
@@ -67,25 +108,31 @@ def update(configuration: dict, state: dict):
         
         log.info(f"✅ Fetched {len(articles)} articles from API")
         
-        # Process and upsert each article
-        synced_count = 0
+        # One sync timestamp for the whole batch
+        synced_at_iso = datetime.now(timezone.utc).isoformat()
+        
+        # Transform every article first so one bad article only skips itself;
+        # records are keyed by article_id, so a URL returned twice is written once
+        records = {}
         errors_count = 0
         
         for article in articles:
             try:
-                record = transform_article(article, tickers)
-                
-                # Upsert to raw_news table
-                op.upsert(
-                    table="raw_news",
-                    data=record
-                )
-                synced_count += 1
-                
+                record = transform_article(article, tickers, synced_at_iso)
+                records[record["article_id"]] = record
             except Exception as e:
                 errors_count += 1
                 log.warning(f"⚠️ Failed to process article: {str(e)}")
-                continue
+        
+        # Upsert to raw_news table (the SDK takes one row per operation)
+        synced_count = 0
+        for record in records.values():
+            try:
+                op.upsert(table="raw_news", data=record)
+                synced_count += 1
+            except Exception as e:
+                errors_count += 1
+                log.warning(f"⚠️ Failed to upsert article {record['article_id']}: {str(e)}")
         
         log.info(f"✅ Successfully synced {synced_count} articles")
         
@@ -94,7 +141,7 @@ def update(configuration: dict, state: dict):
         
         # Update state with metrics
         new_state = {
-            "last_sync": datetime.now(timezone.utc).isoformat(),
+            "last_sync": synced_at_iso,
             "total_synced": state.get("total_synced", 0) + synced_count,
             "last_article_count": synced_count,
             "last_error_count": errors_count
@@ -110,26 +157,64 @@ def update(configuration: dict, state: dict):
         raise
 
 def fetch_newsapi_data(api_key: str, tickers: str, limit: int):
-    """Fetch financial news from NewsAPI"""
+    """Fetch financial news from NewsAPI
     
-    # Build search query for financial news about tickers
-    # NewsAPI supports OR operators
-    ticker_list = [t.strip() for t in tickers.split(",")]
-    query_parts = []
+    Each ticker gets its own query (up to `limit` articles each, so one busy
+    ticker can't crowd out the rest); the requests run concurrently and the
+    results are merged, newest first, with duplicate URLs dropped. Costs one
+    NewsAPI request per ticker.
+    """
+    ticker_queries = _ticker_queries(tickers)
     
-    for ticker in ticker_list:
-        # Search for ticker symbol and company-related terms
-        query_parts.append(f'"{ticker}"')
+    # Calculate date range (last 7 days for more relevant news)
+    to_date = datetime.now(timezone.utc)
+    from_date = to_date - timedelta(days=7)
     
-    query = f"({' OR '.join(query_parts)}) AND (stock OR shares OR trading OR earnings OR market)"
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_PARALLEL_FETCHES, len(ticker_queries)))) as pool:
+        futures = [
+            pool.submit(fetch_ticker_news, api_key, ticker, query, from_date, to_date, limit)
+            for ticker, query in ticker_queries
+        ]
+    
+    articles_by_url = {}
+    errors = []
+    for (ticker, _), future in zip(ticker_queries, futures):
+        try:
+            ticker_articles = future.result()
+        except Exception as e:
+            log.warning(f"⚠️ Fetch failed for {ticker}: {str(e)}")
+            errors.append(e)
+            continue
+        for article in ticker_articles:
+            articles_by_url.setdefault(article.get("url"), article)
+    
+    # Nothing fetched at all: surface the error (rate limit, bad key, ...)
+    if errors and len(errors) == len(ticker_queries):
+        raise errors[0]
+    
+    # ISO-8601 UTC timestamps sort chronologically as strings
+    articles = sorted(articles_by_url.values(), key=lambda a: a.get("publishedAt") or "", reverse=True)
+    
+    log.info(f"📥 Returning {len(articles)} articles")
+    
+    return articles
+
+@lru_cache(maxsize=4)
+def _ticker_queries(tickers: str) -> tuple:
+    """(ticker, NewsAPI query) pairs for a tickers setting, built once per configuration"""
+    # Search for ticker symbol in market-related articles
+    return tuple(
+        (ticker, f'"{ticker}" AND (stock OR shares OR trading OR earnings OR market)')
+        for ticker in (t.strip() for t in tickers.split(","))
+        if ticker
+    )
+
+def fetch_ticker_news(api_key: str, ticker: str, query: str, from_date: datetime, to_date: datetime, limit: int):
+    """Fetch financial news mentioning one ticker from NewsAPI"""
     
     # NewsAPI endpoint for everything (last 30 days)
     url = "https://newsapi.org/v2/everything"
     
-    # Calculate date range (last 7 days for more relevant news)
-    to_date = datetime.now(timezone.utc)
-    from_date = to_date - timedelta(days=7)
-    
     params = {
         "q": query,
         "from": from_date.strftime("%Y-%m-%d"),
@@ -142,7 +227,7 @@ def fetch_newsapi_data(api_key: str, tickers: str, limit: int):
     
     log.info(f"🔍 Query: {query[:100]}...")
     
-    response = requests.get(url, params=params, timeout=30)
+    response = _SESSION.get(url, params=params, timeout=30)
     
     if response.status_code == 429:
         log.severe("❌ Rate limit exceeded - max 100 requests/day on free tier")
@@ -153,7 +238,7 @@ def fetch_newsapi_data(api_key: str, tickers: str, limit: int):
         raise Exception("Invalid NewsAPI key")
     
     response.raise_for_status()
-    data = response.json()
+    data = orjson.loads(response.content)
     
     # Check response status
     if data.get("status") != "ok":
@@ -164,17 +249,26 @@ def fetch_newsapi_data(api_key: str, tickers: str, limit: int):
     articles = data.get("articles", [])
     total_results = data.get("totalResults", 0)
     
-    log.info(f"📰 Total matching articles: {total_results}")
-    log.info(f"📥 Returning {len(articles)} articles")
+    log.info(f"📰 {ticker}: {total_results} matching articles, {len(articles)} fetched")
     
     return articles
 
-def transform_article(article, tickers: str):
-    """Transform NewsAPI article to BigQuery schema"""
-    
-    # Generate unique article ID from URL
+def transform_article(article, tickers: str, synced_at_iso: str = None):
+    """Transform NewsAPI article to BigQuery schema
+    
+    synced_at_iso is shared by every article of a sync (and is the fallback
+    published_at); it defaults to the current time.
+    """
+    if synced_at_iso is None:
+        synced_at_iso = datetime.now(timezone.utc).isoformat()
+    
+    # Generate unique article ID from URL (BLAKE2b, 128-bit; this is a key, not a
+    # security boundary). IDs were MD5 before: an article re-fetched after the
+    # switch gets a new row, so remove the older copies once with
+    #   DELETE FROM raw_news WHERE STRUCT(url, synced_at) NOT IN
+    #     (SELECT AS STRUCT url, MAX(synced_at) FROM raw_news GROUP BY url)
     url = article.get("url", "")
-    article_id = hashlib.md5(url.encode()).hexdigest()
+    article_id = hashlib.blake2b(url.encode("utf-8", "replace"), digest_size=16).hexdigest()
     
     # Parse published timestamp
     published_str = article.get("publishedAt", "")
@@ -183,7 +277,7 @@ def transform_article(article, tickers: str):
         published_at = datetime.fromisoformat(published_str.replace("Z", "+00:00"))
         published_at = published_at.isoformat()
     except:
-        published_at = datetime.now(timezone.utc).isoformat()
+        published_at = synced_at_iso
     
     # Extract author(s)
     author = article.get("author", "")
@@ -198,14 +292,25 @@ def transform_article(article, tickers: str):
     description = article.get("description", "")
     content = article.get("content", "")
     
-    full_text = f"{title} {description} {content}".upper()
+    # Built once and matched case-insensitively, so no upper/lower-cased copies;
+    # articles without a title or description skip the headline work entirely
+    has_headline = bool(title or description)
+    headline = f"{title} {description}" if has_headline else None
+    full_text = f"{headline} {content}" if has_headline else content
     
-    ticker_list = [t.strip() for t in tickers.split(",")]
-    mentioned_tickers = [t for t in ticker_list if t.upper() in full_text]
-    stock_symbols = ", ".join(mentioned_tickers) if mentioned_tickers else tickers.split(",")[0]
+    ticker_list, ticker_re = _ticker_matcher(tickers)
+    if full_text:
+        found = {match.upper() for match in ticker_re.findall(full_text)}
+        mentioned_tickers = [t for t in ticker_list if any(t.upper() in match for match in found)]
+    else:
+        mentioned_tickers = []
+    stock_symbols = ", ".join(mentioned_tickers) if mentioned_tickers else ticker_list[0]
     
     # Simple sentiment analysis based on keywords (basic implementation)
-    sentiment_score, sentiment_label = analyze_sentiment(title, description)
+    if has_headline:
+        sentiment_score, sentiment_label = analyze_sentiment(title, description, headline)
+    else:
+        sentiment_score, sentiment_label = 0.0, "Neutral"
     
     # Build topics from category
     topics = [{"topic": "Financial Markets", "relevance": "0.9"}]
@@ -219,38 +324,40 @@ def transform_article(article, tickers: str):
         "authors": authors,
         "category": "financial",
         "published_at": published_at,
-        "synced_at": datetime.now(timezone.utc).isoformat(),
+        "synced_at": synced_at_iso,
         "stock_symbols": stock_symbols,
-        "topics": json.dumps(topics),
+        "topics": orjson.dumps(topics).decode(),
         "sentiment_score": sentiment_score,
         "sentiment_label": sentiment_label,
-        "ticker_sentiments": json.dumps([])  # NewsAPI doesn't provide this
+        "ticker_sentiments": orjson.dumps([]).decode()  # NewsAPI doesn't provide this
     }
 
-def analyze_sentiment(title: str, description: str):
-    """Basic sentiment analysis using keyword matching"""
+@lru_cache(maxsize=8)
+def _ticker_matcher(tickers: str):
+    """Ticker list and a case-insensitive regex finding all of them in one pass
+    
+    The lookahead tries every position, longest ticker first, so a ticker that
+    is a prefix of another (GOOG/GOOGL) is recovered from the longer match.
+    """
+    ticker_list = tuple(t.strip() for t in tickers.split(","))  # Tuple: shared by every caller
+    alternatives = sorted({re.escape(t.upper()) for t in ticker_list if t}, key=len, reverse=True)
+    return ticker_list, re.compile(r"(?=(" + "|".join(alternatives) + "))", re.IGNORECASE) if alternatives else re.compile(r"(?!)")
+
+def analyze_sentiment(title: str, description: str, text: str = None):
+    """Basic sentiment analysis using keyword matching
+    
+    text is the already-joined "title description" when the caller has it.
+    """
     
     if not title and not description:
         return 0.0, "Neutral"
     
-    text = f"{title} {description}".lower()
-    
-    # Positive keywords
-    positive_keywords = [
-        "surge", "gain", "rise", "rally", "profit", "beat", "exceed",
-        "growth", "strong", "record", "upgrade", "bullish", "optimistic",
-        "boost", "soar", "jump", "positive", "advance"
-    ]
-    
-    # Negative keywords
-    negative_keywords = [
-        "fall", "drop", "decline", "loss", "miss", "plunge", "crash",
-        "weak", "disappointing", "downgrade", "bearish", "pessimistic",
-        "concern", "worry", "risk", "threat", "negative", "struggle"
-    ]
+    if text is None:
+        text = f"{title} {description}"
     
-    positive_count = sum(1 for keyword in positive_keywords if keyword in text)
-    negative_count = sum(1 for keyword in negative_keywords if keyword in text)
+    # Each keyword counts once, however often it appears
+    positive_count = len({match.lower() for match in _POSITIVE_RE.findall(text)})
+    negative_count = len({match.lower() for match in _NEGATIVE_RE.findall(text)})
     
     # Calculate sentiment score (-1 to 1 range)
     total_keywords = positive_count + negative_count
@@ -283,8 +390,8 @@ connector = Connector(update=update, schema=schema)
 # For local testing
 if __name__ == "__main__":
     # Load test configuration
-    with open("test_config.json", "r") as f:
-        configuration = json.load(f)
+    with open("test_config.json", "rb") as f:
+        configuration = orjson.loads(f.read())
     
     # Run debug
     connector.debug(configuration=configuration)
@@ -8,43 +8,142 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+import asyncio
 import logging
 from typing import Dict, Any, List, Optional
+from cachetools import TTLCache
+import google.auth
+from google.auth.transport.requests import AuthorizedSession
 from google.cloud import bigquery
+from google.cloud import bigquery_storage
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import json
+import threading
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# One client (HTTP transport + credentials) per project, shared by every
+# BigQueryML / TrainingDataPipeline in the process
+_CLIENT_CACHE: Dict[str, bigquery.Client] = {}
+_CLIENT_LOCK = threading.Lock()
+
+
+def get_bigquery_client(project_id: str) -> bigquery.Client:
+    """
+    Get the shared BigQuery client for a project, creating it on first use.
+    
+    Args:
+        project_id: GCP project ID
+    
+    Returns:
+        bigquery.Client for the project
+    """
+    with _CLIENT_LOCK:
+        client = _CLIENT_CACHE.get(project_id)
+        if client is None:
+            # Larger keep-alive pool than the default (10) so concurrent metric
+            # queries and result pages reuse TLS connections
+            credentials, _ = google.auth.default(scopes=bigquery.Client.SCOPE)
+            session = AuthorizedSession(credentials)
+            session.mount("https://", HTTPAdapter(pool_connections=20, pool_maxsize=50))
+            client = _CLIENT_CACHE[project_id] = bigquery.Client(
+                project=project_id, credentials=credentials, _http=session
+            )
+        return client
+
 
 class BigQueryML:
     """Wrapper for BigQuery ML anomaly detection model."""
     
-    def __init__(self, project_id: str, dataset_id: str = "osprey_data"):
+    # Evaluation and feature importance only change when the model is retrained
+    MODEL_CACHE_TTL_SECONDS = 300
+    
+    def __init__(self, project_id: str, dataset_id: str = "osprey_data",
+                 client: Optional[bigquery.Client] = None):
         """
         Initialize BigQuery ML client.
         
         Args:
             project_id: GCP project ID
             dataset_id: BigQuery dataset ID
+            client: BigQuery client to use (default: the shared client for project_id)
         """
         self.project_id = project_id
         self.dataset_id = dataset_id
-        self.client = bigquery.Client(project=project_id)
+        self.client = client or get_bigquery_client(project_id)
         self.model_id = "anomaly_predictor_v1"
+        self.feature_view_id = "v_feature_rows"
+        self._feature_view_ready = False
+        
+        # (query kind, model_id) -> parsed result of ML.EVALUATE / ML.FEATURE_IMPORTANCE
+        self._model_cache = TTLCache(maxsize=16, ttl=self.MODEL_CACHE_TTL_SECONDS)
+        self._model_cache_lock = threading.Lock()
+        
+        # Storage Read API client for Arrow results, created on first prediction
+        self._bqs = None
         
         logger.info(f"Initialized BigQueryML for {project_id}.{dataset_id}")
     
-    def create_model(self) -> Dict[str, Any]:
+    def ensure_feature_view(self, replace: bool = False) -> None:
+        """
+        Create the view holding the model's engineered features over raw_news.
+        
+        Prediction and statistics queries select from this view, so the
+        feature expressions are defined (and planned) in one place. Runs the
+        DDL at most once per instance unless replace is set.
+        
+        raw_news should be partitioned by DATE(published_at) (as
+        scripts/create_tables.py creates it): the published_at filters applied
+        to this view then prune partitions instead of scanning the whole table.
+        
+        Args:
+            replace: Recreate the view even if it exists (after changing features)
+        """
+        if self._feature_view_ready and not replace:
+            return
+        
+        query = f"""
+        CREATE {"OR REPLACE VIEW" if replace else "VIEW IF NOT EXISTS"}
+          `{self.project_id}.{self.dataset_id}.{self.feature_view_id}` AS
+        SELECT
+          article_id,
+          sentiment_score,
+          LENGTH(title) as title_length,
+          LENGTH(content) as content_length,
+          ARRAY_LENGTH(SPLIT(stock_symbols, ',')) as num_stocks,
+          TIMESTAMP_DIFF(CURRENT_TIMESTAMP(), published_at, HOUR) as age_hours,
+          EXTRACT(HOUR FROM published_at) as published_hour,
+          title,
+          author,
+          published_at
+        FROM `{self.project_id}.{self.dataset_id}.raw_news`
+        """
+        
+        self.client.query_and_wait(query)
+        self._feature_view_ready = True
+        logger.info(f"Feature view ready: {self.feature_view_id}")
+    
+    def create_model(self, days_back: Optional[int] = None) -> Dict[str, Any]:
         """
         Create and train the BigQuery ML model.
         
+        Args:
+            days_back: Train only on articles published in the last N days,
+                reading just those training_data partitions (default: all data,
+                which keeps the out-of-range published_at examples)
+        
         Returns:
             Dict with model creation status and info
         """
         logger.info("Creating BigQuery ML model...")
         
+        date_filter = ""
+        if days_back is not None:
+            date_filter = f"AND published_at > TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL {int(days_back)} DAY)"
+        
         query = f"""
         CREATE OR REPLACE MODEL `{self.project_id}.{self.dataset_id}.{self.model_id}`
         OPTIONS(
@@ -67,12 +166,17 @@ class BigQueryML:
           is_test_data
         FROM `{self.project_id}.{self.dataset_id}.training_data`
         WHERE is_test_data IS NOT NULL
+          {date_filter}
         """
         
         try:
             query_job = self.client.query(query)
             query_job.result()  # Wait for completion
             
+            # Cached evaluation/features describe the replaced model
+            with self._model_cache_lock:
+                self._model_cache.clear()
+            
             logger.info(f"✅ Model created: {self.model_id}")
             
             # Get evaluation metrics immediately
@@ -92,13 +196,46 @@ class BigQueryML:
                 "error": str(e)
             }
     
+    def _get_cached(self, kind: str):
+        """Result of a model query fetched less than MODEL_CACHE_TTL_SECONDS ago, or None"""
+        with self._model_cache_lock:
+            return self._model_cache.get((kind, self.model_id))
+    
+    def _set_cached(self, kind: str, value) -> None:
+        with self._model_cache_lock:
+            self._model_cache[(kind, self.model_id)] = value
+    
+    def _store_evaluation(self, row) -> Dict[str, Any]:
+        """Parse an ML.EVALUATE row, cache it and return a copy"""
+        metrics = {
+            "precision": float(row.precision) if row.precision else 0,
+            "recall": float(row.recall) if row.recall else 0,
+            "accuracy": float(row.accuracy) if row.accuracy else 0,
+            "f1_score": float(row.f1_score) if row.f1_score else 0,
+            "log_loss": float(row.log_loss) if row.log_loss else 0,
+            "roc_auc": float(row.roc_auc) if row.roc_auc else 0,
+            "timestamp": datetime.now().isoformat()
+        }
+        
+        logger.info(f"Model Metrics: Accuracy={metrics['accuracy']:.2%}, Precision={metrics['precision']:.2%}, Recall={metrics['recall']:.2%}")
+        
+        self._set_cached("evaluate", metrics)
+        return dict(metrics)
+    
     def evaluate_model(self) -> Dict[str, Any]:
         """
         Evaluate the trained model performance.
         
+        Successful results are cached for MODEL_CACHE_TTL_SECONDS (cleared by
+        create_model).
+        
         Returns:
             Dict with accuracy, precision, recall, AUC-ROC metrics
         """
+        cached = self._get_cached("evaluate")
+        if cached is not None:
+            return dict(cached)
+        
         query = f"""
         SELECT
           precision,
@@ -113,22 +250,10 @@ class BigQueryML:
         """
         
         try:
-            result = self.client.query(query).result()
-            row = list(result)[0]
-            
-            metrics = {
-                "precision": float(row.precision) if row.precision else 0,
-                "recall": float(row.recall) if row.recall else 0,
-                "accuracy": float(row.accuracy) if row.accuracy else 0,
-                "f1_score": float(row.f1_score) if row.f1_score else 0,
-                "log_loss": float(row.log_loss) if row.log_loss else 0,
-                "roc_auc": float(row.roc_auc) if row.roc_auc else 0,
-                "timestamp": datetime.now().isoformat()
-            }
-            
-            logger.info(f"Model Metrics: Accuracy={metrics['accuracy']:.2%}, Precision={metrics['precision']:.2%}, Recall={metrics['recall']:.2%}")
-            
-            return metrics
+            # Small result: query_and_wait gets rows inline from jobs.query instead
+            # of creating a job and polling getQueryResults
+            result = self.client.query_and_wait(query)
+            return self._store_evaluation(list(result)[0])
             
         except Exception as e:
             logger.error(f"❌ Error evaluating model: {e}")
@@ -140,9 +265,15 @@ class BigQueryML:
         """
         Get feature importance from the model.
         
+        Successful results are cached like evaluate_model.
+        
         Returns:
             List of features with their importance scores
         """
+        cached = self._get_cached("feature_importance")
+        if cached is not None:
+            return list(cached)
+        
         query = f"""
         SELECT
           feature,
@@ -155,7 +286,7 @@ class BigQueryML:
         """
         
         try:
-            result = self.client.query(query).result()
+            result = self.client.query_and_wait(query)
             
             features = []
             for row in result:
@@ -167,7 +298,8 @@ class BigQueryML:
             
             logger.info(f"Top 3 features: {[f['feature'] for f in features[:3]]}")
             
-            return features
+            self._set_cached("feature_importance", features)
+            return list(features)
             
         except Exception as e:
             logger.error(f"❌ Error getting feature importance: {e}")
@@ -189,29 +321,18 @@ class BigQueryML:
         query = f"""
         SELECT
           article_id,
-          predicted_is_test_data,
           predicted_is_test_data_probs[OFFSET(1)].prob as anomaly_probability,
           title,
           author,
-          published_at,
-          sentiment_score,
-          title_length,
-          content_length
+          FORMAT_TIMESTAMP('%Y-%m-%dT%H:%M:%E*S+00:00', published_at) as published_at,
+          IFNULL(sentiment_score, 0) as sentiment_score,
+          IFNULL(title_length, 0) as title_length,
+          IFNULL(content_length, 0) as content_length
         FROM ML.PREDICT(
           MODEL `{self.project_id}.{self.dataset_id}.{self.model_id}`,
           (
-            SELECT
-              article_id,
-              sentiment_score,
-              LENGTH(title) as title_length,
-              LENGTH(content) as content_length,
-              ARRAY_LENGTH(SPLIT(stock_symbols, ',')) as num_stocks,
-              TIMESTAMP_DIFF(CURRENT_TIMESTAMP(), published_at, HOUR) as age_hours,
-              EXTRACT(HOUR FROM published_at) as published_hour,
-              title,
-              author,
-              published_at
-            FROM `{self.project_id}.{self.dataset_id}.raw_news`
+            SELECT *
+            FROM `{self.project_id}.{self.dataset_id}.{self.feature_view_id}`
             WHERE published_at > TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL {days_back} DAY)
           )
         )
@@ -222,20 +343,14 @@ class BigQueryML:
         """
         
         try:
-            result = self.client.query(query).result()
+            self.ensure_feature_view()
+            if self._bqs is None:
+                self._bqs = bigquery_storage.BigQueryReadClient()
             
-            predictions = []
-            for row in result:
-                predictions.append({
-                    "article_id": row.article_id,
-                    "anomaly_probability": float(row.anomaly_probability),
-                    "title": row.title,
-                    "author": row.author,
-                    "published_at": row.published_at.isoformat() if row.published_at else None,
-                    "sentiment_score": float(row.sentiment_score) if row.sentiment_score else 0,
-                    "title_length": int(row.title_length) if row.title_length else 0,
-                    "content_length": int(row.content_length) if row.content_length else 0
-                })
+            # Columns are already cast and defaulted in SQL, so the Arrow rows
+            # are the response dicts as-is
+            result = self.client.query_and_wait(query)
+            predictions = result.to_arrow(bqstorage_client=self._bqs).to_pylist()
             
             logger.info(f"Found {len(predictions)} anomalies with confidence > {confidence_threshold}")
             
@@ -249,37 +364,20 @@ class BigQueryML:
         """
         Get comprehensive model metrics for dashboard.
         
+        Evaluation and prediction statistics come back from one query (or just
+        the statistics while the evaluation is cached); feature importance runs
+        alongside it, since ML.FEATURE_IMPORTANCE fails for model types without
+        it and must not take the other metrics down.
+        
         Returns:
             Dict with all model information and performance metrics
         """
         try:
-            metrics = self.evaluate_model()
-            features = self.get_feature_importance()
-            
-            # Get prediction statistics
-            pred_stats_query = f"""
-            SELECT
-              COUNT(*) as total_predictions,
-              COUNTIF(predicted_is_test_data = TRUE) as positive_predictions,
-              AVG(predicted_is_test_data_probs[OFFSET(1)].prob) as avg_confidence
-            FROM ML.PREDICT(
-              MODEL `{self.project_id}.{self.dataset_id}.{self.model_id}`,
-              (
-                SELECT
-                  sentiment_score,
-                  LENGTH(title) as title_length,
-                  LENGTH(content) as content_length,
-                  ARRAY_LENGTH(SPLIT(stock_symbols, ',')) as num_stocks,
-                  TIMESTAMP_DIFF(CURRENT_TIMESTAMP(), published_at, HOUR) as age_hours,
-                  EXTRACT(HOUR FROM published_at) as published_hour
-                FROM `{self.project_id}.{self.dataset_id}.raw_news`
-                WHERE published_at > TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL 1 DAY)
-              )
-            )
-            """
-            
-            pred_result = self.client.query(pred_stats_query).result()
-            pred_row = list(pred_result)[0]
+            self.ensure_feature_view()
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                features_future = pool.submit(self.get_feature_importance)
+                metrics, pred_row = self._get_evaluation_and_prediction_stats()
+            features = features_future.result()
             
             return {
                 "model_id": self.model_id,
@@ -302,6 +400,94 @@ class BigQueryML:
                 "error": str(e)
             }
     
+    def _get_evaluation_and_prediction_stats(self) -> tuple:
+        """
+        Get evaluation metrics and prediction statistics in one round trip.
+        
+        Both are single-row results, so they are cross-joined into one query.
+        If that query fails, they are fetched separately so an evaluation
+        error only affects the metrics (as evaluate_model reports it).
+        
+        Returns:
+            (metrics dict, prediction stats row)
+        """
+        cached = self._get_cached("evaluate")
+        if cached is not None:
+            return dict(cached), self._get_prediction_stats()
+        
+        query = f"""
+        SELECT
+          e.precision,
+          e.recall,
+          e.accuracy,
+          e.f1_score,
+          e.log_loss,
+          e.roc_auc,
+          p.total_predictions,
+          p.positive_predictions,
+          p.avg_confidence
+        FROM ML.EVALUATE(
+          MODEL `{self.project_id}.{self.dataset_id}.{self.model_id}`
+        ) AS e
+        CROSS JOIN ({self._prediction_stats_query()}) AS p
+        """
+        
+        try:
+            row = list(self.client.query_and_wait(query))[0]
+        except Exception as e:
+            logger.warning(f"⚠️ Combined metrics query failed ({e}); querying separately")
+            return self.evaluate_model(), self._get_prediction_stats()
+        
+        return self._store_evaluation(row), row
+    
+    def _prediction_stats_query(self) -> str:
+        """SQL for prediction statistics over the last day of raw_news (one row; needs the feature view)"""
+        return f"""
+        SELECT
+          COUNT(*) as total_predictions,
+          COUNTIF(predicted_is_test_data = TRUE) as positive_predictions,
+          AVG(predicted_is_test_data_probs[OFFSET(1)].prob) as avg_confidence
+        FROM ML.PREDICT(
+          MODEL `{self.project_id}.{self.dataset_id}.{self.model_id}`,
+          (
+            SELECT *
+            FROM `{self.project_id}.{self.dataset_id}.{self.feature_view_id}`
+            WHERE published_at > TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL 1 DAY)
+          )
+        )
+        """
+    
+    def _get_prediction_stats(self):
+        """
+        Get prediction statistics over the last day of raw_news.
+        
+        Returns:
+            Row with total_predictions, positive_predictions, avg_confidence
+        """
+        pred_result = self.client.query_and_wait(self._prediction_stats_query())
+        return list(pred_result)[0]
+    
+    # Async variants for event-loop callers (FastAPI): the blocking client calls
+    # run on a worker thread, as in agents/api.py, so the loop keeps serving
+    # other requests while BigQuery works
+    
+    async def evaluate_model_async(self) -> Dict[str, Any]:
+        """Async evaluate_model (see there)."""
+        return await asyncio.to_thread(self.evaluate_model)
+    
+    async def get_feature_importance_async(self) -> List[Dict[str, Any]]:
+        """Async get_feature_importance (see there)."""
+        return await asyncio.to_thread(self.get_feature_importance)
+    
+    async def predict_on_new_data_async(self, days_back: int = 7,
+                                        confidence_threshold: float = 0.70) -> List[Dict[str, Any]]:
+        """Async predict_on_new_data (see there)."""
+        return await asyncio.to_thread(self.predict_on_new_data, days_back, confidence_threshold)
+    
+    async def get_model_metrics_async(self) -> Dict[str, Any]:
+        """Async get_model_metrics (see there)."""
+        return await asyncio.to_thread(self.get_model_metrics)
+    
     def model_exists(self) -> bool:
         """
         Check if the model exists in BigQuery.
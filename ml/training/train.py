@@ -11,9 +11,13 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../.
 import logging
 from typing import Dict, Any, Optional
 from google.cloud import bigquery
+from google.cloud import bigquery_storage
+import pyarrow.csv
 from google.cloud.exceptions import NotFound
 from datetime import datetime
 
+from ml.bigquery_ml import get_bigquery_client
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -21,7 +25,8 @@ logger = logging.getLogger(__name__)
 class TrainingDataPipeline:
     """Pipeline for creating labeled training data for anomaly detection model."""
     
-    def __init__(self, project_id: str, dataset_id: str = "osprey_data", table_id: str = "raw_news"):
+    def __init__(self, project_id: str, dataset_id: str = "osprey_data", table_id: str = "raw_news",
+                 client: Optional[bigquery.Client] = None):
         """
         Initialize the training data pipeline.
         
@@ -29,11 +34,12 @@ class TrainingDataPipeline:
             project_id: GCP project ID
             dataset_id: BigQuery dataset ID
             table_id: Source table name
+            client: BigQuery client to use (default: the shared client for project_id)
         """
         self.project_id = project_id
         self.dataset_id = dataset_id
         self.table_id = table_id
-        self.client = bigquery.Client(project=project_id)
+        self.client = client or get_bigquery_client(project_id)
         self.training_table_id = "training_data"
         
         logger.info(f"Initialized TrainingDataPipeline for {project_id}.{dataset_id}.{table_id}")
@@ -54,10 +60,36 @@ class TrainingDataPipeline:
         
         # SQL query to create training data with features
         query = f"""
-        CREATE OR REPLACE TABLE `{self.project_id}.{self.dataset_id}.{self.training_table_id}` AS
-        WITH labeled_data AS (
+        -- One case-insensitive pass per string (no LOWER() copy). Titles and
+        -- authors keep their own word lists; 'test' already covers 'admin_test'
+        CREATE TEMP FUNCTION is_test_title(s STRING) AS (
+          REGEXP_CONTAINS(s, r'(?i)test|dummy|fake|lorem|placeholder|qa_|dev_')
+        );
+        CREATE TEMP FUNCTION is_test_author(s STRING) AS (
+          REGEXP_CONTAINS(s, r'(?i)test|dummy|fake|qa_|dev_')
+        );
+        
+        -- CREATE OR REPLACE can't change a table's partitioning spec, and tables
+        -- built before partitioning was added have none: drop first
+        DROP TABLE IF EXISTS `{self.project_id}.{self.dataset_id}.{self.training_table_id}`;
+        
+        CREATE TABLE `{self.project_id}.{self.dataset_id}.{self.training_table_id}`
+        -- Monthly: test rows carry arbitrary years, which would blow through
+        -- the per-table partition limit with daily partitions
+        PARTITION BY TIMESTAMP_TRUNC(published_at, MONTH)
+        CLUSTER BY article_id
+        AS
+        WITH test_quarantine AS (
+          -- Articles quarantined as test data, reduced to one row per article
+          -- before the join so raw_news rows are never duplicated
+          SELECT DISTINCT article_id
+          FROM `{self.project_id}.{self.dataset_id}.quarantine`
+          WHERE REGEXP_CONTAINS(quarantine_reason, r'(?i)test')
+        ),
+        
+        labeled_data AS (
           SELECT
-            article_id,
+            r.article_id,
             -- Engineered features
             sentiment_score,
             LENGTH(title) as title_length,
@@ -65,19 +97,16 @@ class TrainingDataPipeline:
             ARRAY_LENGTH(SPLIT(stock_symbols, ',')) as num_stocks,
             TIMESTAMP_DIFF(CURRENT_TIMESTAMP(), published_at, HOUR) as age_hours,
             EXTRACT(HOUR FROM published_at) as published_hour,
+            published_at,  -- Partitioning column, not a model feature
             
             -- Label: is this test data or anomaly?
             CASE
               -- Check if in quarantine (explicit label)
-              WHEN article_id IN (
-                SELECT article_id 
-                FROM `{self.project_id}.{self.dataset_id}.quarantine` 
-                WHERE reason LIKE '%test%'
-              ) THEN TRUE
+              WHEN q.article_id IS NOT NULL THEN TRUE
               
               -- Pattern-based labeling for test data
-              WHEN REGEXP_CONTAINS(LOWER(title), r'test|dummy|fake|lorem|placeholder|qa_|dev_')
-                OR REGEXP_CONTAINS(LOWER(author), r'test|dummy|fake|qa_|dev_|admin_test')
+              WHEN is_test_title(title)
+                OR is_test_author(author)
                 OR stock_symbols LIKE '%TEST%'
                 OR stock_symbols LIKE '%FAKE%'
                 OR EXTRACT(YEAR FROM published_at) > 2030
@@ -88,7 +117,8 @@ class TrainingDataPipeline:
               ELSE FALSE
             END as is_test_data
           
-          FROM `{self.project_id}.{self.dataset_id}.{self.table_id}`
+          FROM `{self.project_id}.{self.dataset_id}.{self.table_id}` r
+          LEFT JOIN test_quarantine q ON q.article_id = r.article_id
           
           -- Filter out rows with null critical fields
           WHERE published_at IS NOT NULL
@@ -145,7 +175,9 @@ class TrainingDataPipeline:
         """
         
         try:
-            result = self.client.query(query).result()
+            # Small result: query_and_wait gets rows inline from jobs.query instead
+            # of creating a job and polling getQueryResults
+            result = self.client.query_and_wait(query)
             row = list(result)[0]
             
             stats = {
@@ -235,9 +267,15 @@ class TrainingDataPipeline:
         
         try:
             logger.info(f"Exporting training data to {output_path}...")
-            df = self.client.query(query).to_dataframe()
-            df.to_csv(output_path, index=False)
-            logger.info(f"✅ Exported {len(df)} rows to {output_path}")
+            # Columnar download over the Storage Read API, written straight to CSV
+            # (no pandas copy in between)
+            bqstorage_client = bigquery_storage.BigQueryReadClient()
+            try:
+                table = self.client.query(query).to_arrow(bqstorage_client=bqstorage_client)
+            finally:
+                bqstorage_client.transport.close()
+            pyarrow.csv.write_csv(table, output_path)
+            logger.info(f"✅ Exported {table.num_rows} rows to {output_path}")
         except Exception as e:
             logger.error(f"❌ Error exporting training data: {e}")
             raise
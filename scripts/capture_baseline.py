@@ -13,7 +13,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from dotenv import load_dotenv
 load_dotenv()
 
-from agents.schema_guardian import SchemaGuardian
+from agents.schema_guardian import SchemaGuardian, schema_to_records
 from agents.agent_memory import AgentMemory
 
 # Configuration
@@ -41,16 +41,17 @@ try:
     
     print(f"\n✅ Captured {len(baseline)} columns:")
     print("=" * 80)
-    print(baseline[['column_name', 'data_type', 'is_nullable', 'ordinal_position']].to_string())
+    for name, column in baseline.items():
+        print(f"{column.ordinal_position:3d}  {name:30s} {column.data_type:15s} {column.is_nullable}")
     print("=" * 80)
 
     # Store in Firestore
     print(f"\n💾 Storing baseline in Firestore...")
-    memory.store_schema_baseline(TABLE_ID, baseline)
+    memory.store_schema_baseline_raw(TABLE_ID, schema_to_records(baseline))
 
     # Verify storage
     print(f"\n🔍 Verifying storage...")
-    retrieved = memory.get_schema_baseline(TABLE_ID)
+    retrieved = memory.get_schema_baseline_raw(TABLE_ID)
     
     if retrieved is not None and len(retrieved) == len(baseline):
         print(f"✅ Baseline stored and verified successfully!")
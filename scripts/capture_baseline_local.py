@@ -4,22 +4,29 @@ This version just captures and displays the schema
 """
 
 import os
+import time
 import sys
+from itertools import islice
 from pathlib import Path
 
+import orjson
+
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from dotenv import load_dotenv
 load_dotenv()
 
-from agents.schema_guardian import SchemaGuardian
+from agents.schema_guardian import SchemaGuardian, schema_to_records
 
 # Configuration
 PROJECT_ID = os.getenv("PROJECT_ID")
 DATASET_ID = os.getenv("DATASET_ID", "osprey_data")
 TABLE_ID = os.getenv("TABLE_ID", "raw_news")
 
+# Columns printed to the console; wide tables are only summarized
+MAX_DISPLAY_COLUMNS = 50
+
 if not PROJECT_ID:
     print("❌ Error: PROJECT_ID environment variable not set")
     print("Make sure .env file exists with PROJECT_ID set")
@@ -39,20 +46,21 @@ try:
     
     print(f"\n✅ Captured {len(baseline)} columns:")
     print("=" * 80)
-    print(baseline[['column_name', 'data_type', 'is_nullable', 'ordinal_position']].to_string())
+    for name, column in islice(baseline.items(), MAX_DISPLAY_COLUMNS):
+        print(f"{column.ordinal_position:3d}  {name:30s} {column.data_type:15s} {column.is_nullable}")
+    if len(baseline) > MAX_DISPLAY_COLUMNS:
+        print(f"     ... {len(baseline) - MAX_DISPLAY_COLUMNS} more columns (see the saved baseline)")
     print("=" * 80)
 
     # Save to local JSON file
-    import json
     baseline_file = Path("baseline_schema.json")
     baseline_data = {
         'table': f"{PROJECT_ID}.{DATASET_ID}.{TABLE_ID}",
-        'columns': baseline.to_dict('records'),
-        'captured_at': baseline.iloc[0]['table_name'] if len(baseline) > 0 else None
+        'columns': schema_to_records(baseline),
+        'captured_at': time.time()
     }
     
-    with open(baseline_file, 'w') as f:
-        json.dump(baseline_data, f, indent=2)
+    baseline_file.write_bytes(orjson.dumps(baseline_data, option=orjson.OPT_INDENT_2))
     
     print(f"\n💾 Baseline saved to: {baseline_file.absolute()}")
     
@@ -78,9 +86,8 @@ try:
     print(f"import json")
     print(f"guardian = SchemaGuardian('{PROJECT_ID}', '{DATASET_ID}', '{TABLE_ID}')")
     print(f"with open('baseline_schema.json') as f:")
-    print(f"    import pandas as pd")
     print(f"    baseline = json.load(f)")
-    print(f"    guardian.baseline_schema = pd.DataFrame(baseline['columns'])")
+    print(f"    guardian.baseline_schema = baseline['columns']")
     print(f"changes = guardian.detect_schema_drift()")
     print(f"print('Changes detected:', changes)")
     print(f"\"")
@@ -105,13 +105,12 @@ test("BigQuery Connectivity", test_bigquery)
 
 # TEST 5: Baseline Capture
 def test_baseline_capture():
-    from agents.schema_guardian import SchemaGuardian
+    from agents.schema_guardian import SchemaGuardian, schema_to_records
     guardian = SchemaGuardian(PROJECT_ID, DATASET_ID, TABLE_ID)
     
     baseline = guardian.capture_baseline_schema()
     assert len(baseline) > 0, "No columns captured"
-    assert 'column_name' in baseline.columns
-    assert 'data_type' in baseline.columns
+    assert all(column.data_type for column in baseline.values())
     
     print(f"   Captured {len(baseline)} columns")
     
@@ -119,7 +118,7 @@ def test_baseline_capture():
     baseline_file = Path("baseline_schema.json")
     baseline_data = {
         'table': f"{PROJECT_ID}.{DATASET_ID}.{TABLE_ID}",
-        'columns': baseline.to_dict('records'),
+        'columns': schema_to_records(baseline),
         'column_count': len(baseline)
     }
     with open(baseline_file, 'w') as f:
@@ -133,17 +132,16 @@ test("Baseline Capture", test_baseline_capture)
 # TEST 6: Schema Drift Detection
 def test_drift_detection():
     from agents.schema_guardian import SchemaGuardian
-    import pandas as pd
     
     guardian = SchemaGuardian(PROJECT_ID, DATASET_ID, TABLE_ID)
     
     # Load baseline
     with open("baseline_schema.json") as f:
         baseline_data = json.load(f)
-        guardian.baseline_schema = pd.DataFrame(baseline_data['columns'])
+        guardian.baseline_schema = baseline_data['columns']
     
     # Detect changes
-    changes = guardian.detect_schema_drift()
+    changes = guardian.detect_schema_drift().to_dict()
     
     assert 'new_columns' in changes
     assert 'removed_columns' in changes
@@ -82,6 +82,9 @@ def create_bigquery_tables():
     quarantine_table_id = f"{project_id}.{dataset_id}.quarantine"
     quarantine_table = bigquery.Table(quarantine_table_id, quarantine_schema)
     
+    # Clustered for the article_id joins (training) and lookups (restore)
+    quarantine_table.clustering_fields = ["article_id"]
+    
     try:
         quarantine_table = client.create_table(quarantine_table, exists_ok=True)
         print(f"✅ Created quarantine table: {quarantine_table.project}.{quarantine_table.dataset_id}.{quarantine_table.table_id}")
@@ -13,7 +13,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from dotenv import load_dotenv
 load_dotenv()
 
-from agents.schema_guardian import SchemaGuardian
+from agents.schema_guardian import SchemaGuardian, schema_to_records
 from agents.agent_memory import AgentMemory
 import requests
 import json
@@ -47,15 +47,15 @@ def demo_1_baseline_capture():
     
     print_success(f"Captured {len(baseline)} columns")
     print("\n📊 Column Details:")
-    for idx, row in baseline.iterrows():
-        print(f"  {row['ordinal_position']:2d}. {row['column_name']:25s} {row['data_type']:15s} {'NULL' if row['is_nullable'] == 'YES' else 'NOT NULL'}")
+    for name, column in baseline.items():
+        print(f"  {column.ordinal_position:2d}. {name:25s} {column.data_type:15s} {'NULL' if column.is_nullable == 'YES' else 'NOT NULL'}")
     
     # Save baseline
     baseline_file = Path("baseline_schema.json")
     with open(baseline_file, 'w') as f:
         json.dump({
             'table': table,
-            'columns': baseline.to_dict('records'),
+            'columns': schema_to_records(baseline),
             'column_count': len(baseline)
         }, f, indent=2)
     
@@ -77,8 +77,7 @@ def demo_2_change_detection():
         print_info("Loading baseline from file...")
         with open(baseline_file, 'r') as f:
             data = json.load(f)
-        import pandas as pd
-        guardian.baseline_schema = pd.DataFrame(data['columns'])
+        guardian.baseline_schema = data['columns']
         print_success(f"Baseline loaded: {len(guardian.baseline_schema)} columns")
     else:
         print_info("No baseline found, capturing new baseline...")
@@ -89,14 +88,14 @@ def demo_2_change_detection():
     changes = guardian.detect_schema_drift()
     
     # Display results
-    change_count = sum(len(v) if isinstance(v, list) else 0 for v in changes.values() if v != "error")
+    change_count = changes.change_count
     
     if change_count == 0:
         print_success("No schema changes detected - schema is stable!")
     else:
         print(f"⚠️  Detected {change_count} changes:")
-        for change_type, change_list in changes.items():
-            if change_list and isinstance(change_list, list) and len(change_list) > 0:
+        for change_type, change_list in changes.to_dict().items():
+            if change_list:
                 print(f"\n  {change_type.upper()}:")
                 for change in change_list:
                     print(f"    - {change}")
@@ -29,7 +29,7 @@ def test_integrated_system():
     print(f"   ✅ Schema baseline: {len(baseline)} columns")
     
     changes = guardian.detect_schema_drift()
-    if any(len(v) > 0 for v in changes.values() if isinstance(v, list)):
+    if changes.has_changes:
         print(f"   ⚠️  Schema changes detected")
     else:
         print(f"   ✅ Schema stable")
@@ -14,7 +14,6 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from agents.schema_guardian import SchemaGuardian
-import pandas as pd
 
 # Configuration
 PROJECT_ID = os.getenv("PROJECT_ID")
@@ -37,7 +36,7 @@ if not baseline_file.exists():
 
 with open(baseline_file) as f:
     baseline_data = json.load(f)
-    guardian.baseline_schema = pd.DataFrame(baseline_data['columns'])
+    guardian.baseline_schema = baseline_data['columns']
 
 print(f"\n✅ Loaded baseline: {len(guardian.baseline_schema)} columns")
 
@@ -48,15 +47,10 @@ changes = guardian.detect_schema_drift()
 print(f"\n📊 Detection Results:")
 print("-" * 80)
 
-has_changes = any(
-    len(v) > 0 if isinstance(v, list) else False 
-    for v in changes.values() if v != "error"
-)
-
-if has_changes:
+if changes.has_changes:
     print("🚨 Changes detected!")
-    for change_type, change_list in changes.items():
-        if change_list and isinstance(change_list, list):
+    for change_type, change_list in changes.to_dict().items():
+        if change_list:
             print(f"\n{change_type}:")
             for item in change_list:
                 print(f"  - {item}")
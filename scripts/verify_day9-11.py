@@ -69,9 +69,9 @@ def main():
         executor = ActionExecutor()
         
         # Test rollback SQL generation
-        sql = executor.generate_rollback_sql(["TEST_001"])
+        sql, params = executor.generate_rollback_sql(["TEST_001"])
         assert "ROLLBACK SQL" in sql
-        assert "TEST_001" in sql
+        assert "TEST_001" in params["ids"]
         
         print_check(3, "Action executor functional", True, "SQL generation works")
         checks_passed += 1
@@ -171,11 +171,12 @@ def main():
         executor = ActionExecutor()
         
         test_ids = ["TEST_001", "TEST_002", "TEST_003"]
-        sql = executor.generate_rollback_sql(test_ids)
+        sql, params = executor.generate_rollback_sql(test_ids)
         
         assert "INSERT INTO" in sql
         assert "DELETE FROM" in sql
-        assert all(id in sql for id in test_ids)
+        assert "UNNEST(@ids)" in sql
+        assert params["ids"] == test_ids
         
         print_check(9, "Rollback SQL correctly generated", True, f"{len(test_ids)} IDs handled")
         checks_passed += 1
@@ -0,0 +1,55 @@
+import sys
+import os
+
+import orjson
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.anomaly_detective import _PREFILTER_FLAGS, _JSONStreamScanner, _pack_flags
+
+
+# No GCP access needed: these only exercise the pre-filter and stream parsing helpers
+
+
+def test_pack_flags_sets_one_bit_per_flag():
+    """Bit i is set when _PREFILTER_FLAGS[i] is true; nulls and missing columns are clear"""
+    df = pd.DataFrame({
+        "title": ["test_a", "ok", "ok"],
+        "flag_test": pd.array([True, False, pd.NA], dtype="boolean"),
+        "flag_sentiment": pd.array([False, False, True], dtype="boolean"),
+        "flag_temporal": pd.array([True, False, False], dtype="boolean"),
+    })
+
+    assert "flag_missing" not in df
+    assert _PREFILTER_FLAGS.index("flag_temporal") == 2
+    assert _pack_flags(df).tolist() == [0b101, 0, 0b010]
+
+
+def test_pack_flags_empty_sample():
+    assert len(_pack_flags(pd.DataFrame({flag: [] for flag in _PREFILTER_FLAGS}))) == 0
+
+
+def test_scanner_emits_anomalies_as_they_complete():
+    """Each anomalies entry is returned once closed; fences and braces in strings are ignored"""
+    scanner = _JSONStreamScanner()
+
+    assert scanner.feed('```json\n{"anomalies": [{"type": "test_data", "note": "a } \\" {') == []
+    first = scanner.feed('"}, {"type": "temp')
+    assert [orjson.loads(obj) for obj in first] == [{"type": "test_data", "note": 'a } " {'}]
+
+    second = scanner.feed('oral"}], "summary": "2 issues"}\n```')
+    assert [orjson.loads(obj) for obj in second] == [{"type": "temporal"}]
+    assert orjson.loads(scanner.document) == {
+        "anomalies": [{"type": "test_data", "note": 'a } " {'}, {"type": "temporal"}],
+        "summary": "2 issues"
+    }
+
+
+def test_scanner_ignores_text_after_document():
+    scanner = _JSONStreamScanner()
+    scanner.feed('{"anomalies": []}')
+    assert scanner.document == b'{"anomalies": []}'
+    assert scanner.feed('{"anomalies": [{"type": "late"}]}') == []
+    assert scanner.document == b'{"anomalies": []}'
@@ -0,0 +1,92 @@
+import asyncio
+import threading
+import sys
+import os
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents import api
+
+
+# No GCP access needed: these only exercise the request-coalescing helpers
+
+
+def test_single_flight_coalesces_concurrent_callers():
+    """Concurrent callers for one key share a single run"""
+    calls = []
+    release = threading.Event()
+
+    def run():
+        calls.append(1)
+        release.wait(5)
+        return {"status": "ok"}
+
+    async def scenario():
+        callers = [asyncio.create_task(api._single_flight("test", run)) for _ in range(5)]
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(*callers)
+
+    results = asyncio.run(scenario())
+
+    assert len(calls) == 1
+    assert results == [{"status": "ok"}] * 5
+    assert "test" not in api._inflight_runs
+
+
+def test_single_flight_survives_first_caller_cancel():
+    """A disconnecting first caller must not cancel the run or start a second one"""
+    calls = []
+    release = threading.Event()
+
+    def run():
+        calls.append(1)
+        release.wait(5)
+        return len(calls)
+
+    async def scenario():
+        first = asyncio.create_task(api._single_flight("test", run))
+        await asyncio.sleep(0.05)
+        second = asyncio.create_task(api._single_flight("test", run))
+        await asyncio.sleep(0.05)
+
+        first.cancel()
+        await asyncio.sleep(0.05)
+        # Still in flight: a new caller joins the same run
+        third = asyncio.create_task(api._single_flight("test", run))
+        await asyncio.sleep(0.05)
+        release.set()
+
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second, await third
+
+    assert asyncio.run(scenario()) == (1, 1)
+    assert len(calls) == 1
+    assert "test" not in api._inflight_runs
+
+
+def test_single_flight_propagates_errors_and_reruns():
+    """Every waiter sees the failure; the next call starts a fresh run"""
+    calls = []
+
+    def fail():
+        calls.append(1)
+        raise RuntimeError("boom")
+
+    async def scenario():
+        results = await asyncio.gather(
+            api._single_flight("test", fail),
+            api._single_flight("test", fail),
+            return_exceptions=True
+        )
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert "test" not in api._inflight_runs
+
+        return await api._single_flight("test", lambda: "recovered")
+
+    assert asyncio.run(scenario()) == "recovered"
+    assert len(calls) == 1
@@ -0,0 +1,36 @@
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from connector.connector import _ticker_matcher, analyze_sentiment, transform_article
+
+
+# No API access needed: these only exercise the text scanning helpers
+
+
+def test_ticker_matcher_finds_prefix_tickers():
+    """GOOG is still found inside GOOGL; matching ignores case"""
+    ticker_list, ticker_re = _ticker_matcher("GOOG, GOOGL,MSFT")
+    assert ticker_list == ("GOOG", "GOOGL", "MSFT")
+
+    found = {match.upper() for match in ticker_re.findall("googl and msft rallied")}
+    assert [t for t in ticker_list if any(t in match for match in found)] == ["GOOG", "GOOGL", "MSFT"]
+
+
+def test_transform_article_falls_back_to_first_ticker():
+    article = {"title": "Markets steady", "description": "", "url": "https://example.com/a",
+               "publishedAt": "2026-01-01T00:00:00Z", "source": {"name": "Reuters"}}
+    assert transform_article(article, "AAPL,MSFT")["stock_symbols"] == "AAPL"
+
+    article["description"] = "Microsoft (MSFT) and apple (aapl) report"
+    assert transform_article(article, "AAPL,MSFT")["stock_symbols"] == "AAPL, MSFT"
+
+
+def test_sentiment_counts_distinct_keywords_anywhere():
+    """Keywords count once each, mid-word included (same as `keyword in text`)"""
+    # "outgained" -> gain, "surges" -> surge; repeats don't add weight
+    assert analyze_sentiment("Stock outgained peers", "surges, surges again") == (0.35, "Bullish")
+    assert analyze_sentiment("Gains offset by risk", "") == (0.0, "Neutral")
+    assert analyze_sentiment("", "") == (0.0, "Neutral")
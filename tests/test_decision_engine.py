@@ -0,0 +1,94 @@
+import sys
+import os
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.decision_engine import DecisionEngine
+
+
+@pytest.fixture
+def engine():
+    return DecisionEngine()
+
+
+def _schema_alert(severity, removed_columns=()):
+    return {"severity": severity, "changes": {"removed_columns": list(removed_columns), "type_changes": []}}
+
+
+def _anomaly_alert(confidence, *types):
+    return {
+        "has_anomalies": bool(types),
+        "confidence": confidence,
+        "anomalies": [{"type": anomaly_type} for anomaly_type in types]
+    }
+
+
+@pytest.mark.parametrize("schema_alert, anomaly_alert, action, priority", [
+    (_schema_alert("CRITICAL"), _anomaly_alert(0.9, "test_data"), "EMERGENCY_PAUSE", "CRITICAL"),
+    (None, _anomaly_alert(0.9, "test_data"), "QUARANTINE_AND_PAUSE", "CRITICAL"),
+    (_schema_alert("CRITICAL"), None, "PAUSE_AND_ALERT", "CRITICAL"),
+    (_schema_alert("HIGH", ["price"]), _anomaly_alert(0.82, "temporal"), "PAUSE_AND_ALERT", "HIGH"),
+    (None, _anomaly_alert(0.82, "temporal"), "QUARANTINE_AND_FLAG", "HIGH"),
+    (None, _anomaly_alert(0.75, "temporal"), "FLAG_FOR_REVIEW", "MEDIUM"),
+    (_schema_alert("HIGH"), None, "FLAG_FOR_REVIEW", "MEDIUM"),
+    (_schema_alert("MEDIUM"), None, "FLAG_FOR_REVIEW", "LOW"),
+    (None, _anomaly_alert(0.6), "LOG_AND_CONTINUE", "LOW"),
+    (None, None, "CONTINUE", "LOW"),
+])
+def test_first_matching_rule_wins(engine, schema_alert, anomaly_alert, action, priority):
+    decision = engine.evaluate(schema_alert, anomaly_alert)
+    assert (decision["action"], decision["priority"]) == (action, priority)
+    assert decision["reasoning"]
+
+
+def test_confidence_falls_back_to_anomaly_confidence(engine):
+    """Rules without a fixed confidence report the anomaly confidence"""
+    assert engine.evaluate(None, _anomaly_alert(0.82, "temporal"))["confidence"] == 0.82
+    assert engine.evaluate(_schema_alert("CRITICAL"), None)["confidence"] == 0.9
+
+
+def _page_through(engine, limit):
+    """Follow decision_cursor() page by page until an empty page"""
+    pages = []
+    cursor = None
+    while True:
+        page = engine.get_recent_decisions(limit=limit, cursor=cursor)
+        if not page:
+            return pages
+        pages.append(page)
+        cursor = DecisionEngine.decision_cursor(page[-1])
+
+
+def test_recent_decisions_cursor_pages_without_gaps(engine):
+    """Following the last decision of each page visits every decision once, newest first"""
+    for second in range(7):
+        engine.evaluate(None, None)
+        # Distinct timestamps, however fast the loop runs
+        engine.decision_history[-1]["timestamp"] = f"2026-01-01T00:00:{second:02d}.000000Z"
+    newest_first = list(reversed(engine.decision_history))
+
+    pages = _page_through(engine, limit=3)
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert [d["decision_id"] for page in pages for d in page] == [d["decision_id"] for d in newest_first]
+
+
+def test_recent_decisions_cursor_keeps_tied_timestamps(engine):
+    """Decisions sharing a timestamp across a page boundary are neither skipped nor repeated"""
+    for timestamp in ["00:00:01", "00:00:02", "00:00:02", "00:00:02", "00:00:03"]:
+        engine.evaluate(None, None)
+        engine.decision_history[-1]["timestamp"] = f"2026-01-01T{timestamp}.000000Z"
+    newest_first = list(reversed(engine.decision_history))
+
+    pages = _page_through(engine, limit=2)
+
+    assert [d["decision_id"] for page in pages for d in page] == [d["decision_id"] for d in newest_first]
+
+
+def test_decision_timestamps_sort_as_strings(engine):
+    """Timestamps always carry microseconds, so string order matches time order"""
+    timestamp = engine.evaluate(None, None)["timestamp"]
+    assert timestamp.endswith("Z") and len(timestamp) == len("2026-01-01T00:00:00.000000Z")
@@ -0,0 +1,74 @@
+import sys
+import os
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents import fivetran_client
+from agents.fivetran_client import FivetranClient
+
+
+# No Fivetran access needed: the rate limiter and fan-out are exercised without HTTP calls
+
+
+class FakeClock:
+    """Stands in for time.monotonic/time.sleep; sleeping advances the clock"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(fivetran_client.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(fivetran_client.time, "sleep", clock.sleep)
+    return clock
+
+
+def test_token_bucket_allows_a_burst_then_spaces_requests(clock):
+    with FivetranClient("key", "secret") as client:
+        for _ in range(FivetranClient.RATE_LIMIT_REQUESTS_PER_HOUR):
+            client._check_rate_limit()
+        assert clock.sleeps == []
+
+        # Bucket empty: the next request waits for one token's refill time
+        client._check_rate_limit()
+        assert clock.sleeps == [pytest.approx(3600 / FivetranClient.RATE_LIMIT_REQUESTS_PER_HOUR)]
+
+
+def test_token_bucket_refills_over_time(clock):
+    with FivetranClient("key", "secret") as client:
+        for _ in range(FivetranClient.RATE_LIMIT_REQUESTS_PER_HOUR):
+            client._check_rate_limit()
+
+        clock.now += 3600  # A full hour refills the bucket, capped at capacity
+        for _ in range(FivetranClient.RATE_LIMIT_REQUESTS_PER_HOUR):
+            client._check_rate_limit()
+        assert clock.sleeps == []
+
+
+def test_many_statuses_keep_order_and_report_failures(monkeypatch):
+    def get_connector_status(self, connector_id, ttl_ms=0):
+        if connector_id == "broken":
+            raise fivetran_client.requests.exceptions.ConnectionError("connection reset")
+        return {"connector_id": connector_id, "status": "active"}
+
+    # Slotted instances can't be patched; the class can
+    monkeypatch.setattr(FivetranClient, "get_connector_status", get_connector_status)
+    with FivetranClient("key", "secret") as client:
+        statuses = client.get_many_connector_statuses(["a", "broken", "b", "c"])
+
+    assert [s["connector_id"] for s in statuses] == ["a", "broken", "b", "c"]
+    assert [s["status"] for s in statuses] == ["active", "unknown", "active", "active"]
+    assert statuses[1]["error"] == "connection reset"
@@ -1,13 +1,16 @@
 import pytest
-import pandas as pd
 from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock
 import sys
 import os
 
+import google.api_core.exceptions
+
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from agents.schema_guardian import SchemaGuardian
+from agents.schema_guardian import SchemaColumn, SchemaDiff, SchemaGuardian, _schema_from_table, schema_to_records
 from agents.agent_memory import AgentMemory
 
 
@@ -49,18 +52,18 @@ def test_capture_baseline(guardian, memory, test_config):
     
     # Assertions
     assert len(baseline) > 0, "No columns captured"
-    assert 'column_name' in baseline.columns
-    assert 'data_type' in baseline.columns
-    assert 'is_nullable' in baseline.columns
+    column = next(iter(baseline.values()))
+    assert column.data_type
+    assert column.is_nullable in ("YES", "NO")
     
     print(f"✅ Captured {len(baseline)} columns")
-    print(f"Columns: {baseline['column_name'].tolist()}")
+    print(f"Columns: {list(baseline)}")
     
     # Store in Firestore
-    memory.store_schema_baseline(test_config["table_id"], baseline)
+    memory.store_schema_baseline_raw(test_config["table_id"], schema_to_records(baseline))
     
     # Verify retrieval
-    retrieved = memory.get_schema_baseline(test_config["table_id"])
+    retrieved = memory.get_schema_baseline_raw(test_config["table_id"])
     assert retrieved is not None
     assert len(retrieved) == len(baseline)
     
@@ -71,16 +74,18 @@ def test_detect_no_changes(guardian, memory, test_config):
     """Test when schema hasn't changed"""
     # Capture baseline
     baseline = guardian.capture_baseline_schema()
-    memory.store_schema_baseline(test_config["table_id"], baseline)
+    memory.store_schema_baseline_raw(test_config["table_id"], schema_to_records(baseline))
     
     # Load baseline and detect
-    guardian.baseline_schema = memory.get_schema_baseline(test_config["table_id"])
+    guardian.baseline_schema = memory.get_schema_baseline_raw(test_config["table_id"])
+    assert guardian.baseline_schema == baseline
     changes = guardian.detect_schema_drift()
     
     # Should be no changes
-    assert len(changes["new_columns"]) == 0
-    assert len(changes["removed_columns"]) == 0
-    assert len(changes["type_changes"]) == 0
+    assert len(changes.new_columns) == 0
+    assert len(changes.removed_columns) == 0
+    assert len(changes.type_changes) == 0
+    assert not changes.has_changes
     
     print("✅ No false positives - schema correctly identified as stable")
 
@@ -234,6 +239,116 @@ def test_agent_status_storage(memory):
     print(f"✅ Agent status stored and retrieved: {retrieved}")
 
 
+# The tests below use in-memory stand-ins for the GCP clients (no GCP needed)
+
+
+def _field(name, field_type, mode="NULLABLE", **kwargs):
+    """Minimal stand-in for bigquery.SchemaField"""
+    return SimpleNamespace(name=name, field_type=field_type, mode=mode,
+                           max_length=kwargs.get("max_length"), precision=kwargs.get("precision"))
+
+
+def _table(fields, modified=1, partition_field="published_at"):
+    """Minimal stand-in for a tables.get response"""
+    return SimpleNamespace(
+        schema=fields,
+        modified=modified,
+        time_partitioning=SimpleNamespace(field=partition_field),
+        range_partitioning=None
+    )
+
+
+class FakeClient:
+    """Serves get_table from a list of responses (a table or an exception each)"""
+    
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.get_table_calls = 0
+    
+    def get_table(self, table_ref):
+        self.get_table_calls += 1
+        response = self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+RAW_NEWS_FIELDS = [
+    _field("article_id", "STRING", "REQUIRED"),
+    _field("published_at", "TIMESTAMP", "REQUIRED"),
+    _field("sentiment_score", "FLOAT"),
+]
+RAW_NEWS_SCHEMA = {
+    "article_id": SchemaColumn("STRING", "NO", "NO", 1),
+    "published_at": SchemaColumn("TIMESTAMP", "NO", "YES", 2),
+    "sentiment_score": SchemaColumn("FLOAT64", "YES", "NO", 3),
+}
+
+
+def test_schema_from_table_matches_information_schema():
+    """Metadata maps to INFORMATION_SCHEMA types, nullability and partitioning"""
+    assert _schema_from_table(_table(RAW_NEWS_FIELDS)) == RAW_NEWS_SCHEMA
+
+
+def test_schema_from_table_rejects_inexact_mappings():
+    """Repeated, parameterized and ingestion-time partitioned schemas need the query"""
+    assert _schema_from_table(_table([_field("tags", "STRING", "REPEATED")])) is None
+    assert _schema_from_table(_table([_field("code", "STRING", max_length=8)])) is None
+    assert _schema_from_table(_table(RAW_NEWS_FIELDS, partition_field=None)) is None
+
+
+def test_drift_falls_back_to_information_schema():
+    """A failing tables.get falls back to the INFORMATION_SCHEMA query"""
+    client = FakeClient(google.api_core.exceptions.ServiceUnavailable("metadata down"))
+    guardian = SchemaGuardian("project", "osprey_data", "raw_news", client=client)
+    guardian.baseline_schema = RAW_NEWS_SCHEMA
+    
+    current = dict(RAW_NEWS_SCHEMA, sentiment_score=SchemaColumn("STRING", "YES", "NO", 3))
+    guardian._query_schema = lambda: current
+    
+    changes = guardian.detect_schema_drift()
+    assert changes.type_changes == [{"column": "sentiment_score", "from": "FLOAT64", "to": "STRING"}]
+    assert guardian._calculate_severity(changes) == "CRITICAL"
+
+
+def test_drift_reuses_result_while_table_unmodified():
+    """An unmodified table is not re-diffed; a modified one is"""
+    client = FakeClient(_table(RAW_NEWS_FIELDS, modified=1))
+    guardian = SchemaGuardian("project", "osprey_data", "raw_news", client=client)
+    guardian.baseline_schema = RAW_NEWS_SCHEMA
+    
+    assert not guardian.detect_schema_drift().has_changes
+    
+    # Same modification time: the new column is not seen (no re-diff)
+    client.responses = [_table(RAW_NEWS_FIELDS + [_field("extra", "STRING")], modified=1)]
+    assert not guardian.detect_schema_drift().has_changes
+    
+    client.responses = [_table(RAW_NEWS_FIELDS + [_field("extra", "STRING")], modified=2)]
+    assert guardian.detect_schema_drift().new_columns == ["extra"]
+    assert client.get_table_calls == 3
+
+
+def test_severity_uses_most_severe_category():
+    """Combined changes take the severity of the worst category"""
+    changes = SchemaDiff(new_columns=["a"], nullability_changes=[{"column": "b"}])
+    guardian = SchemaGuardian("project", "osprey_data", "raw_news", client=FakeClient(None))
+    assert guardian._calculate_severity(changes) == "MEDIUM"
+    changes.removed_columns.append("c")
+    assert guardian._calculate_severity(changes) == "HIGH"
+    assert guardian._calculate_severity(SchemaDiff()) == "INFO"
+
+
+def test_memory_stores_schema_snapshot():
+    """store_schema_baseline takes capture_baseline_schema() output as-is"""
+    client = MagicMock()
+    memory = AgentMemory(client=client)
+    memory.store_schema_baseline("raw_news", RAW_NEWS_SCHEMA)
+    
+    stored = client.collection.return_value.document.return_value.set.call_args[0][0]
+    assert stored["columns"] == schema_to_records(RAW_NEWS_SCHEMA)
+    assert stored["column_count"] == 3
+
+
 if __name__ == "__main__":
     # Run tests with pytest
     pytest.main([__file__, "-v", "-s"])